@@ -0,0 +1,15 @@
+import multiprocessing
+import os
+import sys
+
+package_dir = os.path.dirname(os.path.abspath(__file__))
+
+if __name__ == "__main__":
+    # Hashing runs in a process pool; frozen builds need this to start it.
+    multiprocessing.freeze_support()
+    # The modules import each other by bare name, as under launch.py, and
+    # config_manager imports through the package.
+    sys.path.insert(0, package_dir)
+    sys.path.insert(1, os.path.dirname(package_dir))
+    from cli import main
+    sys.exit(main())
@@ -1,25 +1,171 @@
 import logging
+import threading
+import huggingface_hub
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-from config_manager import config
+from config_manager import (
+    get_proxy,
+    get_http_pool_size,
+    get_http2,
+    get_max_requests_per_second,
+)
+from rate_limiter import get_rate_limiter
 
 logger = logging.getLogger(__name__)
 
-def create_session():
+_session = None
+_client = None
+_lock = threading.Lock()
+# Requests without a body are re-sent when throttled; others are returned to
+# the caller, which decides whether the operation can be repeated.
+THROTTLE_RETRIES = 5
+RESENDABLE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class _RateLimitedAdapter(HTTPAdapter):
+    # Every request waits for the shared rate limiter and reports back
+    # whether the Hub throttled it.
+
+    def send(self, request, *args, **kwargs):
+        limiter = get_rate_limiter()
+        for attempt in range(THROTTLE_RETRIES + 1):
+            limiter.acquire()
+            response = super().send(request, *args, **kwargs)
+            throttled = limiter.observe(
+                response.status_code, response.headers.get("Retry-After")
+            )
+            if (
+                not throttled
+                or request.method not in RESENDABLE_METHODS
+                or attempt == THROTTLE_RETRIES
+            ):
+                return response
+            response.close()
+        return response
+
+
+def _limit_request(request):
+    get_rate_limiter().acquire()
+
+
+def _observe_response(response):
+    get_rate_limiter().observe(
+        response.status_code, response.headers.get("Retry-After")
+    )
+
+
+def _proxies():
+    settings = get_proxy()
+    if settings.get("use_proxy", "False") != "True":
+        return {}
+    return {
+        scheme: settings[scheme]
+        for scheme in ("http", "https")
+        if settings.get(scheme)
+    }
+
+
+def create_session(pool_size=None):
+    # Keeps up to pool_size connections per host alive, retries idempotent
+    # requests on 5xx, paces requests through the shared rate limiter and
+    # uses the configured proxy.
+    pool_size = pool_size or get_http_pool_size()
+    get_rate_limiter().set_max_rate(get_max_requests_per_second())
     session = requests.Session()
     retry = Retry(
         total=5,
         backoff_factor=0.5,
         status_forcelist=[500, 502, 503, 504],
+        # 429s and their Retry-After belong to the shared rate limiter;
+        # urllib3 sleeping on them would hide the throttling from it.
+        respect_retry_after_header=False,
+        # The last response is returned as-is, for hf_raise_for_status.
+        raise_on_status=False,
+    )
+    adapter = _RateLimitedAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
     )
-    adapter = HTTPAdapter(max_retries=retry)
     session.mount("http://", adapter)
     session.mount("https://", adapter)
-    if config.getboolean("Proxy", "use_proxy"):
-        proxies = {"http": config["Proxy"]["http"], "https": config["Proxy"]["https"]}
+    proxies = _proxies()
+    if proxies:
         session.proxies.update(proxies)
         logger.info(f"Using proxy: {proxies}")
     else:
         logger.info("Not using a proxy.")
     return session
+
+
+def create_client(pool_size=None):
+    # huggingface_hub 1.x talks httpx instead of requests; same pool size
+    # and proxy, plus HTTP/2 when the h2 package is installed.
+    import httpx
+
+    pool_size = pool_size or get_http_pool_size()
+    http2 = False
+    if get_http2():
+        try:
+            import h2  # noqa: F401
+            http2 = True
+        except ImportError:
+            logger.info("HTTP/2 unavailable (h2 is not installed).")
+    proxies = _proxies()
+    get_rate_limiter().set_max_rate(get_max_requests_per_second())
+    event_hooks = {"request": [_limit_request], "response": [_observe_response]}
+    try:
+        # Adds the request-id headers the Hub's own client sends.
+        from huggingface_hub.utils._http import hf_request_event_hook
+        event_hooks["request"].append(hf_request_event_hook)
+    except ImportError:
+        pass
+    return httpx.Client(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=pool_size, max_keepalive_connections=pool_size
+        ),
+        proxy=proxies.get("https") or proxies.get("http"),
+        follow_redirects=True,
+        timeout=None,
+        event_hooks=event_hooks,
+    )
+
+
+def get_session():
+    # The one requests session of the process; thread-safe to share.
+    global _session
+    with _lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+
+def get_client():
+    global _client
+    with _lock:
+        if _client is None:
+            _client = create_client()
+        return _client
+
+
+def configure_hub():
+    # Routes every huggingface_hub request (HfApi, upload_file, create_repo,
+    # ...) through the shared pool so calls reuse warm connections.
+    if hasattr(huggingface_hub, "set_client_factory"):
+        huggingface_hub.set_client_factory(get_client)
+    elif hasattr(huggingface_hub, "configure_http_backend"):
+        huggingface_hub.configure_http_backend(backend_factory=get_session)
+    else:
+        logger.warning(
+            "This huggingface_hub version can't use a shared HTTP session."
+        )
+
+
+def reset_sessions():
+    # After the proxy or pool settings change. Transfers in flight keep the
+    # connections they have; new requests get the new settings.
+    global _session, _client
+    with _lock:
+        _session = None
+        _client = None
+    configure_hub()
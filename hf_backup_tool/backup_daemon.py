@@ -0,0 +1,298 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from custom_exceptions import TransferCancelledError
+from file_scanner import TreeSnapshot
+from upload_engine import (
+    build_path_in_repo,
+    commit_operations,
+    plan_upload,
+    preupload_file,
+)
+
+logger = logging.getLogger(__name__)
+
+# Uploads of one file that may fail before it is given up on (until it
+# changes again).
+MAX_ATTEMPTS = 3
+DEFAULT_FILES_PER_COMMIT = 100
+
+
+class BackupDaemon:
+    # Watches a folder and backs up files once they stop changing:
+    #
+    #   scan (poll) -> settling -> ready -> uploading -> staged -> commit
+    #
+    # A file is ready when its size and mtime held still for
+    # settle_seconds. At most max_workers files upload at once (LFS blobs
+    # are pre-uploaded without a commit), and uploaded files are committed
+    # together once files_per_commit are staged or the oldest staged file
+    # has waited commit_interval seconds. No upload starts while a full
+    # batch waits for its commit, so a burst of new files backs up in the
+    # "ready" list (paths only) instead of in memory or on the network.
+
+    def __init__(
+        self,
+        api,
+        repo_id,
+        folder,
+        repo_type="model",
+        repo_folder=None,
+        recursive=True,
+        include=None,
+        exclude=None,
+        extension=None,
+        settle_seconds=10.0,
+        poll_seconds=5.0,
+        max_workers=2,
+        files_per_commit=DEFAULT_FILES_PER_COMMIT,
+        commit_interval=30.0,
+        commit_message="Automatic backup",
+        create_pr=False,
+        upload_existing=False,
+        hash_cache=None,
+        cancel_event=None,
+        on_output=None,
+        on_status=None,
+    ):
+        self.api = api
+        self.repo_id = repo_id
+        self.folder = folder
+        self.repo_type = repo_type
+        self.repo_folder = repo_folder
+        self.snapshot = TreeSnapshot(
+            folder, recursive, include, exclude, extension
+        )
+        self.settle_seconds = settle_seconds
+        self.poll_seconds = poll_seconds
+        self.max_workers = max(1, max_workers)
+        self.files_per_commit = files_per_commit or DEFAULT_FILES_PER_COMMIT
+        self.commit_interval = commit_interval
+        self.commit_message = commit_message
+        self.create_pr = create_pr
+        self.upload_existing = upload_existing
+        self.hash_cache = hash_cache
+        self.cancel_event = cancel_event or threading.Event()
+        self.on_output = on_output
+        self.on_status = on_status
+        # path -> (size, mtime, monotonic time of the last change)
+        self._settling = {}
+        # path -> (size, mtime), in the order files became ready
+        self._ready = {}
+        # future -> (path, size, mtime)
+        self._uploading = {}
+        # [(operation, path, size, mtime)]
+        self._staged = []
+        self._staged_since = None
+        self._attempts = {}
+        self.files_committed = 0
+        self.bytes_committed = 0
+        self.files_failed = 0
+
+    def stop(self):
+        self.cancel_event.set()
+
+    def run(self):
+        # Blocks until stop(). Files already uploaded are committed before
+        # returning; uploads in flight are abandoned.
+        self._output(f"👀 Watching {self.folder} for files to back up...")
+        added, _, _ = self.snapshot.rescan(cancel_event=self.cancel_event)
+        if self.upload_existing and added:
+            self._queue_existing(added)
+        executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="backup"
+        )
+        next_poll = time.monotonic() + self.poll_seconds
+        try:
+            while not self.cancel_event.is_set():
+                now = time.monotonic()
+                if now >= next_poll:
+                    self._poll(now)
+                    next_poll = now + self.poll_seconds
+                self._promote_settled(now)
+                self._start_uploads(executor)
+                if self._commit_due(now):
+                    self._commit()
+                self._report_status()
+                timeout = max(0.05, min(1.0, next_poll - time.monotonic()))
+                if self._uploading:
+                    done, _ = wait(
+                        list(self._uploading),
+                        timeout=timeout,
+                        return_when=FIRST_COMPLETED,
+                    )
+                    for future in done:
+                        self._finish_upload(future)
+                else:
+                    self.cancel_event.wait(timeout)
+        except TransferCancelledError:
+            pass
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            for future in list(self._uploading):
+                if future.done() and not future.cancelled():
+                    self._finish_upload(future)
+            if self._staged:
+                self._commit()
+            self._report_status()
+        self._output(
+            f"🛑 Auto-backup stopped. {self.files_committed} file(s) backed up."
+        )
+
+    def _output(self, message):
+        logger.info(message)
+        if self.on_output:
+            self.on_output(message)
+
+    def _report_status(self):
+        if self.on_status:
+            self.on_status({
+                "settling": len(self._settling),
+                "ready": len(self._ready),
+                "uploading": len(self._uploading),
+                "staged": len(self._staged),
+                "committed": self.files_committed,
+                "bytes_committed": self.bytes_committed,
+                "failed": self.files_failed,
+            })
+
+    def _queue_existing(self, files):
+        # Files present at start count as settled; the ones already on the
+        # Hub with the same content are skipped.
+        paths = {f.path: f for f in files}
+        to_upload, skipped = plan_upload(
+            self.api,
+            self.repo_id,
+            self.repo_type,
+            [
+                (path, build_path_in_repo(path, self.repo_folder, self.folder))
+                for path in paths
+            ],
+            path_in_repo=self.repo_folder,
+            cancel_event=self.cancel_event,
+            hash_cache=self.hash_cache,
+        )
+        for path in to_upload:
+            scanned = paths[path]
+            self._ready[path] = (scanned.size, scanned.mtime)
+        self._output(
+            f"📂 {len(to_upload)} existing file(s) to back up, "
+            f"{len(skipped)} already on the Hub."
+        )
+
+    def _poll(self, now):
+        added, removed, modified = self.snapshot.rescan(
+            cancel_event=self.cancel_event
+        )
+        for scanned in added + modified:
+            # (Re)starts the settle clock; a ready file that changed again
+            # has to settle again.
+            self._ready.pop(scanned.path, None)
+            self._settling[scanned.path] = (scanned.size, scanned.mtime, now)
+        for relpath in removed:
+            path = os.path.join(self.folder, *relpath.split("/"))
+            self._settling.pop(path, None)
+            self._ready.pop(path, None)
+
+    def _promote_settled(self, now):
+        for path, (size, mtime, since) in list(self._settling.items()):
+            if now - since >= self.settle_seconds:
+                del self._settling[path]
+                self._ready[path] = (size, mtime)
+
+    def _start_uploads(self, executor):
+        while (
+            self._ready
+            and len(self._uploading) < self.max_workers
+            and len(self._staged) + len(self._uploading) < self.files_per_commit
+        ):
+            path = next(iter(self._ready))
+            size, mtime = self._ready.pop(path)
+            future = executor.submit(
+                preupload_file,
+                self.api,
+                self.repo_id,
+                self.repo_type,
+                path,
+                build_path_in_repo(path, self.repo_folder, self.folder),
+                create_pr=self.create_pr,
+                cancel_event=self.cancel_event,
+            )
+            self._uploading[future] = (path, size, mtime)
+
+    def _finish_upload(self, future):
+        path, size, mtime = self._uploading.pop(future)
+        relpath = os.path.relpath(path, self.folder)
+        try:
+            operation = future.result()
+        except TransferCancelledError:
+            return
+        except Exception as e:
+            attempts = self._attempts.get(path, 0) + 1
+            self._attempts[path] = attempts
+            if attempts < MAX_ATTEMPTS:
+                self._output(
+                    f"⚠️ Upload of {relpath} failed ({e}); retrying "
+                    f"({attempts}/{MAX_ATTEMPTS})."
+                )
+                # Retried after another settle period.
+                self._settling[path] = (size, mtime, time.monotonic())
+            else:
+                self.files_failed += 1
+                self._attempts.pop(path, None)
+                self._output(
+                    f"❌ Giving up on {relpath} after {attempts} attempts: {e}"
+                )
+            return
+        self._attempts.pop(path, None)
+        if not self._staged:
+            self._staged_since = time.monotonic()
+        self._staged.append((operation, path, size, mtime))
+
+    def _commit_due(self, now):
+        if not self._staged:
+            return False
+        if len(self._staged) >= self.files_per_commit:
+            return True
+        if now - self._staged_since >= self.commit_interval:
+            return True
+        # Nothing else is coming soon: commit what there is.
+        return not (self._uploading or self._ready or self._settling)
+
+    def _commit(self):
+        staged = self._staged
+        self._staged = []
+        self._staged_since = None
+        try:
+            # Not tied to cancel_event: the final commit on stop must land.
+            commit_operations(
+                self.api,
+                self.repo_id,
+                self.repo_type,
+                [operation for operation, _, _, _ in staged],
+                self.commit_message,
+                operations_per_commit=self.files_per_commit,
+                create_pr=self.create_pr,
+            )
+        except Exception as e:
+            self._output(f"❌ Commit of {len(staged)} file(s) failed: {e}")
+            now = time.monotonic()
+            for _, path, size, mtime in staged:
+                attempts = self._attempts.get(path, 0) + 1
+                self._attempts[path] = attempts
+                if attempts < MAX_ATTEMPTS:
+                    self._settling[path] = (size, mtime, now)
+                else:
+                    self.files_failed += 1
+                    self._attempts.pop(path, None)
+            return
+        self.files_committed += len(staged)
+        self.bytes_committed += sum(size for _, _, size, _ in staged)
+        self._output(
+            f"✅ Committed {len(staged)} file(s) to '{self.repo_id}': "
+            + ", ".join(
+                os.path.relpath(path, self.folder) for _, path, _, _ in staged
+            )
+        )
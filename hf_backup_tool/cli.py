@@ -0,0 +1,761 @@
+import argparse
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+
+# Set before huggingface_hub is imported: its tqdm bars would interleave
+# with (and break) line-based output.
+os.environ.setdefault("HF_HUB_DISABLE_PROGRESS_BARS", "1")
+
+from custom_exceptions import IntegrityError, TransferCancelledError
+from transfer_progress import (
+    ByteCounter,
+    ProgressThrottle,
+    ThroughputMeter,
+    format_bytes,
+    format_eta,
+)
+from config_manager import (
+    get_api_token,
+    get_max_concurrent_upload_jobs,
+    get_operations_per_commit,
+    get_upload_retries,
+    get_upload_retry_backoff,
+    get_skip_unchanged,
+    get_hash_workers,
+    get_chunked_downloads,
+    get_download_chunk_size_mb,
+    get_download_streams_per_file,
+    get_download_parallel_files,
+    get_verify_downloads,
+    get_zip_compression,
+    get_zip_compression_level,
+    get_zip_compression_threads,
+    get_zip_auto_store,
+    get_zip_store_extensions,
+    get_settle_seconds,
+    get_watch_poll_seconds,
+    get_auto_backup_commit_seconds,
+)
+
+# The GUI modules and everything that imports PyQt6 stay out of this file;
+# huggingface_hub is only imported by the commands that talk to the Hub,
+# so `zip` and `--help` start without it.
+
+logger = logging.getLogger(__name__)
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_CANCELLED = 130
+PROGRESS_INTERVAL = 1.0
+
+
+class Reporter:
+    # Writes results and progress to stdout: readable lines by default, or
+    # one JSON object per line (JSON Lines) with --json, e.g.
+    #   {"event": "progress", "done": 1048576, "total": 4194304, ...}
+    def __init__(self, json_lines=False, quiet=False, stream=None):
+        self.json_lines = json_lines
+        self.quiet = quiet
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def event(self, kind, message=None, **fields):
+        if self.json_lines:
+            record = {"event": kind, "time": round(time.time(), 3)}
+            if message is not None:
+                record["message"] = message
+            record.update(fields)
+            line = json.dumps(record, default=str)
+        elif message is None or (self.quiet and kind == "progress"):
+            return
+        else:
+            line = message
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def progress(self, total):
+        # A callback taking bytes done so far; rate-limited to one line per
+        # PROGRESS_INTERVAL. Call .flush() on it at the end.
+        meter = ThroughputMeter()
+
+        def emit(done):
+            meter.update(done)
+            rate = meter.rate()
+            eta = meter.eta(total - done) if total else None
+            percent = done / total * 100 if total else None
+            text = f"  {format_bytes(done)}"
+            if total:
+                text += f" / {format_bytes(total)} ({percent:.1f}%"
+                text += f", {format_bytes(rate)}/s, ETA {format_eta(eta)})"
+            else:
+                text += f" ({format_bytes(rate)}/s)"
+            self.event(
+                "progress",
+                text,
+                done=done,
+                total=total,
+                percent=round(percent, 2) if percent is not None else None,
+                bytes_per_second=round(rate),
+                eta_seconds=round(eta) if eta is not None else None,
+            )
+
+        return ProgressThrottle(emit, interval=PROGRESS_INTERVAL)
+
+
+def _install_signal_handlers(cancel_event, reporter):
+    # First Ctrl+C (or SIGTERM) stops cleanly; a second one aborts.
+    def handler(signum, frame):
+        if cancel_event.is_set():
+            raise KeyboardInterrupt
+        cancel_event.set()
+        reporter.event("cancelling", "Stopping... (press Ctrl+C again to abort)")
+
+    signal.signal(signal.SIGINT, handler)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, handler)
+
+
+def _token(args):
+    return args.token or os.environ.get("HF_TOKEN") or get_api_token() or None
+
+
+def _require_token(args):
+    token = _token(args)
+    if not token:
+        raise SystemExit(
+            "No API token: pass --token, set HF_TOKEN or save one in the "
+            "GUI settings."
+        )
+    return token
+
+
+def _hub_api(token):
+    from huggingface_hub import HfApi
+    from api_session import configure_hub
+
+    # Every Hub call shares one pooled, proxy-aware HTTP session.
+    configure_hub()
+    return HfApi(token=token)
+
+
+def _collect_upload_files(args):
+    # (local_path, path_in_repo, size) for each file argument and every
+    # file under each directory argument.
+    from file_scanner import parse_patterns, scan_directory
+    from upload_engine import build_path_in_repo
+
+    include = parse_patterns(",".join(args.include or []))
+    exclude = parse_patterns(",".join(args.exclude or []))
+    files = []
+    for path in args.paths:
+        path = os.path.abspath(path)
+        if os.path.isdir(path):
+            for scanned in scan_directory(
+                path,
+                recursive=not args.no_recursive,
+                include=include,
+                exclude=exclude,
+            ):
+                files.append((
+                    scanned.path,
+                    build_path_in_repo(scanned.path, args.path_in_repo, path),
+                    scanned.size,
+                ))
+        elif os.path.isfile(path):
+            files.append((
+                path,
+                build_path_in_repo(path, args.path_in_repo),
+                os.path.getsize(path),
+            ))
+        else:
+            raise SystemExit(f"No such file or directory: {path}")
+    return files
+
+
+def _upload(args, reporter, cancel_event, files):
+    from hash_cache import get_hash_cache
+    from upload_engine import plan_upload, upload_files
+
+    api = _hub_api(_require_token(args))
+    sizes = {path: size for path, _, size in files}
+    targets = {path: target for path, target, _ in files}
+    if args.skip_unchanged:
+        reporter.event(
+            "status", f"Comparing {len(files)} file(s) with {args.repo_id}..."
+        )
+        to_upload, skipped = plan_upload(
+            api,
+            args.repo_id,
+            args.repo_type,
+            [(path, target) for path, target, _ in files],
+            path_in_repo=args.path_in_repo,
+            cancel_event=cancel_event,
+            hash_cache=get_hash_cache(),
+            max_workers=get_hash_workers() or None,
+        )
+        for path, size in skipped:
+            reporter.event(
+                "file",
+                f"= {targets[path]} (unchanged)",
+                path=path,
+                path_in_repo=targets[path],
+                size=size,
+                status="skipped",
+            )
+    else:
+        to_upload, skipped = [path for path, _, _ in files], []
+    total = sum(sizes[path] for path in to_upload)
+    reporter.event(
+        "start",
+        f"Uploading {len(to_upload)} file(s) ({format_bytes(total)}) to "
+        f"{args.repo_id}...",
+        files=len(to_upload),
+        bytes=total,
+        skipped=len(skipped),
+    )
+    if not to_upload:
+        return [], []
+    progress = reporter.progress(total)
+
+    def on_file_done(path, error):
+        reporter.event(
+            "file",
+            f"{'!' if error else '+'} {targets[path]}"
+            + (f" ({error})" if error else ""),
+            path=path,
+            path_in_repo=targets[path],
+            size=sizes[path],
+            status="failed" if error else "uploaded",
+            error=str(error) if error else None,
+        )
+
+    def on_retry(path, attempt, delay, error):
+        reporter.event(
+            "retry",
+            f"~ {targets[path]} ({error}); retry {attempt}/{args.retries} "
+            f"in {delay:.0f}s",
+            path=path,
+            attempt=attempt,
+            delay=round(delay, 1),
+            error=str(error),
+        )
+
+    def on_commit(index, count, chunk, commit_info):
+        url = getattr(commit_info, "commit_url", None)
+        reporter.event(
+            "commit",
+            f"Commit {index + 1}/{count}: {len(chunk)} file(s) {url or ''}",
+            index=index,
+            count=count,
+            files=len(chunk),
+            url=url,
+        )
+
+    operations, failures = upload_files(
+        api,
+        args.repo_id,
+        args.repo_type,
+        [(path, targets[path]) for path in to_upload],
+        args.message,
+        max_workers=args.jobs,
+        operations_per_commit=args.files_per_commit,
+        create_pr=args.create_pr,
+        progress_callback=progress,
+        cancel_event=cancel_event,
+        on_file_done=on_file_done,
+        on_commit=on_commit,
+        retries=args.retries,
+        retry_backoff=get_upload_retry_backoff(),
+        on_retry=on_retry,
+    )
+    progress.flush()
+    return operations, failures
+
+
+def cmd_upload(args, reporter, cancel_event):
+    files = _collect_upload_files(args)
+    if not files:
+        reporter.event("done", "Nothing to upload.", ok=True, uploaded=0)
+        return EXIT_OK
+    operations, failures = _upload(args, reporter, cancel_event, files)
+    ok = not failures
+    reporter.event(
+        "done",
+        f"{'Done' if ok else 'Finished with errors'}: "
+        f"{len(operations)} uploaded, {len(failures)} failed.",
+        ok=ok,
+        uploaded=len(operations),
+        failed=len(failures),
+    )
+    return EXIT_OK if ok else EXIT_FAILED
+
+
+def cmd_download(args, reporter, cancel_event):
+    from download_engine import (
+        ChunkedDownloader,
+        list_download_files,
+        parse_hf_url,
+    )
+    from download_journal import DownloadJournal, sibling_etag
+    from hash_cache import get_hash_cache
+
+    repo_id, repo_type, revision, folder = parse_hf_url(args.repo)
+    if not repo_id:
+        raise SystemExit(f"Not a Hugging Face repo or URL: {args.repo}")
+    repo_type = args.repo_type or repo_type
+    revision = args.revision or revision
+    folder = args.path or folder
+    token = _token(args)
+    files = list_download_files(
+        _hub_api(token), repo_id, repo_type, revision, folder
+    )
+    total = sum(f.size for f in files if f.size is not None)
+    reporter.event(
+        "start",
+        f"Downloading {len(files)} file(s) ({format_bytes(total)}) from "
+        f"{repo_id}@{revision} into {args.dest}...",
+        files=len(files),
+        bytes=total,
+        repo_id=repo_id,
+        revision=revision,
+    )
+    if not files:
+        reporter.event("done", "Nothing to download.", ok=True, downloaded=0)
+        return EXIT_OK
+    progress = reporter.progress(total)
+    counter = ByteCounter(total, progress)
+    chunked = get_chunked_downloads()
+    downloader = ChunkedDownloader(
+        token=token,
+        chunk_size=(args.chunk_size_mb or get_download_chunk_size_mb())
+        * 1024 * 1024,
+        streams_per_file=args.connections or (
+            get_download_streams_per_file() if chunked else 1
+        ),
+        parallel_files=args.parallel_files or (
+            get_download_parallel_files() if chunked else 1
+        ),
+        progress_callback=counter.add,
+        cancel_event=cancel_event,
+        hash_cache=get_hash_cache(),
+        hash_workers=get_hash_workers() or None,
+        verify=get_verify_downloads() and not args.no_verify,
+    )
+    os.makedirs(args.dest, exist_ok=True)
+    journal = DownloadJournal.for_task(
+        args.dest, repo_id, repo_type, revision, folder
+    )
+    sizes = {f.rfilename: f.size for f in files}
+
+    def on_file_done(path_in_repo, size, status):
+        reporter.event(
+            "file",
+            f"{'=' if status == 'skipped' else '+'} {path_in_repo}",
+            path_in_repo=path_in_repo,
+            size=sizes.get(path_in_repo),
+            status=status,
+        )
+
+    def on_file_retry(path_in_repo, attempt, error):
+        reporter.event(
+            "retry",
+            f"! {path_in_repo} failed verification, retrying ({attempt})",
+            path_in_repo=path_in_repo,
+            attempt=attempt,
+            error=str(error),
+        )
+
+    try:
+        downloader.download_files(
+            repo_id,
+            repo_type,
+            revision,
+            [(f.rfilename, f.size, sibling_etag(f)) for f in files],
+            args.dest,
+            on_file_done=on_file_done,
+            journal=journal,
+            on_file_retry=on_file_retry,
+        )
+    except IntegrityError as e:
+        reporter.event("done", f"Verification failed: {e}", ok=False,
+                       error=str(e))
+        return EXIT_FAILED
+    progress.flush()
+    reporter.event(
+        "done", f"Done: {len(files)} file(s) in {args.dest}.", ok=True,
+        downloaded=len(files),
+    )
+    return EXIT_OK
+
+
+def cmd_zip(args, reporter, cancel_event):
+    from zip_engine import (
+        INCOMPRESSIBLE_EXTENSIONS,
+        CompressionOptions,
+        collect_entries,
+        write_volumes,
+        write_zip,
+    )
+
+    if not os.path.isdir(args.folder):
+        raise SystemExit(f"Not a directory: {args.folder}")
+    try:
+        options = CompressionOptions(
+            codec=args.codec or get_zip_compression(),
+            level=args.level or get_zip_compression_level(),
+            threads=args.threads or get_zip_compression_threads(),
+            auto_store=get_zip_auto_store(),
+            store_extensions=INCOMPRESSIBLE_EXTENSIONS.union(
+                get_zip_store_extensions()
+            ),
+        )
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+    if args.incremental:
+        from incremental import write_incremental
+        from hash_cache import get_hash_cache
+
+        progress = None
+
+        def on_planned(changed, deleted):
+            nonlocal progress
+            total = sum(size for _, _, size in changed)
+            progress = reporter.progress(total)
+            counter.total = total
+            reporter.event(
+                "start",
+                f"{len(changed)} new or changed file(s) "
+                f"({format_bytes(total)}), {len(deleted)} deleted.",
+                files=len(changed),
+                deleted=len(deleted),
+                bytes=total,
+            )
+
+        counter = ByteCounter(0, lambda done: progress(done))
+        target, changed, deleted = write_incremental(
+            args.folder,
+            args.output,
+            options,
+            cancel_event=cancel_event,
+            progress_callback=counter.add,
+            hash_cache=get_hash_cache(),
+            max_workers=get_hash_workers() or None,
+            on_planned=on_planned,
+        )
+        if progress is not None:
+            progress.flush()
+        reporter.event(
+            "done",
+            f"Wrote {target}." if target else "Nothing changed.",
+            ok=True,
+            archive=target,
+            changed=changed,
+            deleted=deleted,
+        )
+        return EXIT_OK
+
+    entries = collect_entries(args.folder)
+    total = sum(size for _, _, size in entries)
+    reporter.event(
+        "start",
+        f"Archiving {len(entries)} file(s) ({format_bytes(total)})...",
+        files=len(entries),
+        bytes=total,
+    )
+    progress = reporter.progress(total)
+    counter = ByteCounter(total, progress)
+    if args.split_size_mb:
+        dest_dir = os.path.dirname(os.path.abspath(args.output))
+        base_name, ext = os.path.splitext(os.path.basename(args.output))
+        archive_format = args.format or ("tar" if ext == ".tar" else "zip")
+        os.makedirs(dest_dir, exist_ok=True)
+
+        def on_volume_sealed(path, index):
+            reporter.event(
+                "volume",
+                f"+ {os.path.basename(path)}",
+                path=path,
+                index=index,
+                size=os.path.getsize(path),
+            )
+
+        paths = write_volumes(
+            entries,
+            dest_dir,
+            base_name,
+            args.split_size_mb * 1024 * 1024,
+            options,
+            archive_format,
+            cancel_event=cancel_event,
+            progress_callback=counter.add,
+            on_volume_sealed=on_volume_sealed,
+        )
+        progress.flush()
+        reporter.event(
+            "done", f"Wrote {len(paths)} volume(s) to {dest_dir}.", ok=True,
+            volumes=paths,
+        )
+        return EXIT_OK
+    write_zip(
+        entries,
+        args.output,
+        options,
+        cancel_event=cancel_event,
+        progress_callback=counter.add,
+    )
+    progress.flush()
+    reporter.event(
+        "done", f"Wrote {args.output}.", ok=True, archive=args.output,
+        size=os.path.getsize(args.output),
+    )
+    return EXIT_OK
+
+
+def cmd_sync(args, reporter, cancel_event):
+    # One pass uploads whatever differs from the Hub; --watch then keeps
+    # backing up new and changed files until interrupted.
+    if not os.path.isdir(args.folder):
+        raise SystemExit(f"Not a directory: {args.folder}")
+    if not args.watch:
+        args.paths = [args.folder]
+        args.no_recursive = False
+        args.skip_unchanged = True
+        return cmd_upload(args, reporter, cancel_event)
+
+    from backup_daemon import BackupDaemon
+    from file_scanner import parse_patterns
+    from hash_cache import get_hash_cache
+
+    def on_status(status):
+        reporter.event("status", None, **status)
+
+    daemon = BackupDaemon(
+        _hub_api(_require_token(args)),
+        args.repo_id,
+        os.path.abspath(args.folder),
+        repo_type=args.repo_type,
+        repo_folder=args.path_in_repo,
+        include=parse_patterns(",".join(args.include or [])),
+        exclude=parse_patterns(",".join(args.exclude or [])),
+        settle_seconds=args.settle_seconds,
+        poll_seconds=args.poll_seconds,
+        max_workers=args.jobs,
+        files_per_commit=args.files_per_commit,
+        commit_interval=args.commit_interval,
+        commit_message=args.message,
+        create_pr=args.create_pr,
+        upload_existing=True,
+        hash_cache=get_hash_cache(),
+        cancel_event=cancel_event,
+        on_output=lambda message: reporter.event("log", message),
+        on_status=on_status,
+    )
+    daemon.run()
+    reporter.event(
+        "done",
+        f"Backed up {daemon.files_committed} file(s).",
+        ok=not daemon.files_failed,
+        uploaded=daemon.files_committed,
+        failed=daemon.files_failed,
+    )
+    return EXIT_OK if not daemon.files_failed else EXIT_FAILED
+
+
+def _add_repo_arguments(parser):
+    parser.add_argument("--repo-id", required=True, help="owner/name")
+    parser.add_argument(
+        "--repo-type", default="model", choices=["model", "dataset", "space"]
+    )
+    parser.add_argument(
+        "--path-in-repo", default=None,
+        help="Folder in the repo to upload into.",
+    )
+    parser.add_argument(
+        "--include", action="append",
+        help="Glob(s) of files to include, comma-separated or repeated.",
+    )
+    parser.add_argument(
+        "--exclude", action="append",
+        help="Glob(s) of files or folders to leave out.",
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=None,
+        help="Files uploaded at once (default: from settings).",
+    )
+    parser.add_argument(
+        "--retries", type=int, default=None,
+        help="Retries per file on timeouts, throttling and server errors "
+        "(default: from settings).",
+    )
+    parser.add_argument(
+        "--files-per-commit", type=int, default=None,
+        help="Split commits after this many files (0 = one commit).",
+    )
+    parser.add_argument(
+        "--message", default="Upload with Hugging Face Backup Tool",
+        help="Commit message.",
+    )
+    parser.add_argument("--create-pr", action="store_true")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m hf_backup_tool",
+        description="Back up to and restore from the Hugging Face Hub "
+        "without the GUI.",
+    )
+    parser.add_argument(
+        "--json", action="store_true",
+        help="Write progress and results as JSON Lines on stdout.",
+    )
+    parser.add_argument(
+        "--quiet", action="store_true", help="Don't print progress lines."
+    )
+    parser.add_argument(
+        "--token", default=None,
+        help="API token (default: $HF_TOKEN, then the saved token).",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    upload = commands.add_parser("upload", help="Upload files and folders.")
+    upload.add_argument("paths", nargs="+", help="Files or folders.")
+    _add_repo_arguments(upload)
+    upload.add_argument(
+        "--no-recursive", action="store_true",
+        help="Only upload the top level of folder arguments.",
+    )
+    skip = upload.add_mutually_exclusive_group()
+    skip.add_argument(
+        "--skip-unchanged", dest="skip_unchanged", action="store_true",
+        default=None, help="Skip files whose content is already on the Hub.",
+    )
+    skip.add_argument(
+        "--no-skip-unchanged", dest="skip_unchanged", action="store_false",
+    )
+    upload.set_defaults(handler=cmd_upload)
+
+    download = commands.add_parser(
+        "download", help="Download a repo or a folder of it."
+    )
+    download.add_argument(
+        "repo", help="owner/name or a huggingface.co URL (may include "
+        "/tree/<revision>/<folder>).",
+    )
+    download.add_argument("dest", help="Local folder to download into.")
+    download.add_argument(
+        "--repo-type", default=None, choices=["model", "dataset", "space"]
+    )
+    download.add_argument("--revision", default=None)
+    download.add_argument(
+        "--path", default=None, help="Only download this folder of the repo."
+    )
+    download.add_argument(
+        "--connections", type=int, default=None,
+        help="Parallel connections per file.",
+    )
+    download.add_argument(
+        "--parallel-files", type=int, default=None,
+        help="Files downloaded at once.",
+    )
+    download.add_argument("--chunk-size-mb", type=int, default=None)
+    download.add_argument(
+        "--no-verify", action="store_true",
+        help="Don't check downloads against the Hub's hashes.",
+    )
+    download.set_defaults(handler=cmd_download)
+
+    zip_parser = commands.add_parser("zip", help="Archive a folder.")
+    zip_parser.add_argument("folder")
+    zip_parser.add_argument(
+        "output", help="Archive path; with --split-size-mb, the volumes are "
+        "named after it.",
+    )
+    zip_parser.add_argument(
+        "--codec", choices=["deflate", "zstd", "lzma", "store"], default=None
+    )
+    zip_parser.add_argument("--level", type=int, default=None)
+    zip_parser.add_argument("--threads", type=int, default=None)
+    zip_parser.add_argument(
+        "--split-size-mb", type=int, default=None,
+        help="Write volumes of about this size instead of one archive.",
+    )
+    zip_parser.add_argument(
+        "--format", choices=["zip", "tar"], default=None,
+        help="Volume format (tar writes WebDataset-style shards).",
+    )
+    zip_parser.add_argument(
+        "--incremental", action="store_true",
+        help="Only archive changes since the last run, into a delta "
+        "archive next to output.",
+    )
+    zip_parser.set_defaults(handler=cmd_zip)
+
+    sync = commands.add_parser(
+        "sync", help="Upload what changed in a folder; --watch keeps going."
+    )
+    sync.add_argument("folder")
+    _add_repo_arguments(sync)
+    sync.add_argument(
+        "--watch", action="store_true",
+        help="Keep watching and upload files once they stop changing.",
+    )
+    sync.add_argument("--settle-seconds", type=float, default=None)
+    sync.add_argument("--poll-seconds", type=float, default=None)
+    sync.add_argument("--commit-interval", type=float, default=None)
+    sync.set_defaults(handler=cmd_sync)
+    return parser
+
+
+def _apply_defaults(args):
+    # Options left unset fall back to the GUI's saved settings.
+    if getattr(args, "jobs", None) is None and hasattr(args, "jobs"):
+        args.jobs = max(1, get_max_concurrent_upload_jobs())
+    if hasattr(args, "retries") and args.retries is None:
+        args.retries = max(0, get_upload_retries())
+    if hasattr(args, "files_per_commit") and args.files_per_commit is None:
+        args.files_per_commit = max(0, get_operations_per_commit())
+    if hasattr(args, "skip_unchanged") and args.skip_unchanged is None:
+        args.skip_unchanged = get_skip_unchanged()
+    if hasattr(args, "path_in_repo") and args.path_in_repo:
+        args.path_in_repo = args.path_in_repo.strip("/") or None
+    if getattr(args, "command", None) == "sync":
+        if args.settle_seconds is None:
+            args.settle_seconds = get_settle_seconds()
+        if args.poll_seconds is None:
+            args.poll_seconds = get_watch_poll_seconds()
+        if args.commit_interval is None:
+            args.commit_interval = get_auto_backup_commit_seconds()
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        stream=sys.stderr,
+    )
+    logging.getLogger("huggingface_hub").setLevel(logging.WARNING)
+    _apply_defaults(args)
+    reporter = Reporter(json_lines=args.json, quiet=args.quiet)
+    cancel_event = threading.Event()
+    _install_signal_handlers(cancel_event, reporter)
+    try:
+        return args.handler(args, reporter, cancel_event)
+    except TransferCancelledError:
+        reporter.event("done", "Cancelled.", ok=False, cancelled=True)
+        return EXIT_CANCELLED
+    except KeyboardInterrupt:
+        reporter.event("done", "Aborted.", ok=False, cancelled=True)
+        return EXIT_CANCELLED
+    except Exception as e:
+        logger.debug("Command failed", exc_info=True)
+        reporter.event("done", f"Error: {e}", ok=False, error=str(e))
+        return EXIT_FAILED
@@ -0,0 +1,104 @@
+import logging
+import time
+from rate_limiter import get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+# Seconds of transfer measured before each decision.
+EPOCH_SECONDS = 10.0
+# A step up is kept only if aggregate throughput grew at least this much.
+MIN_GAIN = 0.05
+# Share of failed tasks in an epoch that counts as congestion.
+MAX_ERROR_RATE = 0.2
+# Epochs to stay put after backing off before probing upwards again.
+HOLD_EPOCHS = 3
+
+
+class ConcurrencyController:
+    # AIMD tuning of how many transfers run at once, between min_workers and
+    # the user's max_workers. Starts low and doubles while throughput keeps
+    # growing (slow start), then probes one worker at a time. A probe that
+    # gains nothing is undone; failures or the Hub throttling halve the
+    # limit. Not thread-safe: fed and queried from the GUI thread.
+
+    def __init__(self, max_workers, min_workers=1, enabled=True):
+        self.max_workers = max(1, int(max_workers))
+        self.min_workers = max(1, min(int(min_workers), self.max_workers))
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        self.current = self.min_workers
+        self._slow_start = True
+        self._hold = 0
+        # (limit, throughput) before the last step up, to judge it by.
+        self._probe = None
+        self._start_epoch(time.monotonic())
+        self._throttles_seen = get_rate_limiter().throttle_count
+
+    def _start_epoch(self, now):
+        self._epoch_start = now
+        self._epoch_bytes = 0
+        self._epoch_ok = 0
+        self._epoch_failed = 0
+
+    def add_bytes(self, num_bytes):
+        if num_bytes > 0:
+            self._epoch_bytes += num_bytes
+
+    def task_finished(self, success):
+        if success:
+            self._epoch_ok += 1
+        else:
+            self._epoch_failed += 1
+
+    def limit(self, active, now=None):
+        # Workers allowed now; `active` is how many are running, so slots
+        # the queue can't fill are not mistaken for a failed probe.
+        if not self.enabled:
+            return self.max_workers
+        now = time.monotonic() if now is None else now
+        if now - self._epoch_start >= EPOCH_SECONDS:
+            self._adjust(active, now)
+        return self.current
+
+    def _adjust(self, active, now):
+        rate = self._epoch_bytes / (now - self._epoch_start)
+        finished = self._epoch_ok + self._epoch_failed
+        throttles = get_rate_limiter().throttle_count
+        throttled = throttles > self._throttles_seen
+        self._throttles_seen = throttles
+        previous = self.current
+        if throttled or (
+            self._epoch_failed and self._epoch_failed / finished > MAX_ERROR_RATE
+        ):
+            self.current = max(self.min_workers, self.current // 2)
+            self._backed_off()
+        elif self._probe is not None and active < self.current:
+            # The queue couldn't fill the new slots: nothing to judge by.
+            self._probe = None
+        elif self._probe is not None and rate < self._probe[1] * (1 + MIN_GAIN):
+            self.current = self._probe[0]
+            self._backed_off()
+        elif self._hold:
+            self._hold -= 1
+            self._probe = None
+        elif active >= self.current and self.current < self.max_workers:
+            self._probe = (self.current, rate)
+            step = self.current if self._slow_start else 1
+            self.current = min(self.max_workers, self.current + step)
+        else:
+            self._probe = None
+        if self.current != previous:
+            logger.info(
+                f"Concurrency {previous} -> {self.current} "
+                f"({rate / (1024 * 1024):.2f} MB/s, "
+                f"{self._epoch_failed}/{finished} failed"
+                f"{', throttled' if throttled else ''})"
+            )
+        self._start_epoch(now)
+
+    def _backed_off(self):
+        self._slow_start = False
+        self._hold = HOLD_EPOCHS
+        self._probe = None
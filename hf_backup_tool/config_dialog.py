@@ -8,23 +8,78 @@ from PyQt6.QtWidgets import (
     QHBoxLayout,
     QCheckBox,
     QMessageBox,
+    QComboBox,
+    QTabWidget,
+    QWidget,
 )
 from custom_exceptions import ConfigError
+from api_session import reset_sessions
 from config_manager import (
+    deferred_save,
     set_api_token,
     get_api_token,
-    get_rate_limit_delay,
-    set_rate_limit_delay,
+    get_max_requests_per_second,
+    set_max_requests_per_second,
     set_proxy,
     get_proxy,
+    get_http_pool_size,
+    set_http_pool_size,
+    get_http2,
+    set_http2,
     get_max_concurrent_downloads,
     set_max_concurrent_downloads,
+    get_auto_tune_downloads,
+    set_auto_tune_downloads,
     get_auto_clear_completed_downloads,
     set_auto_clear_completed_downloads,
+    get_chunked_downloads,
+    set_chunked_downloads,
+    get_download_chunk_size_mb,
+    set_download_chunk_size_mb,
+    get_download_streams_per_file,
+    set_download_streams_per_file,
+    get_download_parallel_files,
+    set_download_parallel_files,
     get_max_concurrent_upload_jobs,
     set_max_concurrent_upload_jobs,
+    get_auto_tune_uploads,
+    set_auto_tune_uploads,
     get_auto_clear_completed_uploads,
     set_auto_clear_completed_uploads,
+    get_batch_commits,
+    set_batch_commits,
+    get_operations_per_commit,
+    set_operations_per_commit,
+    get_upload_retries,
+    set_upload_retries,
+    get_upload_retry_backoff,
+    set_upload_retry_backoff,
+    get_skip_unchanged,
+    set_skip_unchanged,
+    get_hash_workers,
+    set_hash_workers,
+    get_watch_polling,
+    set_watch_polling,
+    get_watch_poll_seconds,
+    set_watch_poll_seconds,
+    get_settle_seconds,
+    set_settle_seconds,
+    get_auto_backup_commit_seconds,
+    set_auto_backup_commit_seconds,
+    get_auto_backup_upload_existing,
+    set_auto_backup_upload_existing,
+    get_verify_downloads,
+    set_verify_downloads,
+    get_zip_compression,
+    set_zip_compression,
+    get_zip_compression_level,
+    set_zip_compression_level,
+    get_zip_compression_threads,
+    set_zip_compression_threads,
+    get_zip_auto_store,
+    set_zip_auto_store,
+    get_zip_store_extensions,
+    set_zip_store_extensions,
 )
 
 logger = logging.getLogger(__name__)
@@ -53,32 +108,133 @@ class ConfigDialog(QDialog):
         self.http_proxy_input = QLineEdit()
         self.https_proxy_label = QLabel("HTTPS Proxy:")
         self.https_proxy_input = QLineEdit()
-        self.rate_limit_label = QLabel("Rate Limit Delay (seconds):")
+        self.pool_size_label = QLabel("HTTP Connections Kept Open per Host:")
+        self.pool_size_input = QLineEdit()
+        self.http2_checkbox = QCheckBox("Use HTTP/2 when available")
+        self.rate_limit_label = QLabel("Max Hub Requests per Second (0 = slow down only when throttled):")
         self.rate_limit_input = QLineEdit()
         self.max_concurrent_label = QLabel("Max Concurrent Downloads:")
         self.max_concurrent_input = QLineEdit()
+        self.auto_tune_downloads_checkbox = QCheckBox("Tune concurrent downloads automatically (up to the max)")
         self.auto_clear_checkbox = QCheckBox("Auto-clear completed downloads")
+        self.chunked_downloads_checkbox = QCheckBox("Parallel chunked downloads")
+        self.chunk_size_label = QLabel("Download Chunk Size (MB):")
+        self.chunk_size_input = QLineEdit()
+        self.streams_per_file_label = QLabel("Connections per Large File:")
+        self.streams_per_file_input = QLineEdit()
+        self.parallel_files_label = QLabel("Files Downloaded in Parallel:")
+        self.parallel_files_input = QLineEdit()
         self.max_concurrent_upload_label = QLabel("Max Concurrent Upload Jobs:")
         self.max_concurrent_upload_input = QLineEdit()
+        self.auto_tune_uploads_checkbox = QCheckBox("Tune concurrent uploads automatically (up to the max)")
         self.auto_clear_upload_checkbox = QCheckBox("Auto-clear completed uploads")
+        self.batch_commits_checkbox = QCheckBox("Batch uploaded files into commits")
+        self.operations_per_commit_label = QLabel("Files per Commit (0 = single commit):")
+        self.operations_per_commit_input = QLineEdit()
+        self.upload_retries_label = QLabel("Retries per File on Timeouts, Throttling and Server Errors:")
+        self.upload_retries_input = QLineEdit()
+        self.upload_retry_backoff_label = QLabel("First Retry Delay (seconds, doubles each retry):")
+        self.upload_retry_backoff_input = QLineEdit()
+        self.skip_unchanged_checkbox = QCheckBox("Skip files unchanged on the Hub")
+        self.watch_polling_checkbox = QCheckBox("Poll watched folders instead of using change notifications")
+        self.watch_poll_label = QLabel("Folder Poll Interval (seconds):")
+        self.watch_poll_input = QLineEdit()
+        self.settle_label = QLabel("New File Settle Time (seconds unchanged before auto-upload):")
+        self.settle_input = QLineEdit()
+        self.auto_backup_commit_label = QLabel("Auto-Backup Commit Interval (seconds):")
+        self.auto_backup_commit_input = QLineEdit()
+        self.auto_backup_existing_checkbox = QCheckBox("Auto-backup also uploads files already in the folder")
+        self.hash_workers_label = QLabel("Hashing Processes (0 = one per CPU core):")
+        self.hash_workers_input = QLineEdit()
+        self.verify_downloads_checkbox = QCheckBox("Verify downloaded files")
+        self.zip_compression_label = QLabel("Zip Compression:")
+        self.zip_compression_dropdown = QComboBox()
+        self.zip_compression_dropdown.addItems(["deflate", "zstd", "lzma", "store"])
+        self.zip_level_label = QLabel("Zip Compression Level (0 = default):")
+        self.zip_level_input = QLineEdit()
+        self.zip_threads_label = QLabel("Zip Compression Threads (0 = one per CPU core):")
+        self.zip_threads_input = QLineEdit()
+        self.zip_auto_store_checkbox = QCheckBox("Store files that don't compress")
+        self.zip_store_extensions_label = QLabel("Always Store Extensions (comma-separated):")
+        self.zip_store_extensions_input = QLineEdit()
         self.save_button = QPushButton("Save")
         self.cancel_button = QPushButton("Cancel")
+        tabs = QTabWidget()
+        for title, widgets in (
+            ("General", [
+                self.api_token_label,
+                self.api_token_input,
+                self.use_proxy_checkbox,
+                self.http_proxy_label,
+                self.http_proxy_input,
+                self.https_proxy_label,
+                self.https_proxy_input,
+                self.pool_size_label,
+                self.pool_size_input,
+                self.http2_checkbox,
+                self.rate_limit_label,
+                self.rate_limit_input,
+                self.hash_workers_label,
+                self.hash_workers_input,
+            ]),
+            ("Downloads", [
+                self.max_concurrent_label,
+                self.max_concurrent_input,
+                self.auto_tune_downloads_checkbox,
+                self.auto_clear_checkbox,
+                self.chunked_downloads_checkbox,
+                self.chunk_size_label,
+                self.chunk_size_input,
+                self.streams_per_file_label,
+                self.streams_per_file_input,
+                self.parallel_files_label,
+                self.parallel_files_input,
+                self.verify_downloads_checkbox,
+            ]),
+            ("Uploads", [
+                self.max_concurrent_upload_label,
+                self.max_concurrent_upload_input,
+                self.auto_tune_uploads_checkbox,
+                self.auto_clear_upload_checkbox,
+                self.batch_commits_checkbox,
+                self.operations_per_commit_label,
+                self.operations_per_commit_input,
+                self.upload_retries_label,
+                self.upload_retries_input,
+                self.upload_retry_backoff_label,
+                self.upload_retry_backoff_input,
+                self.skip_unchanged_checkbox,
+            ]),
+            ("Folder Watch", [
+                self.watch_polling_checkbox,
+                self.watch_poll_label,
+                self.watch_poll_input,
+                self.settle_label,
+                self.settle_input,
+                self.auto_backup_commit_label,
+                self.auto_backup_commit_input,
+                self.auto_backup_existing_checkbox,
+            ]),
+            ("Zip", [
+                self.zip_compression_label,
+                self.zip_compression_dropdown,
+                self.zip_level_label,
+                self.zip_level_input,
+                self.zip_threads_label,
+                self.zip_threads_input,
+                self.zip_auto_store_checkbox,
+                self.zip_store_extensions_label,
+                self.zip_store_extensions_input,
+            ]),
+        ):
+            page = QWidget()
+            page_layout = QVBoxLayout(page)
+            for widget in widgets:
+                page_layout.addWidget(widget)
+            page_layout.addStretch()
+            tabs.addTab(page, title)
         layout = QVBoxLayout()
-        layout.addWidget(self.api_token_label)
-        layout.addWidget(self.api_token_input)
-        layout.addWidget(self.use_proxy_checkbox)
-        layout.addWidget(self.http_proxy_label)
-        layout.addWidget(self.http_proxy_input)
-        layout.addWidget(self.https_proxy_label)
-        layout.addWidget(self.https_proxy_input)
-        layout.addWidget(self.rate_limit_label)
-        layout.addWidget(self.rate_limit_input)
-        layout.addWidget(self.max_concurrent_label)
-        layout.addWidget(self.max_concurrent_input)
-        layout.addWidget(self.auto_clear_checkbox)
-        layout.addWidget(self.max_concurrent_upload_label)
-        layout.addWidget(self.max_concurrent_upload_input)
-        layout.addWidget(self.auto_clear_upload_checkbox)
+        layout.addWidget(tabs)
         button_layout = QHBoxLayout()
         button_layout.addWidget(self.save_button)
         button_layout.addWidget(self.cancel_button)
@@ -95,40 +251,135 @@ class ConfigDialog(QDialog):
         )
         self.http_proxy_input.setText(proxy_settings.get("http", ""))
         self.https_proxy_input.setText(proxy_settings.get("https", ""))
-        self.rate_limit_input.setText(str(get_rate_limit_delay()))
+        self.pool_size_input.setText(str(get_http_pool_size()))
+        self.http2_checkbox.setChecked(get_http2())
+        self.rate_limit_input.setText(str(get_max_requests_per_second()))
         self.max_concurrent_input.setText(str(get_max_concurrent_downloads()))
+        self.auto_tune_downloads_checkbox.setChecked(get_auto_tune_downloads())
         self.auto_clear_checkbox.setChecked(get_auto_clear_completed_downloads())
+        self.chunked_downloads_checkbox.setChecked(get_chunked_downloads())
+        self.chunk_size_input.setText(str(get_download_chunk_size_mb()))
+        self.streams_per_file_input.setText(str(get_download_streams_per_file()))
+        self.parallel_files_input.setText(str(get_download_parallel_files()))
         self.max_concurrent_upload_input.setText(str(get_max_concurrent_upload_jobs()))
+        self.auto_tune_uploads_checkbox.setChecked(get_auto_tune_uploads())
         self.auto_clear_upload_checkbox.setChecked(get_auto_clear_completed_uploads())
+        self.batch_commits_checkbox.setChecked(get_batch_commits())
+        self.operations_per_commit_input.setText(str(get_operations_per_commit()))
+        self.upload_retries_input.setText(str(get_upload_retries()))
+        self.upload_retry_backoff_input.setText(str(get_upload_retry_backoff()))
+        self.skip_unchanged_checkbox.setChecked(get_skip_unchanged())
+        self.watch_polling_checkbox.setChecked(get_watch_polling())
+        self.watch_poll_input.setText(str(get_watch_poll_seconds()))
+        self.settle_input.setText(str(get_settle_seconds()))
+        self.auto_backup_commit_input.setText(str(get_auto_backup_commit_seconds()))
+        self.auto_backup_existing_checkbox.setChecked(get_auto_backup_upload_existing())
+        self.hash_workers_input.setText(str(get_hash_workers()))
+        self.verify_downloads_checkbox.setChecked(get_verify_downloads())
+        self.zip_compression_dropdown.setCurrentText(get_zip_compression())
+        self.zip_level_input.setText(str(get_zip_compression_level()))
+        self.zip_threads_input.setText(str(get_zip_compression_threads()))
+        self.zip_auto_store_checkbox.setChecked(get_zip_auto_store())
+        self.zip_store_extensions_input.setText(", ".join(get_zip_store_extensions()))
 
     def save_config(self):
         api_token = self.api_token_input.text()
         try:
-            rate_limit_delay = float(self.rate_limit_input.text())
-            if rate_limit_delay < 0:
-                raise ValueError("Rate limit delay must be a non-negative number.")
+            max_requests_per_second = float(self.rate_limit_input.text())
+            if max_requests_per_second < 0:
+                raise ValueError("Max requests per second must be a non-negative number.")
+            pool_size = int(self.pool_size_input.text())
+            if pool_size <= 0:
+                raise ValueError("HTTP connections per host must be a positive integer.")
             max_concurrent_downloads = int(self.max_concurrent_input.text())
             if max_concurrent_downloads <= 0:
                 raise ValueError("Max concurrent downloads must be a positive integer.")
+            chunk_size_mb = int(self.chunk_size_input.text())
+            if chunk_size_mb <= 0:
+                raise ValueError("Download chunk size must be a positive integer.")
+            streams_per_file = int(self.streams_per_file_input.text())
+            if streams_per_file <= 0:
+                raise ValueError("Connections per file must be a positive integer.")
+            parallel_files = int(self.parallel_files_input.text())
+            if parallel_files <= 0:
+                raise ValueError("Files downloaded in parallel must be a positive integer.")
             max_concurrent_upload_jobs = int(self.max_concurrent_upload_input.text())
             if max_concurrent_upload_jobs <= 0:
                 raise ValueError("Max concurrent upload jobs must be a positive integer.")
+            operations_per_commit = int(self.operations_per_commit_input.text())
+            if operations_per_commit < 0:
+                raise ValueError("Files per commit must be zero or a positive integer.")
+            upload_retries = int(self.upload_retries_input.text())
+            if upload_retries < 0:
+                raise ValueError("Retries per file must be zero or a positive integer.")
+            upload_retry_backoff = float(self.upload_retry_backoff_input.text())
+            if upload_retry_backoff < 0:
+                raise ValueError("First retry delay must be a non-negative number.")
+            watch_poll_seconds = float(self.watch_poll_input.text())
+            if watch_poll_seconds <= 0:
+                raise ValueError("Folder poll interval must be a positive number.")
+            settle_seconds = float(self.settle_input.text())
+            if settle_seconds < 0:
+                raise ValueError("New file settle time must be a non-negative number.")
+            auto_backup_commit_seconds = float(self.auto_backup_commit_input.text())
+            if auto_backup_commit_seconds < 0:
+                raise ValueError("Auto-backup commit interval must be a non-negative number.")
+            hash_workers = int(self.hash_workers_input.text())
+            if hash_workers < 0:
+                raise ValueError("Hashing processes must be zero or a positive integer.")
+            zip_level = int(self.zip_level_input.text())
+            if zip_level < 0:
+                raise ValueError("Zip compression level must be zero or a positive integer.")
+            zip_threads = int(self.zip_threads_input.text())
+            if zip_threads < 0:
+                raise ValueError("Zip compression threads must be zero or a positive integer.")
         except ValueError as e:
             QMessageBox.critical(self, "Error", str(e))
             return
         try:
-            set_api_token(api_token)
-            proxy_settings = {
-                "use_proxy": str(self.use_proxy_checkbox.isChecked()),
-                "http": self.http_proxy_input.text(),
-                "https": self.https_proxy_input.text(),
-            }
-            set_proxy(proxy_settings)
-            set_rate_limit_delay(rate_limit_delay)
-            set_max_concurrent_downloads(max_concurrent_downloads)
-            set_auto_clear_completed_downloads(self.auto_clear_checkbox.isChecked())
-            set_max_concurrent_upload_jobs(max_concurrent_upload_jobs)
-            set_auto_clear_completed_uploads(self.auto_clear_upload_checkbox.isChecked())
+            # One write of the file for all the settings.
+            with deferred_save():
+                set_api_token(api_token)
+                proxy_settings = {
+                    "use_proxy": str(self.use_proxy_checkbox.isChecked()),
+                    "http": self.http_proxy_input.text(),
+                    "https": self.https_proxy_input.text(),
+                }
+                set_proxy(proxy_settings)
+                set_http_pool_size(pool_size)
+                set_http2(self.http2_checkbox.isChecked())
+                set_max_requests_per_second(max_requests_per_second)
+                set_max_concurrent_downloads(max_concurrent_downloads)
+                set_auto_tune_downloads(self.auto_tune_downloads_checkbox.isChecked())
+                set_auto_clear_completed_downloads(self.auto_clear_checkbox.isChecked())
+                set_chunked_downloads(self.chunked_downloads_checkbox.isChecked())
+                set_download_chunk_size_mb(chunk_size_mb)
+                set_download_streams_per_file(streams_per_file)
+                set_download_parallel_files(parallel_files)
+                set_max_concurrent_upload_jobs(max_concurrent_upload_jobs)
+                set_auto_tune_uploads(self.auto_tune_uploads_checkbox.isChecked())
+                set_auto_clear_completed_uploads(self.auto_clear_upload_checkbox.isChecked())
+                set_batch_commits(self.batch_commits_checkbox.isChecked())
+                set_operations_per_commit(operations_per_commit)
+                set_upload_retries(upload_retries)
+                set_upload_retry_backoff(upload_retry_backoff)
+                set_skip_unchanged(self.skip_unchanged_checkbox.isChecked())
+                set_watch_polling(self.watch_polling_checkbox.isChecked())
+                set_watch_poll_seconds(watch_poll_seconds)
+                set_settle_seconds(settle_seconds)
+                set_auto_backup_commit_seconds(auto_backup_commit_seconds)
+                set_auto_backup_upload_existing(self.auto_backup_existing_checkbox.isChecked())
+                set_hash_workers(hash_workers)
+                set_verify_downloads(self.verify_downloads_checkbox.isChecked())
+                set_zip_compression(self.zip_compression_dropdown.currentText())
+                set_zip_compression_level(zip_level)
+                set_zip_compression_threads(zip_threads)
+                set_zip_auto_store(self.zip_auto_store_checkbox.isChecked())
+                set_zip_store_extensions(
+                    [ext.strip() for ext in self.zip_store_extensions_input.text().split(",") if ext.strip()]
+                )
+            # New requests pick up the proxy and pool settings.
+            reset_sessions()
             QMessageBox.information(
                 self, "Success", "Configuration saved successfully."
             )
@@ -1,4 +1,5 @@
 import configparser
+import contextlib
 import os
 import logging
 from custom_exceptions import ConfigError
@@ -7,26 +8,67 @@ from hf_backup_tool.token_utils import obfuscate_token, deobfuscate_token
 logger = logging.getLogger(__name__)
 config = configparser.ConfigParser()
 config_path = os.path.expanduser("~/.huggingface_uploader_config.ini")
+# Inside deferred_save(), setters only mark the file dirty.
+_deferred_saves = 0
+_save_pending = False
 DEFAULT_CONFIG = {
     "HuggingFace": {
         "api_token": "",
-        "rate_limit_delay": "1",
+        "max_requests_per_second": "0",
         "org": "",
         "repo": "",
     },
-    "Zip": {"default_zip_name": "my_archive"},
+    "Zip": {
+        "default_zip_name": "my_archive",
+        "compression": "deflate",
+        "compression_level": "0",
+        "compression_threads": "0",
+        "auto_store": "True",
+        "store_extensions": "",
+        "volume_size_mb": "5120",
+        "split_format": "zip"
+    },
     "Proxy": {
         "use_proxy": "False",
         "http": "",
         "https": "",
     },
+    "Network": {
+        "pool_size": "64",
+        "http2": "True"
+    },
     "DownloadQueue": {
-        "max_concurrent_downloads": "1",
-        "auto_clear_completed_downloads": "True"
+        "max_concurrent_downloads": "4",
+        "auto_tune_concurrency": "True",
+        "auto_clear_completed_downloads": "True",
+        "chunked_downloads": "True",
+        "chunk_size_mb": "64",
+        "streams_per_file": "8",
+        "parallel_files": "4"
     },
     "UploadQueue": {
-        "max_concurrent_upload_jobs": "1",
-        "auto_clear_completed_uploads": "True"
+        "max_concurrent_upload_jobs": "8",
+        "auto_tune_concurrency": "True",
+        "auto_clear_completed_uploads": "True",
+        "batch_commits": "True",
+        "operations_per_commit": "0",
+        "upload_retries": "3",
+        "upload_retry_backoff_seconds": "2",
+        "skip_unchanged": "True",
+        "recursive": "False",
+        "include_patterns": "",
+        "exclude_patterns": "",
+        "watch_directory": "True",
+        "watch_polling": "False",
+        "watch_poll_seconds": "5",
+        "auto_queue_new_files": "False",
+        "settle_seconds": "10",
+        "auto_backup_commit_seconds": "30",
+        "auto_backup_upload_existing": "False"
+    },
+    "Hashing": {
+        "hash_workers": "0",
+        "verify_downloads": "True"
     }
 }
 
@@ -37,6 +79,7 @@ def load_config():
         try:
             config.read(config_path)
             logger.info("Configuration loaded successfully.")
+            _migrate_config()
             logger.debug(f"Config contents after loading: {config.items()}")
         except Exception as e:
             logger.error(f"Error reading configuration file: {e}", exc_info=True)
@@ -58,7 +101,46 @@ def load_config():
             raise ConfigError("Failed to create default configuration.") from save_error
     return config
 
+def _migrate_config():
+    # Files written before concurrency was auto-tuned stored the old
+    # default of 1 job, which would pin the tuner to 1. Their missing
+    # auto_tune_concurrency option tells them apart from a deliberate 1.
+    changed = False
+    for section, option in (
+        ("DownloadQueue", "max_concurrent_downloads"),
+        ("UploadQueue", "max_concurrent_upload_jobs"),
+    ):
+        if not config.has_section(section) or config.has_option(
+            section, "auto_tune_concurrency"
+        ):
+            continue
+        if config.get(section, option, fallback="1") == "1":
+            config.set(section, option, DEFAULT_CONFIG[section][option])
+        config.set(section, "auto_tune_concurrency", "True")
+        changed = True
+    if changed:
+        logger.info("Migrated concurrency settings to auto-tuning defaults.")
+        save_config()
+
+@contextlib.contextmanager
+def deferred_save():
+    # Setters called inside write the file once, on exit, instead of each
+    # rewriting it.
+    global _deferred_saves, _save_pending
+    _deferred_saves += 1
+    try:
+        yield
+    finally:
+        _deferred_saves -= 1
+        if not _deferred_saves and _save_pending:
+            _save_pending = False
+            save_config()
+
 def save_config():
+    global _save_pending
+    if _deferred_saves:
+        _save_pending = True
+        return True
     logger.info("Saving configuration...")
     try:
         with open(config_path, "w") as configfile:
@@ -93,13 +175,18 @@ def set_api_token(token):
     config.set("HuggingFace", "api_token", obfuscated_api_token)
     save_config()
 
-def get_rate_limit_delay():
-    return float(config.get("HuggingFace", "rate_limit_delay", fallback="1"))
+def get_max_requests_per_second():
+    # 0 means no cap: requests only slow down when the Hub throttles them.
+    return config.getfloat(
+        "HuggingFace", "max_requests_per_second", fallback=0.0
+    )
 
-def set_rate_limit_delay(delay):
+def set_max_requests_per_second(max_requests_per_second):
     if not config.has_section("HuggingFace"):
         config.add_section("HuggingFace")
-    config.set("HuggingFace", "rate_limit_delay", str(delay))
+    config.set(
+        "HuggingFace", "max_requests_per_second", str(max_requests_per_second)
+    )
     save_config()
 
 def set_proxy(proxy_settings):
@@ -117,8 +204,27 @@ def get_proxy():
         "https": config.get("Proxy", "https", fallback=""),
     }
 
+def get_http_pool_size():
+    # Connections kept alive per host, shared by every transfer.
+    return max(1, config.getint("Network", "pool_size", fallback=64))
+
+def set_http_pool_size(pool_size):
+    if not config.has_section("Network"):
+        config.add_section("Network")
+    config.set("Network", "pool_size", str(pool_size))
+    save_config()
+
+def get_http2():
+    return config.getboolean("Network", "http2", fallback=True)
+
+def set_http2(http2):
+    if not config.has_section("Network"):
+        config.add_section("Network")
+    config.set("Network", "http2", str(http2))
+    save_config()
+
 def get_max_concurrent_downloads():
-    return int(config.get("DownloadQueue", "max_concurrent_downloads", fallback="1"))
+    return int(config.get("DownloadQueue", "max_concurrent_downloads", fallback="4"))
 
 def set_max_concurrent_downloads(max_downloads):
     if not config.has_section("DownloadQueue"):
@@ -126,6 +232,15 @@ def set_max_concurrent_downloads(max_downloads):
     config.set("DownloadQueue", "max_concurrent_downloads", str(max_downloads))
     save_config()
 
+def get_auto_tune_downloads():
+    return config.getboolean("DownloadQueue", "auto_tune_concurrency", fallback=True)
+
+def set_auto_tune_downloads(auto_tune):
+    if not config.has_section("DownloadQueue"):
+        config.add_section("DownloadQueue")
+    config.set("DownloadQueue", "auto_tune_concurrency", str(auto_tune))
+    save_config()
+
 def get_auto_clear_completed_downloads():
     return config.getboolean("DownloadQueue", "auto_clear_completed_downloads", fallback=True)
 
@@ -135,8 +250,44 @@ def set_auto_clear_completed_downloads(auto_clear):
     config.set("DownloadQueue", "auto_clear_completed_downloads", str(auto_clear))
     save_config()
 
+def get_chunked_downloads():
+    return config.getboolean("DownloadQueue", "chunked_downloads", fallback=True)
+
+def set_chunked_downloads(chunked):
+    if not config.has_section("DownloadQueue"):
+        config.add_section("DownloadQueue")
+    config.set("DownloadQueue", "chunked_downloads", str(chunked))
+    save_config()
+
+def get_download_chunk_size_mb():
+    return int(config.get("DownloadQueue", "chunk_size_mb", fallback="64"))
+
+def set_download_chunk_size_mb(chunk_size_mb):
+    if not config.has_section("DownloadQueue"):
+        config.add_section("DownloadQueue")
+    config.set("DownloadQueue", "chunk_size_mb", str(chunk_size_mb))
+    save_config()
+
+def get_download_streams_per_file():
+    return int(config.get("DownloadQueue", "streams_per_file", fallback="8"))
+
+def set_download_streams_per_file(streams):
+    if not config.has_section("DownloadQueue"):
+        config.add_section("DownloadQueue")
+    config.set("DownloadQueue", "streams_per_file", str(streams))
+    save_config()
+
+def get_download_parallel_files():
+    return int(config.get("DownloadQueue", "parallel_files", fallback="4"))
+
+def set_download_parallel_files(parallel_files):
+    if not config.has_section("DownloadQueue"):
+        config.add_section("DownloadQueue")
+    config.set("DownloadQueue", "parallel_files", str(parallel_files))
+    save_config()
+
 def get_max_concurrent_upload_jobs():
-    return int(config.get("UploadQueue", "max_concurrent_upload_jobs", fallback="1"))
+    return int(config.get("UploadQueue", "max_concurrent_upload_jobs", fallback="8"))
 
 def set_max_concurrent_upload_jobs(max_jobs):
     if not config.has_section("UploadQueue"):
@@ -144,6 +295,15 @@ def set_max_concurrent_upload_jobs(max_jobs):
     config.set("UploadQueue", "max_concurrent_upload_jobs", str(max_jobs))
     save_config()
 
+def get_auto_tune_uploads():
+    return config.getboolean("UploadQueue", "auto_tune_concurrency", fallback=True)
+
+def set_auto_tune_uploads(auto_tune):
+    if not config.has_section("UploadQueue"):
+        config.add_section("UploadQueue")
+    config.set("UploadQueue", "auto_tune_concurrency", str(auto_tune))
+    save_config()
+
 def get_auto_clear_completed_uploads():
     return config.getboolean("UploadQueue", "auto_clear_completed_uploads", fallback=True)
 
@@ -152,6 +312,236 @@ def set_auto_clear_completed_uploads(auto_clear):
         config.add_section("UploadQueue")
     config.set("UploadQueue", "auto_clear_completed_uploads", str(auto_clear))
     save_config()
+
+def get_batch_commits():
+    return config.getboolean("UploadQueue", "batch_commits", fallback=True)
+
+def set_batch_commits(batch_commits):
+    if not config.has_section("UploadQueue"):
+        config.add_section("UploadQueue")
+    config.set("UploadQueue", "batch_commits", str(batch_commits))
+    save_config()
+
+def get_operations_per_commit():
+    return int(config.get("UploadQueue", "operations_per_commit", fallback="0"))
+
+def set_operations_per_commit(operations_per_commit):
+    if not config.has_section("UploadQueue"):
+        config.add_section("UploadQueue")
+    config.set("UploadQueue", "operations_per_commit", str(operations_per_commit))
+    save_config()
+
+def get_upload_retries():
+    return int(config.get("UploadQueue", "upload_retries", fallback="3"))
+
+def set_upload_retries(retries):
+    if not config.has_section("UploadQueue"):
+        config.add_section("UploadQueue")
+    config.set("UploadQueue", "upload_retries", str(retries))
+    save_config()
+
+def get_upload_retry_backoff():
+    return float(config.get("UploadQueue", "upload_retry_backoff_seconds", fallback="2"))
+
+def set_upload_retry_backoff(seconds):
+    if not config.has_section("UploadQueue"):
+        config.add_section("UploadQueue")
+    config.set("UploadQueue", "upload_retry_backoff_seconds", str(seconds))
+    save_config()
+
+def get_skip_unchanged():
+    return config.getboolean("UploadQueue", "skip_unchanged", fallback=True)
+
+def set_skip_unchanged(skip_unchanged):
+    if not config.has_section("UploadQueue"):
+        config.add_section("UploadQueue")
+    config.set("UploadQueue", "skip_unchanged", str(skip_unchanged))
+    save_config()
+
+def get_upload_recursive():
+    return config.getboolean("UploadQueue", "recursive", fallback=False)
+
+def set_upload_recursive(recursive):
+    if not config.has_section("UploadQueue"):
+        config.add_section("UploadQueue")
+    config.set("UploadQueue", "recursive", str(recursive))
+    save_config()
+
+def get_upload_include_patterns():
+    return config.get("UploadQueue", "include_patterns", fallback="")
+
+def set_upload_include_patterns(patterns):
+    if not config.has_section("UploadQueue"):
+        config.add_section("UploadQueue")
+    config.set("UploadQueue", "include_patterns", patterns)
+    save_config()
+
+def get_upload_exclude_patterns():
+    return config.get("UploadQueue", "exclude_patterns", fallback="")
+
+def set_upload_exclude_patterns(patterns):
+    if not config.has_section("UploadQueue"):
+        config.add_section("UploadQueue")
+    config.set("UploadQueue", "exclude_patterns", patterns)
+    save_config()
+
+def get_watch_directory():
+    return config.getboolean("UploadQueue", "watch_directory", fallback=True)
+
+def set_watch_directory(watch_directory):
+    if not config.has_section("UploadQueue"):
+        config.add_section("UploadQueue")
+    config.set("UploadQueue", "watch_directory", str(watch_directory))
+    save_config()
+
+def get_watch_polling():
+    # Poll instead of using native change notifications (e.g. for network
+    # drives that don't deliver them).
+    return config.getboolean("UploadQueue", "watch_polling", fallback=False)
+
+def set_watch_polling(watch_polling):
+    if not config.has_section("UploadQueue"):
+        config.add_section("UploadQueue")
+    config.set("UploadQueue", "watch_polling", str(watch_polling))
+    save_config()
+
+def get_watch_poll_seconds():
+    return config.getfloat("UploadQueue", "watch_poll_seconds", fallback=5.0)
+
+def set_watch_poll_seconds(poll_seconds):
+    if not config.has_section("UploadQueue"):
+        config.add_section("UploadQueue")
+    config.set("UploadQueue", "watch_poll_seconds", str(poll_seconds))
+    save_config()
+
+def get_auto_queue_new_files():
+    return config.getboolean("UploadQueue", "auto_queue_new_files", fallback=False)
+
+def set_auto_queue_new_files(auto_queue):
+    if not config.has_section("UploadQueue"):
+        config.add_section("UploadQueue")
+    config.set("UploadQueue", "auto_queue_new_files", str(auto_queue))
+    save_config()
+
+def get_settle_seconds():
+    # How long a new file must stay unchanged before it counts as finished.
+    return config.getfloat("UploadQueue", "settle_seconds", fallback=10.0)
+
+def set_settle_seconds(settle_seconds):
+    if not config.has_section("UploadQueue"):
+        config.add_section("UploadQueue")
+    config.set("UploadQueue", "settle_seconds", str(settle_seconds))
+    save_config()
+
+def get_auto_backup_commit_seconds():
+    # Longest an uploaded file waits for its auto-backup commit.
+    return config.getfloat("UploadQueue", "auto_backup_commit_seconds", fallback=30.0)
+
+def set_auto_backup_commit_seconds(commit_seconds):
+    if not config.has_section("UploadQueue"):
+        config.add_section("UploadQueue")
+    config.set("UploadQueue", "auto_backup_commit_seconds", str(commit_seconds))
+    save_config()
+
+def get_auto_backup_upload_existing():
+    return config.getboolean("UploadQueue", "auto_backup_upload_existing", fallback=False)
+
+def set_auto_backup_upload_existing(upload_existing):
+    if not config.has_section("UploadQueue"):
+        config.add_section("UploadQueue")
+    config.set("UploadQueue", "auto_backup_upload_existing", str(upload_existing))
+    save_config()
+
+def get_hash_workers():
+    # 0 means one hashing process per CPU core.
+    return config.getint("Hashing", "hash_workers", fallback=0)
+
+def set_hash_workers(hash_workers):
+    if not config.has_section("Hashing"):
+        config.add_section("Hashing")
+    config.set("Hashing", "hash_workers", str(hash_workers))
+    save_config()
+
+def get_verify_downloads():
+    return config.getboolean("Hashing", "verify_downloads", fallback=True)
+
+def set_verify_downloads(verify_downloads):
+    if not config.has_section("Hashing"):
+        config.add_section("Hashing")
+    config.set("Hashing", "verify_downloads", str(verify_downloads))
+    save_config()
+
+def get_zip_compression():
+    return config.get("Zip", "compression", fallback="deflate")
+
+def set_zip_compression(compression):
+    if not config.has_section("Zip"):
+        config.add_section("Zip")
+    config.set("Zip", "compression", compression)
+    save_config()
+
+def get_zip_compression_level():
+    # 0 means the codec's default level.
+    return config.getint("Zip", "compression_level", fallback=0)
+
+def set_zip_compression_level(compression_level):
+    if not config.has_section("Zip"):
+        config.add_section("Zip")
+    config.set("Zip", "compression_level", str(compression_level))
+    save_config()
+
+def get_zip_compression_threads():
+    # 0 means one compression thread per CPU core.
+    return config.getint("Zip", "compression_threads", fallback=0)
+
+def set_zip_compression_threads(compression_threads):
+    if not config.has_section("Zip"):
+        config.add_section("Zip")
+    config.set("Zip", "compression_threads", str(compression_threads))
+    save_config()
+
+def get_zip_auto_store():
+    return config.getboolean("Zip", "auto_store", fallback=True)
+
+def set_zip_auto_store(auto_store):
+    if not config.has_section("Zip"):
+        config.add_section("Zip")
+    config.set("Zip", "auto_store", str(auto_store))
+    save_config()
+
+def get_zip_store_extensions():
+    # Extra extensions to always store, on top of the built-in list.
+    value = config.get("Zip", "store_extensions", fallback="")
+    extensions = []
+    for ext in value.split(","):
+        ext = ext.strip().lower()
+        if ext:
+            extensions.append(ext if ext.startswith(".") else "." + ext)
+    return extensions
+
+def set_zip_store_extensions(store_extensions):
+    if not config.has_section("Zip"):
+        config.add_section("Zip")
+    config.set("Zip", "store_extensions", ", ".join(store_extensions))
+    save_config()
+
+def get_zip_volume_size_mb():
+    return config.getint("Zip", "volume_size_mb", fallback=5120)
+
+def set_zip_volume_size_mb(volume_size_mb):
+    if not config.has_section("Zip"):
+        config.add_section("Zip")
+    config.set("Zip", "volume_size_mb", str(volume_size_mb))
+    save_config()
+
+def get_zip_split_format():
+    return config.get("Zip", "split_format", fallback="zip")
+
+def set_zip_split_format(split_format):
+    if not config.has_section("Zip"):
+        config.add_section("Zip")
+    config.set("Zip", "split_format", split_format)
+    save_config()
 try:
     load_config()
 except ConfigError as e:
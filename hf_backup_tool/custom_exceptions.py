@@ -15,3 +15,9 @@ class AuthenticationError(Exception):
 
 class RepositoryError(Exception):
     pass
+
+class TransferCancelledError(Exception):
+    pass
+
+class IntegrityError(Exception):
+    pass
@@ -16,8 +16,12 @@ from PyQt6.QtWidgets import (
     QScrollArea,
 )
 from PyQt6.QtCore import Qt
-from download_worker import DownloadWorkerThread
-from config_manager import get_max_concurrent_downloads
+from download_worker import DownloadWorker
+from concurrency_controller import ConcurrencyController
+from config_manager import (
+    get_max_concurrent_downloads,
+    get_auto_tune_downloads,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +47,9 @@ class DownloadApp(QWidget):
         self.setWindowTitle("Download from Repository")
         self.download_queue = collections.deque()
         self.active_workers = {}
+        # Cancelled workers winding down; they no longer hold a slot but
+        # must stay referenced until their thread exits.
+        self.cancelling_workers = {}
         self.task_map = {}
         try:
             self.max_concurrent_downloads = get_max_concurrent_downloads()
@@ -58,6 +65,14 @@ class DownloadApp(QWidget):
                 "Could not load max concurrent downloads setting. "
                 f"Defaulting to 1. Error: {e}",
             )
+        # Runs between 1 and max_concurrent_downloads tasks at once,
+        # depending on measured throughput and failures.
+        self.concurrency = ConcurrencyController(
+            self.max_concurrent_downloads, enabled=get_auto_tune_downloads()
+        )
+        # Bytes each active task has reported, to feed deltas to the
+        # controller.
+        self.task_bytes = {}
 
         self.repo_url_label = QLabel("Repository URL:")
         self.repo_url_input = QLineEdit()
@@ -70,6 +85,7 @@ class DownloadApp(QWidget):
         self.output_text.setMinimumHeight(100)
         self.queue_list_widget = QListWidget()
         self.cancel_all_tasks_button = QPushButton("Cancel All Tasks")
+        self.cancel_selected_button = QPushButton("Cancel Selected Task")
         self.remove_selected_button = QPushButton("Remove Selected from Queue")
         self.clear_queue_button = QPushButton("Clear Entire Queue")
 
@@ -98,6 +114,7 @@ class DownloadApp(QWidget):
         # Queue controls with flexible layout
         queue_controls_layout = QHBoxLayout()
         queue_controls_layout.addWidget(self.cancel_all_tasks_button)
+        queue_controls_layout.addWidget(self.cancel_selected_button)
         queue_controls_layout.addWidget(self.remove_selected_button)
         queue_controls_layout.addWidget(self.clear_queue_button)
         queue_section.addLayout(queue_controls_layout)
@@ -140,6 +157,8 @@ class DownloadApp(QWidget):
         self.add_to_queue_button.clicked.connect(self.add_to_download_queue)
         self.cancel_all_tasks_button.clicked.connect(
             self.handle_cancel_all_tasks)
+        self.cancel_selected_button.clicked.connect(
+            self.cancel_selected_task)
         self.remove_selected_button.clicked.connect(
             self.remove_selected_from_queue)
         self.clear_queue_button.clicked.connect(self.clear_download_queue)
@@ -153,6 +172,10 @@ class DownloadApp(QWidget):
 
         selected_items = self.queue_list_widget.selectedItems()
         can_remove_selected = False
+        selected_task_id = self._selected_task_id()
+        self.cancel_selected_button.setEnabled(
+            selected_task_id in self.active_workers
+        )
         if selected_items:
             selected_text = selected_items[0].text()
             try:
@@ -173,6 +196,41 @@ class DownloadApp(QWidget):
                 )
         self.remove_selected_button.setEnabled(can_remove_selected)
 
+    def _selected_task_id(self):
+        selected_items = self.queue_list_widget.selectedItems()
+        if not selected_items:
+            return None
+        task_id = selected_items[0].text().split(" - ID: ")[-1]
+        if "%)" in task_id:
+            task_id = task_id.split("%)")[0].strip()
+        return task_id
+
+    def _cancel_active_task(self, task_id):
+        # Ask the worker to stop and release its slot immediately so the
+        # next pending task can start while this one winds down.
+        worker = self.active_workers.pop(task_id, None)
+        if worker is None:
+            return False
+        task = self.task_map.get(task_id)
+        if worker.isRunning():
+            worker.cancel_download()
+            self.cancelling_workers[task_id] = worker
+            if task:
+                task.status = "Cancelling"
+        elif task:
+            task.status = "Cancelled"
+        return True
+
+    def cancel_selected_task(self):
+        task_id = self._selected_task_id()
+        if task_id not in self.active_workers:
+            self.output_text.append("Select an active task to cancel.")
+            return
+        logger.info(f"User cancelled active task: {task_id}")
+        self._cancel_active_task(task_id)
+        self.output_text.append(f"Cancellation requested for {task_id}.")
+        self._process_queue()
+
     def select_download_directory(self):
         directory = QFileDialog.getExistingDirectory(
             self, "Select Download Directory")
@@ -197,8 +255,12 @@ class DownloadApp(QWidget):
         self._process_queue()
 
     def _process_queue(self):
+        if not self.active_workers:
+            # Idle since the last batch: measure afresh.
+            self.concurrency.reset()
         while (
-            len(self.active_workers) < self.max_concurrent_downloads
+            len(self.active_workers)
+            < self.concurrency.limit(len(self.active_workers))
             and self.download_queue
         ):
             task_to_start = self.download_queue.popleft()
@@ -211,8 +273,9 @@ class DownloadApp(QWidget):
             )
             logger.info(f"Processing download task: {task_to_start}")
 
-            worker = DownloadWorkerThread(task_to_start)
+            worker = DownloadWorker(task_to_start)
             worker.progress.connect(self.on_download_progress)
+            worker.bytes_progress.connect(self.on_download_bytes)
             worker.status_update.connect(self.on_download_status_update)
             worker.finished.connect(self.on_download_finished)
 
@@ -227,6 +290,17 @@ class DownloadApp(QWidget):
             self.update_queue_display()
         logger.debug(f"Task {task_id} progress: {percentage}%")
 
+    def on_download_bytes(self, task_id, bytes_done):
+        if task_id not in self.active_workers:
+            return
+        previous = self.task_bytes.get(task_id, 0)
+        self.task_bytes[task_id] = bytes_done
+        self.concurrency.add_bytes(bytes_done - previous)
+        # The limit may have been raised while long downloads run.
+        active = len(self.active_workers)
+        if self.download_queue and self.concurrency.limit(active) > active:
+            self._process_queue()
+
     def on_download_status_update(self, task_id, message):
         self.output_text.append(f"Status ({task_id}): {message}")
         self.update_queue_display()
@@ -240,11 +314,18 @@ class DownloadApp(QWidget):
 
         task = self.task_map.get(task_id)
         if task:
-            task.status = "Completed" if success else "Failed"
-            task.progress = 100
+            if task.status in ("Cancelling", "Cancelled"):
+                task.status = "Cancelled"
+            else:
+                task.status = "Completed" if success else "Failed"
+                task.progress = 100
+                if task_id in self.active_workers:
+                    self.concurrency.task_finished(success)
 
         if task_id in self.active_workers:
             del self.active_workers[task_id]
+        self.cancelling_workers.pop(task_id, None)
+        self.task_bytes.pop(task_id, None)
 
         self.update_queue_display()
         self._process_queue()
@@ -260,16 +341,10 @@ class DownloadApp(QWidget):
             self.output_text.append("No tasks to cancel.")
             return
 
-        for task_id, worker in list(self.active_workers.items()):
-            task = self.task_map.get(task_id)
-            if worker.isRunning():
-                logger.info(f"Cancelling active task: {task_id}")
-                worker.cancel_download()
-                if task:
-                    task.status = "Cancelling"
+        for task_id in list(self.active_workers):
+            logger.info(f"Cancelling active task: {task_id}")
+            if self._cancel_active_task(task_id):
                 active_tasks_cancelled_count += 1
-            elif task:
-                task.status = "Cancelled"
 
         if active_tasks_cancelled_count > 0:
             self.output_text.append(
@@ -364,15 +439,12 @@ class DownloadApp(QWidget):
             return
 
         if reply == QMessageBox.StandardButton.Yes:
-            for task_id, worker in list(self.active_workers.items()):
-                if worker.isRunning():
-                    self.output_text.append(
-                        "Attempting to cancel active task "
-                        f"{task_id} as part of clear."
-                    )
-                    worker.cancel_download()
-                    if self.task_map.get(task_id):
-                        self.task_map[task_id].status = "Cancelling"
+            for task_id in list(self.active_workers):
+                self.output_text.append(
+                    "Attempting to cancel active task "
+                    f"{task_id} as part of clear."
+                )
+                self._cancel_active_task(task_id)
 
         num_pending_cleared = len(self.download_queue)
         pending_ids_to_remove = [task.id for task in self.download_queue]
@@ -404,8 +476,27 @@ class DownloadApp(QWidget):
                 )
                 self.queue_list_widget.addItem(QListWidgetItem(item_text))
 
+        for task_id in self.cancelling_workers:
+            task = self.task_map.get(task_id)
+            if task:
+                item_text = f"[{task.status}] {task.repo_url} - ID: {task.id}"
+                self.queue_list_widget.addItem(QListWidgetItem(item_text))
+
         for task in self.download_queue:
             item_text = f"[{task.status}] {task.repo_url} - ID: {task.id}"
             self.queue_list_widget.addItem(QListWidgetItem(item_text))
 
         self.update_button_states()
+
+    def shutdown(self, timeout_ms=5000):
+        # Cancel everything and give the workers a bounded time to close
+        # their streams and journal partial files before the app exits.
+        for task_id in list(self.active_workers):
+            self._cancel_active_task(task_id)
+        self.download_queue.clear()
+        for worker in list(self.cancelling_workers.values()):
+            if worker.isRunning() and not worker.wait(timeout_ms):
+                # Jobs on the transfer core can't be killed; whatever is
+                # left is abandoned when the core shuts down.
+                logger.warning("Download did not stop in time.")
+        self.cancelling_workers.clear()
@@ -0,0 +1,847 @@
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+from huggingface_hub import hf_hub_url
+from huggingface_hub.utils import build_hf_headers, hf_raise_for_status
+from api_session import get_session
+from custom_exceptions import IntegrityError, TransferCancelledError
+from hash_utils import hash_files_parallel
+from rate_limiter import cancellable
+from upload_engine import is_transient_error, retry_delay
+
+logger = logging.getLogger(__name__)
+
+READ_SIZE = 1024 * 1024
+# Blocks held in memory per verified file until the in-order hash reaches
+# them; verified ranges are fetched in pieces small enough to fit.
+HASH_BUFFER_SIZE = 64 * 1024 * 1024
+INCOMPLETE_SUFFIX = ".incomplete"
+VERIFY_RETRIES = 2
+# A range hit by a transient error (dropped connection, 5xx) resumes from
+# where it stopped after a backoff, up to this many times.
+RANGE_RETRIES = 3
+RANGE_RETRY_BACKOFF = 1.0
+
+
+def parse_hf_url(hf_url):
+    # "https://huggingface.co/datasets/owner/name/tree/rev/some/folder" ->
+    # (repo_id, repo_type, revision, folder_path_in_repo); all None if the
+    # URL doesn't name a repo. A bare "owner/name" is accepted too.
+    parsed_url = urlparse(hf_url)
+    path_parts = [
+        part for part in parsed_url.path.strip('/').split('/') if part
+    ]
+
+    if not path_parts:
+        return None, None, None, None
+
+    repo_type = "model"
+    if path_parts[0] == "datasets":
+        repo_type = "dataset"
+        path_parts.pop(0)
+    elif path_parts[0] == "spaces":
+        repo_type = "space"
+        path_parts.pop(0)
+
+    if len(path_parts) < 2:
+        return None, None, None, None
+
+    repo_id = f"{path_parts[0]}/{path_parts[1]}"
+    revision = "main"
+    folder_path_in_repo = ""
+
+    if len(path_parts) > 2 and path_parts[2] == "tree":
+        if len(path_parts) > 3:
+            revision = path_parts[3]
+            if len(path_parts) > 4:
+                folder_path_in_repo = "/".join(path_parts[4:])
+
+    logger.debug(
+        f"Parsed URL: repo_id='{repo_id}', repo_type='{repo_type}', "
+        f"revision='{revision}', folder_path='{folder_path_in_repo}'"
+    )
+    return repo_id, repo_type, revision, folder_path_in_repo
+
+
+def list_download_files(api, repo_id, repo_type, revision,
+                        folder_path_in_repo=""):
+    # Sibling entries (with sizes and LFS info) of every file in the repo,
+    # or under folder_path_in_repo.
+    repo_info_obj = api.repo_info(
+        repo_id=repo_id,
+        revision=revision,
+        repo_type=repo_type,
+        files_metadata=True,
+    )
+    files = []
+    normalized_folder_path = (folder_path_in_repo or "").strip("/")
+    for f_info in repo_info_obj.siblings or []:
+        if (
+            not normalized_folder_path
+            or f_info.rfilename.startswith(normalized_folder_path + "/")
+            or f_info.rfilename == normalized_folder_path
+        ):
+            files.append(f_info)
+    return files
+
+
+class _PositionalWriter:
+    # Writes blocks at absolute offsets of one file from several threads.
+    # os.pwrite is atomic per call; platforms without it (Windows) fall back
+    # to a locked seek + write on the same descriptor.
+    def __init__(self, path, size):
+        flags = os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0)
+        self.fd = os.open(path, flags, 0o644)
+        self._lock = threading.Lock()
+        if size is not None and os.fstat(self.fd).st_size != size:
+            os.ftruncate(self.fd, size)
+            if size > 0 and hasattr(os, "posix_fallocate"):
+                try:
+                    os.posix_fallocate(self.fd, 0, size)
+                except OSError:
+                    # Not supported on every filesystem; ftruncate is enough.
+                    pass
+
+    def write_at(self, data, offset):
+        if hasattr(os, "pwrite"):
+            view = memoryview(data)
+            while view:
+                written = os.pwrite(self.fd, view, offset)
+                view = view[written:]
+                offset += written
+        else:
+            with self._lock:
+                os.lseek(self.fd, offset, os.SEEK_SET)
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(self.fd, view):]
+
+    def read_at(self, size, offset):
+        if hasattr(os, "pread"):
+            return os.pread(self.fd, size, offset)
+        with self._lock:
+            os.lseek(self.fd, offset, os.SEEK_SET)
+            return os.read(self.fd, size)
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+def expected_hasher(etag, size):
+    # The Hub's etag for a file is the SHA-256 of LFS content or the git blob
+    # SHA-1 of a regular file; returns a hasher to check it, if possible.
+    if not etag or size is None:
+        return None
+    if len(etag) == 64:
+        return hashlib.sha256()
+    if len(etag) == 40:
+        return hashlib.sha1(f"blob {size}\0".encode("utf-8"))
+    return None
+
+
+class _HashCursor:
+    # Hashes a file in order while it is being written out of order, on a
+    # thread of its own so download threads never wait on each other for
+    # it. Blocks stay in memory (up to buffer_size bytes) until the hash
+    # reaches them. Read-back from disk (mostly the page cache) is only a
+    # fallback: for data an interrupted run left on disk, and for blocks
+    # arriving while the buffer is full.
+    def __init__(self, hasher, writer, buffer_size=HASH_BUFFER_SIZE):
+        self.hasher = hasher
+        self.writer = writer
+        self.buffer_size = buffer_size
+        self.position = 0
+        self._cond = threading.Condition()
+        # start -> (end, data) not hashed yet; data None means on disk.
+        self._pieces = {}
+        # End of what can be hashed in order from position.
+        self._frontier = 0
+        # Buffered bytes before and past the frontier.
+        self._ready = 0
+        self._ahead = 0
+        # Bumped by reset, so a piece hashed meanwhile is dropped.
+        self._generation = 0
+        self._finishing = False
+        self._closed = False
+        self._error = None
+        self._thread = threading.Thread(
+            target=self._run, name="download-hash", daemon=True
+        )
+        self._thread.start()
+
+    def reset(self, hasher):
+        with self._cond:
+            self.hasher = hasher
+            self.position = 0
+            self._pieces.clear()
+            self._frontier = 0
+            self._ready = 0
+            self._ahead = 0
+            self._generation += 1
+            self._cond.notify_all()
+
+    def feed(self, data, offset):
+        # Call after the block has been written, so read-back can see it.
+        end = offset + len(data)
+        with self._cond:
+            if offset == self._frontier:
+                # Waits on the hash thread only, never on other streams.
+                while (
+                    self._ready >= self.buffer_size
+                    and not self._closed
+                    and self._error is None
+                ):
+                    self._cond.wait()
+            elif self._ready + self._ahead + len(data) > self.buffer_size:
+                data = None
+            self._add(offset, end, data)
+
+    def add_written(self, start, end):
+        # Data already on disk from an earlier, interrupted run.
+        with self._cond:
+            start = max(start, self._frontier)
+            if end > start:
+                self._add(start, end, None)
+
+    def _add(self, start, end, data):
+        if data is not None:
+            self._ahead += len(data)
+        self._pieces[start] = (end, data)
+        moved = False
+        while self._frontier in self._pieces:
+            end, data = self._pieces[self._frontier]
+            if data is not None:
+                self._ahead -= len(data)
+                self._ready += len(data)
+            self._frontier = end
+            moved = True
+        if moved:
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while (
+                    self.position == self._frontier
+                    and not self._finishing
+                    and not self._closed
+                ):
+                    self._cond.wait()
+                if self._closed or self.position == self._frontier:
+                    return
+                start = self.position
+                end, data = self._pieces.pop(start)
+                hasher = self.hasher
+                generation = self._generation
+            try:
+                if data is None:
+                    self._read_back(hasher, start, end, generation)
+                else:
+                    hasher.update(data)
+            except Exception as e:
+                with self._cond:
+                    self._error = e
+                    self._cond.notify_all()
+                return
+            with self._cond:
+                if generation == self._generation:
+                    self.position = end
+                    if data is not None:
+                        self._ready -= len(data)
+                self._cond.notify_all()
+
+    def _read_back(self, hasher, start, end, generation):
+        position = start
+        while position < end:
+            if self._closed or generation != self._generation:
+                return
+            block = self.writer.read_at(
+                min(READ_SIZE, end - position), position
+            )
+            if not block:
+                raise IOError("Downloaded data vanished during hashing.")
+            hasher.update(block)
+            position += len(block)
+
+    def finish(self):
+        # Hashes everything written in order and stops the thread;
+        # position and hexdigest() are final afterwards.
+        with self._cond:
+            self._finishing = True
+            self._cond.notify_all()
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def close(self):
+        # Stops the thread without hashing what is left; call before the
+        # writer is closed.
+        with self._cond:
+            self._closed = True
+            self._pieces.clear()
+            self._cond.notify_all()
+        self._thread.join()
+
+    def hexdigest(self):
+        with self._cond:
+            return self.hasher.hexdigest()
+
+
+class ChunkedDownloader:
+    def __init__(
+        self,
+        token=None,
+        chunk_size=64 * 1024 * 1024,
+        streams_per_file=8,
+        parallel_files=4,
+        session=None,
+        progress_callback=None,
+        cancel_event=None,
+        hash_cache=None,
+        hash_workers=None,
+        verify=False,
+        verify_retries=VERIFY_RETRIES,
+        range_retries=RANGE_RETRIES,
+        range_retry_backoff=RANGE_RETRY_BACKOFF,
+    ):
+        self.token = token
+        # Called with the number of new bytes on disk, straight from the
+        # transfer threads.
+        self.progress_callback = progress_callback
+        self.chunk_size = max(READ_SIZE, int(chunk_size))
+        self.streams_per_file = max(1, int(streams_per_file))
+        self.parallel_files = max(1, int(parallel_files))
+        # Shared, pooled and proxy-aware unless a session is passed in.
+        self.session = session or get_session()
+        self.cancel_event = cancel_event or threading.Event()
+        # Lets files already on disk (from an earlier run without a journal,
+        # or another tool) be recognised by hash instead of re-downloaded.
+        self.hash_cache = hash_cache
+        # Processes used to hash files on disk; None means one per core.
+        self.hash_workers = hash_workers
+        # Hash files against the Hub's etag while they are written; a file
+        # that doesn't match is downloaded again up to verify_retries times.
+        self.verify = verify
+        self.verify_retries = max(0, int(verify_retries))
+        self.range_retries = max(0, int(range_retries))
+        self.range_retry_backoff = max(0.0, float(range_retry_backoff))
+        self._responses_lock = threading.Lock()
+        self._active_responses = set()
+
+    def cancel(self):
+        # Closing the live responses unblocks threads waiting on a socket
+        # read, so cancellation doesn't have to wait for the read timeout.
+        self.cancel_event.set()
+        with self._responses_lock:
+            responses = list(self._active_responses)
+        for response in responses:
+            try:
+                response.close()
+            except Exception:
+                pass
+
+    def _check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise TransferCancelledError("Download was cancelled by user.")
+
+    def _stream_blocks(self, response):
+        with self._responses_lock:
+            self._active_responses.add(response)
+        try:
+            self._check_cancelled()
+            for block in response.iter_content(READ_SIZE):
+                self._check_cancelled()
+                if block:
+                    yield block
+        except TransferCancelledError:
+            raise
+        except Exception as e:
+            if self.cancel_event.is_set():
+                raise TransferCancelledError(
+                    "Download was cancelled by user."
+                ) from e
+            raise
+        finally:
+            with self._responses_lock:
+                self._active_responses.discard(response)
+
+    def _check_stopped(self, stop):
+        if stop is not None and stop.is_set():
+            raise TransferCancelledError(
+                "Stopped: another part of the file failed."
+            )
+
+    def _wait_all(self, futures, on_done=None, stop=None):
+        # Fails fast: the first error (ranges have had their retries by
+        # then) stops the rest instead of letting it finish first. With
+        # `stop`, only the tasks watching it stop (the ranges of one file;
+        # its error then reaches the file level first); without, the whole
+        # download is cancelled.
+        try:
+            for future in as_completed(futures):
+                future.result()
+                if on_done:
+                    on_done(future)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            if stop is not None:
+                stop.set()
+            else:
+                self.cancel()
+            raise
+
+    def _hash_local_files(self, paths):
+        if self.hash_cache is not None:
+            return self.hash_cache.get_many(
+                paths, self.cancel_event, self.hash_workers
+            )
+        return hash_files_parallel(paths, self.hash_workers, self.cancel_event)
+
+    def match_existing(self, files, local_dir, journal):
+        # Files already on disk (from an earlier run without a journal, or
+        # another tool) are recognised by hash instead of re-downloaded.
+        # All candidates are hashed in one parallel batch up front.
+        candidates = {}
+        for path_in_repo, size, etag in files:
+            if not etag or size is None:
+                continue
+            local_path = os.path.join(local_dir, *path_in_repo.split("/"))
+            state = journal.begin_file(path_in_repo, size, etag, self.chunk_size)
+            if state["complete"]:
+                continue
+            try:
+                if os.path.getsize(local_path) != size:
+                    continue
+            except OSError:
+                continue
+            candidates[local_path] = (path_in_repo, etag)
+        if not candidates:
+            return 0
+        hashed = self._hash_local_files(list(candidates))
+        self._check_cancelled()
+        matched = 0
+        for local_path, hashes in hashed.items():
+            path_in_repo, etag = candidates[local_path]
+            if etag in (hashes["sha256"], hashes["git_sha1"]):
+                journal.mark_complete(path_in_repo)
+                matched += 1
+        return matched
+
+    def _report(self, num_bytes):
+        if self.progress_callback and num_bytes:
+            self.progress_callback(num_bytes)
+
+    def _headers_for(self, url, base_url):
+        # Auth headers only go to the Hub itself, never to the signed
+        # storage URL an LFS file redirects to.
+        if urlparse(url).netloc == urlparse(base_url).netloc:
+            return build_hf_headers(token=self.token)
+        return {}
+
+    def _resolve(self, url):
+        with cancellable(self.cancel_event):
+            response = self.session.head(
+                url,
+                headers=build_hf_headers(token=self.token),
+                allow_redirects=True,
+                timeout=30,
+            )
+        hf_raise_for_status(response)
+        size = response.headers.get("Content-Length")
+        accepts_ranges = response.headers.get("Accept-Ranges", "") == "bytes"
+        return response.url, int(size) if size else None, accepts_ranges
+
+    def _fetch_range(self, url, base_url, writer, start, end,
+                     on_range_done=None, hash_cursor=None, stop=None):
+        # stop: set when another range of the file failed for good.
+        offset = start
+        attempt = 0
+        while True:
+            self._check_cancelled()
+            self._check_stopped(stop)
+            headers = self._headers_for(url, base_url)
+            headers["Range"] = f"bytes={offset}-{end}"
+            try:
+                # Range threads don't inherit the caller's cancellable().
+                with cancellable(self.cancel_event), self.session.get(
+                    url, headers=headers, stream=True, timeout=60
+                ) as response:
+                    hf_raise_for_status(response)
+                    if response.status_code != 206:
+                        raise IOError(
+                            "Server ignored Range request for bytes "
+                            f"{offset}-{end}."
+                        )
+                    for block in self._stream_blocks(response):
+                        self._check_stopped(stop)
+                        writer.write_at(block, offset)
+                        if hash_cursor is not None:
+                            hash_cursor.feed(block, offset)
+                        offset += len(block)
+                        self._report(len(block))
+                if offset != end + 1:
+                    raise ConnectionError(
+                        f"Short read for bytes {start}-{end}: got "
+                        f"{offset - start} of {end - start + 1} bytes."
+                    )
+                break
+            except TransferCancelledError:
+                raise
+            except Exception as e:
+                if attempt >= self.range_retries or not is_transient_error(e):
+                    raise
+                attempt += 1
+                delay = retry_delay(attempt, self.range_retry_backoff)
+                logger.warning(
+                    f"Bytes {offset}-{end} failed ({e}); resuming in "
+                    f"{delay:.1f}s (retry {attempt}/{self.range_retries})."
+                )
+                if self.cancel_event.wait(delay):
+                    raise TransferCancelledError(
+                        "Download was cancelled by user."
+                    )
+        if on_range_done:
+            on_range_done(start)
+
+    def _fetch_whole(self, url, writer, offset=0, on_checkpoint=None,
+                     hash_cursor=None, etag=None, size=None):
+        if size is not None and offset >= size:
+            # The last checkpoint fell on the end of the file; a
+            # "bytes=<size>-" request would only get a 416 back.
+            return offset
+        headers = build_hf_headers(token=self.token)
+        if offset > 0:
+            headers["Range"] = f"bytes={offset}-"
+        with cancellable(self.cancel_event), self.session.get(
+            url,
+            headers=headers,
+            stream=True,
+            timeout=60,
+        ) as response:
+            hf_raise_for_status(response)
+            if response.status_code != 206:
+                # Resume not honoured (or not requested): start over.
+                self._report(-offset)
+                if hash_cursor is not None and offset > 0:
+                    hash_cursor.reset(expected_hasher(etag, size))
+                offset = 0
+            next_checkpoint = offset + self.chunk_size
+            for block in self._stream_blocks(response):
+                writer.write_at(block, offset)
+                if hash_cursor is not None:
+                    hash_cursor.feed(block, offset)
+                offset += len(block)
+                self._report(len(block))
+                if on_checkpoint and offset >= next_checkpoint:
+                    on_checkpoint(offset)
+                    next_checkpoint = offset + self.chunk_size
+        return offset
+
+    def _check_integrity(self, writer, local_path, size, etag, hash_cursor):
+        if size is not None:
+            on_disk = os.fstat(writer.fd).st_size
+            if on_disk != size:
+                raise IntegrityError(
+                    f"{local_path}: expected {size} bytes, got {on_disk}."
+                )
+        if hash_cursor is None:
+            return
+        hash_cursor.finish()
+        if hash_cursor.position != size:
+            raise IntegrityError(
+                f"{local_path}: only {hash_cursor.position} of {size} bytes "
+                "could be hashed."
+            )
+        digest = hash_cursor.hexdigest()
+        if digest != etag:
+            raise IntegrityError(
+                f"{local_path}: hash {digest} does not match the Hub's {etag}."
+            )
+
+    def _discard(self, temp_path, path_in_repo, journal):
+        if journal is not None and path_in_repo is not None:
+            journal.reset_file(path_in_repo)
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+    def download_file(
+        self,
+        url,
+        local_path,
+        size=None,
+        path_in_repo=None,
+        etag=None,
+        journal=None,
+    ):
+        # Returns "skipped" when the journal shows the file is already
+        # complete on disk, "downloaded" otherwise. A cancelled transfer
+        # leaves the .incomplete file and its journal entry for resuming;
+        # a file that fails verification is discarded (IntegrityError).
+        self._check_cancelled()
+        os.makedirs(os.path.dirname(local_path) or ".", exist_ok=True)
+        temp_path = local_path + INCOMPLETE_SUFFIX
+        state = {"complete": False, "ranges_done": set(), "offset": 0}
+        if journal is not None and path_in_repo is not None:
+            state = journal.begin_file(
+                path_in_repo, size, etag, self.chunk_size
+            )
+            if state["complete"]:
+                if (
+                    os.path.isfile(local_path)
+                    and (size is None or os.path.getsize(local_path) == size)
+                ):
+                    self._report(size or 0)
+                    return "skipped"
+                journal.reset_file(path_in_repo)
+                state = journal.begin_file(
+                    path_in_repo, size, etag, self.chunk_size
+                )
+            if not os.path.exists(temp_path):
+                # The journal knows about partial data that is gone.
+                state["ranges_done"] = set()
+                state["offset"] = 0
+
+        def on_range_done(start):
+            if journal is not None and path_in_repo is not None:
+                journal.mark_range_done(path_in_repo, start)
+
+        def on_checkpoint(offset):
+            if journal is not None and path_in_repo is not None:
+                journal.mark_offset(path_in_repo, offset)
+
+        use_ranges = (
+            self.streams_per_file > 1
+            and size is not None
+            and size > self.chunk_size
+        )
+        final_url = url
+        if use_ranges:
+            final_url, resolved_size, accepts_ranges = self._resolve(url)
+            if resolved_size is not None:
+                size = resolved_size
+            use_ranges = accepts_ranges and size > self.chunk_size
+
+        if use_ranges:
+            self._report(sum(
+                min(start + self.chunk_size, size) - start
+                for start in state["ranges_done"]
+            ))
+        else:
+            state["ranges_done"] = set()
+            self._report(state["offset"])
+
+        writer = _PositionalWriter(temp_path, size)
+        hash_cursor = None
+        hasher = expected_hasher(etag, size) if self.verify else None
+        if hasher is not None:
+            hash_cursor = _HashCursor(hasher, writer)
+        try:
+            if hash_cursor is not None:
+                # Resumed data is on disk already and is hashed from there.
+                if use_ranges:
+                    for start in sorted(state["ranges_done"]):
+                        hash_cursor.add_written(
+                            start, min(start + self.chunk_size, size)
+                        )
+                elif state["offset"]:
+                    hash_cursor.add_written(0, state["offset"])
+            if use_ranges:
+                # Verified files are fetched in smaller pieces, so the
+                # streams stay close enough together for the hash buffer
+                # to hold what they get ahead. The journal still records
+                # whole chunks.
+                piece_size = self.chunk_size
+                if hash_cursor is not None:
+                    piece_size = max(READ_SIZE, min(
+                        self.chunk_size,
+                        hash_cursor.buffer_size // self.streams_per_file,
+                    ))
+                ranges = []
+                pieces_left = {}
+                for chunk_start in range(0, size, self.chunk_size):
+                    if chunk_start in state["ranges_done"]:
+                        continue
+                    chunk_end = min(chunk_start + self.chunk_size, size)
+                    starts = range(chunk_start, chunk_end, piece_size)
+                    for start in starts:
+                        ranges.append(
+                            (start, min(start + piece_size, chunk_end) - 1)
+                        )
+                    pieces_left[chunk_start] = len(starts)
+                pieces_lock = threading.Lock()
+                stop = threading.Event()
+
+                def on_piece_done(start):
+                    chunk_start = start - start % self.chunk_size
+                    with pieces_lock:
+                        pieces_left[chunk_start] -= 1
+                        chunk_done = not pieces_left[chunk_start]
+                    if chunk_done:
+                        on_range_done(chunk_start)
+
+                if ranges:
+                    with ThreadPoolExecutor(
+                        max_workers=min(self.streams_per_file, len(ranges))
+                    ) as pool:
+                        futures = [
+                            pool.submit(
+                                self._fetch_range,
+                                final_url,
+                                url,
+                                writer,
+                                start,
+                                end,
+                                on_piece_done,
+                                hash_cursor,
+                                stop,
+                            )
+                            for start, end in ranges
+                        ]
+                        self._wait_all(futures, stop=stop)
+            else:
+                written = self._fetch_whole(
+                    url,
+                    writer,
+                    state["offset"],
+                    on_checkpoint,
+                    hash_cursor,
+                    etag,
+                    size,
+                )
+                if size is not None and written != size:
+                    raise IOError(
+                        f"Expected {size} bytes for {local_path}, "
+                        f"got {written}."
+                    )
+                os.ftruncate(writer.fd, written)
+            self._check_integrity(writer, local_path, size, etag, hash_cursor)
+        except IntegrityError:
+            if hash_cursor is not None:
+                hash_cursor.close()
+            writer.close()
+            self._discard(temp_path, path_in_repo, journal)
+            raise
+        finally:
+            # The hash thread may still read from the file.
+            if hash_cursor is not None:
+                hash_cursor.close()
+            writer.close()
+        os.replace(temp_path, local_path)
+        if journal is not None and path_in_repo is not None:
+            journal.mark_complete(path_in_repo)
+        return "downloaded"
+
+    def download_repo_file(self, repo_id, repo_type, revision, path_in_repo,
+                           size, etag, local_dir, journal=None,
+                           on_file_retry=None):
+        # One file of a repo, downloaded again (up to verify_retries times)
+        # if it fails verification. Returns download_file's status.
+        url = hf_hub_url(
+            repo_id=repo_id,
+            filename=path_in_repo,
+            repo_type=repo_type,
+            revision=revision,
+        )
+        local_path = os.path.join(local_dir, *path_in_repo.split("/"))
+        for attempt in range(self.verify_retries + 1):
+            try:
+                return self.download_file(
+                    url, local_path, size, path_in_repo, etag, journal
+                )
+            except IntegrityError as e:
+                # Everything was reported as received; take it back.
+                self._report(-(size or 0))
+                if attempt == self.verify_retries:
+                    raise
+                logger.warning(f"Retrying {path_in_repo}: {e}")
+                if on_file_retry:
+                    on_file_retry(path_in_repo, attempt + 1, e)
+
+    def download_files(
+        self,
+        repo_id,
+        repo_type,
+        revision,
+        files,
+        local_dir,
+        on_file_done=None,
+        journal=None,
+        on_file_retry=None,
+    ):
+        # files: iterable of (path_in_repo, size, etag) tuples. Small files
+        # run side by side; large ones additionally split into byte ranges.
+        files = list(files)
+        try:
+            if journal is not None:
+                self.match_existing(files, local_dir, journal)
+
+            def _download(path_in_repo, size, etag):
+                status = self.download_repo_file(
+                    repo_id, repo_type, revision, path_in_repo, size, etag,
+                    local_dir, journal, on_file_retry,
+                )
+                return path_in_repo, size, status
+
+            with ThreadPoolExecutor(max_workers=self.parallel_files) as pool:
+                futures = [
+                    pool.submit(_download, path_in_repo, size, etag)
+                    for path_in_repo, size, etag in files
+                ]
+
+                def file_done(future):
+                    if on_file_done:
+                        on_file_done(*future.result())
+
+                self._wait_all(futures, file_done)
+        finally:
+            # Progress is batched; write what is left, even on cancel.
+            if journal is not None:
+                journal.flush()
+
+    async def download_files_async(
+        self,
+        job,
+        repo_id,
+        repo_type,
+        revision,
+        files,
+        local_dir,
+        on_file_done=None,
+        journal=None,
+        on_file_retry=None,
+    ):
+        # download_files as a TransferCore job: each file is a child task
+        # (parallel_files at a time) instead of a thread of a private pool,
+        # and cancelling the job stops every file before it returns.
+        # on_file_done runs on the event loop.
+        files = list(files)
+        job.add_cancel_callback(self.cancel)
+
+        async def _download(file):
+            path_in_repo, size, etag = file
+            status = await job.run_blocking(
+                self.download_repo_file,
+                repo_id, repo_type, revision, path_in_repo, size, etag,
+                local_dir, journal, on_file_retry,
+            )
+            if on_file_done:
+                on_file_done(path_in_repo, size, status)
+
+        try:
+            if journal is not None:
+                await job.run_blocking(
+                    self.match_existing, files, local_dir, journal
+                )
+            await job.map(_download, files, limit=self.parallel_files)
+        finally:
+            # Progress is batched; write what is left, even on cancel.
+            if journal is not None:
+                journal.flush()
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_DIR_NAME = ".hf_backup_journal"
+# Progress is written out after this many updates or seconds, whichever
+# comes first, and on flush(). A crash loses at most that much progress:
+# those ranges are fetched again, finished files are re-hashed.
+FLUSH_EVERY = 64
+FLUSH_INTERVAL = 5.0
+
+
+def sibling_etag(file_info):
+    # LFS files are identified by their SHA-256, regular files by the git
+    # blob id. Older huggingface_hub versions expose `lfs` as a plain dict.
+    lfs = getattr(file_info, "lfs", None)
+    if lfs:
+        sha256 = (
+            lfs.get("sha256") if isinstance(lfs, dict)
+            else getattr(lfs, "sha256", None)
+        )
+        if sha256:
+            return sha256
+    return getattr(file_info, "blob_id", None)
+
+
+class DownloadJournal:
+    # Persistent record of finished files and partial byte ranges for one
+    # (repo, revision, folder, destination) download, so a re-queued or
+    # restarted task only fetches what is still missing.
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        # Serializes writes to the file; taken before _lock when both are.
+        self._save_lock = threading.Lock()
+        self.files = {}
+        self._unsaved = 0
+        self._saved_at = time.monotonic()
+        self._load()
+
+    @classmethod
+    def for_task(cls, download_directory, repo_id, repo_type, revision,
+                 folder_path_in_repo=""):
+        key = f"{repo_type}:{repo_id}@{revision}/{folder_path_in_repo}"
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16] + ".json"
+        return cls(os.path.join(download_directory, JOURNAL_DIR_NAME, name))
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as journal_file:
+                self.files = json.load(journal_file).get("files", {})
+            logger.info(f"Loaded download journal: {self.path}")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable download journal {self.path}: {e}")
+            self.files = {}
+
+    def save(self):
+        with self._save_lock, self._lock:
+            self._save_locked()
+
+    def flush(self):
+        # Writes batched progress now; call when a download ends or is
+        # cancelled. Download threads only wait for the JSON snapshot,
+        # not for the disk.
+        with self._save_lock:
+            with self._lock:
+                if not self._unsaved:
+                    return
+                text = self._snapshot_locked()
+            self._write(text)
+
+    def _save_locked(self):
+        # Immediate write, for changes that must survive a crash; needs
+        # both _save_lock and _lock.
+        self._write(self._snapshot_locked())
+
+    def _snapshot_locked(self):
+        self._unsaved = 0
+        self._saved_at = time.monotonic()
+        return json.dumps({"files": self.files})
+
+    def _write(self, text):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as journal_file:
+            journal_file.write(text)
+        os.replace(temp_path, self.path)
+
+    def _progress_locked(self):
+        # Counts an unsaved update; True when the batch is due.
+        self._unsaved += 1
+        return (
+            self._unsaved >= FLUSH_EVERY
+            or time.monotonic() - self._saved_at >= FLUSH_INTERVAL
+        )
+
+    def _entry(self, path_in_repo, size, etag, chunk_size):
+        # Any mismatch with what the Hub reports now means the partial data
+        # belongs to another version of the file: start that file over.
+        entry = self.files.get(path_in_repo)
+        if (
+            entry is None
+            or entry.get("size") != size
+            or entry.get("etag") != etag
+            or entry.get("chunk_size") != chunk_size
+        ):
+            entry = {
+                "size": size,
+                "etag": etag,
+                "chunk_size": chunk_size,
+                "complete": False,
+                "ranges_done": [],
+                "offset": 0,
+            }
+            self.files[path_in_repo] = entry
+        return entry
+
+    def begin_file(self, path_in_repo, size, etag, chunk_size):
+        with self._lock:
+            entry = self._entry(path_in_repo, size, etag, chunk_size)
+            return {
+                "complete": entry["complete"],
+                "ranges_done": set(entry["ranges_done"]),
+                "offset": entry["offset"],
+            }
+
+    def mark_range_done(self, path_in_repo, start):
+        due = False
+        with self._lock:
+            entry = self.files.get(path_in_repo)
+            if entry is not None and start not in entry["ranges_done"]:
+                entry["ranges_done"].append(start)
+                due = self._progress_locked()
+        if due:
+            self.flush()
+
+    def mark_offset(self, path_in_repo, offset):
+        due = False
+        with self._lock:
+            entry = self.files.get(path_in_repo)
+            if entry is not None:
+                entry["offset"] = offset
+                due = self._progress_locked()
+        if due:
+            self.flush()
+
+    def mark_complete(self, path_in_repo):
+        due = False
+        with self._lock:
+            entry = self.files.get(path_in_repo)
+            if entry is not None:
+                entry["complete"] = True
+                entry["ranges_done"] = []
+                entry["offset"] = entry["size"] or 0
+                due = self._progress_locked()
+        if due:
+            self.flush()
+
+    def reset_file(self, path_in_repo):
+        # Written at once: the partial data it described is gone.
+        with self._save_lock, self._lock:
+            if self.files.pop(path_in_repo, None) is not None:
+                self._save_locked()
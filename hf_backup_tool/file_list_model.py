@@ -0,0 +1,159 @@
+import bisect
+import time
+from array import array
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, Qt
+from transfer_progress import format_bytes
+
+# Rows handed to the view per fetchMore; the view asks for more as it
+# scrolls, so opening a huge directory only creates the first batch.
+FETCH_BATCH = 5000
+# Changed rows patched into the order one by one; each costs a linear
+# search and shift, so bigger bursts rebuild the order once instead.
+INCREMENTAL_LIMIT = 32
+
+
+class FileListModel(QAbstractListModel):
+    # Read-only list over a FileTable in a given row order (see
+    # FileTable.order). Holds no per-row objects; data() looks rows up on
+    # demand, so the view only ever touches the rows it paints.
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._table = None
+        self._order = array("q")
+        self._loaded = 0
+        # What _order was built with, so changes can be slotted in place.
+        self._sort_by = "name"
+        self._text_filter = None
+
+    def set_files(self, table, order, sort_by="name", text_filter=None):
+        self.beginResetModel()
+        self._table = table
+        self._order = order
+        self._loaded = min(FETCH_BATCH, len(order))
+        self._sort_by = sort_by
+        self._text_filter = text_filter
+        self.endResetModel()
+
+    def set_order(self, order, sort_by="name", text_filter=None):
+        self.set_files(self._table, order, sort_by, text_filter)
+
+    def apply_changes(self, added_rows, removed_rows, modified_rows):
+        # Rows from FileTable.apply_changes. Each one is removed from or
+        # inserted at its place in the current order with row-level model
+        # signals, so the view keeps its scroll position and selection.
+        if self._table is None:
+            return
+        changed = len(added_rows) + len(removed_rows) + len(modified_rows)
+        if changed > INCREMENTAL_LIMIT:
+            self.set_order(
+                self._table.order(self._sort_by, self._text_filter),
+                self._sort_by,
+                self._text_filter,
+            )
+            return
+        key = self._table.sort_key(self._sort_by)
+        if self._sort_by == "date":
+            # A new mtime moves the row.
+            removed_rows = list(removed_rows) + list(modified_rows)
+            added_rows = list(added_rows) + list(modified_rows)
+        else:
+            for row in modified_rows:
+                position = self._position_of(row)
+                if position is not None and position < self._loaded:
+                    index = self.index(position)
+                    self.dataChanged.emit(index, index)
+        for row in removed_rows:
+            position = self._position_of(row)
+            if position is None:
+                continue
+            if position < self._loaded:
+                self.beginRemoveRows(QModelIndex(), position, position)
+                del self._order[position]
+                self._loaded -= 1
+                self.endRemoveRows()
+            else:
+                del self._order[position]
+        for row in added_rows:
+            if not self._table.matches(row, self._text_filter):
+                continue
+            position = bisect.bisect_left(self._order, key(row), key=key)
+            if position <= self._loaded:
+                self.beginInsertRows(QModelIndex(), position, position)
+                self._order.insert(position, row)
+                self._loaded += 1
+                self.endInsertRows()
+            else:
+                self._order.insert(position, row)
+
+    def _position_of(self, row):
+        try:
+            return self._order.index(row)
+        except ValueError:
+            return None
+
+    def clear(self):
+        self.set_files(None, array("q"))
+
+    def table(self):
+        return self._table
+
+    def row_total(self):
+        # Rows in the current order, loaded or not.
+        return len(self._order)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._loaded
+
+    def canFetchMore(self, parent):
+        if parent.isValid():
+            return False
+        return self._loaded < len(self._order)
+
+    def fetchMore(self, parent):
+        if parent.isValid():
+            return
+        count = min(FETCH_BATCH, len(self._order) - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(
+            QModelIndex(), self._loaded, self._loaded + count - 1
+        )
+        self._loaded += count
+        self.endInsertRows()
+
+    def fetch_all(self):
+        # Loads every row, e.g. before "select all".
+        if self._loaded < len(self._order):
+            self.beginInsertRows(
+                QModelIndex(), self._loaded, len(self._order) - 1
+            )
+            self._loaded = len(self._order)
+            self.endInsertRows()
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= self._loaded:
+            return None
+        row = self._order[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._table.relpaths[row]
+        if role == Qt.ItemDataRole.ToolTipRole:
+            modified = time.strftime(
+                "%Y-%m-%d %H:%M", time.localtime(self._table.mtimes[row])
+            )
+            return (
+                f"{format_bytes(self._table.sizes[row])}, "
+                f"modified {modified}"
+            )
+        return None
+
+    def file_at(self, view_row):
+        # (path, relpath, size) of the file shown at view_row.
+        row = self._order[view_row]
+        return (
+            self._table.path(row),
+            self._table.relpaths[row],
+            self._table.sizes[row],
+        )
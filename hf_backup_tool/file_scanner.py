@@ -0,0 +1,316 @@
+import fnmatch
+import logging
+import os
+from array import array
+from collections import namedtuple
+from custom_exceptions import TransferCancelledError
+
+logger = logging.getLogger(__name__)
+
+# relpath always uses "/" so it can be joined onto a path in the repo.
+ScannedFile = namedtuple("ScannedFile", ["path", "relpath", "size", "mtime"])
+
+
+def parse_patterns(text):
+    # "*.safetensors, checkpoints/*; *.tmp" -> ["*.safetensors", ...]
+    patterns = []
+    for part in text.replace(";", ",").split(","):
+        part = part.strip().replace("\\", "/")
+        if part:
+            patterns.append(part)
+    return patterns
+
+
+def matches_any(relpath, patterns):
+    # Patterns with a "/" match the whole relative path; others match the
+    # name alone, at any depth.
+    name = relpath.rsplit("/", 1)[-1]
+    for pattern in patterns:
+        target = relpath if "/" in pattern else name
+        if fnmatch.fnmatchcase(target, pattern):
+            return True
+    return False
+
+
+def list_directory(directory, prefix="", include=None, exclude=None,
+                   extension=None, on_skip=None):
+    # One level of scan_directory: returns (files, subdirs) where files are
+    # the matching ScannedFiles directly in directory and subdirs holds
+    # (path, relpath prefix) for each folder that isn't excluded. prefix is
+    # the directory's own path relative to the scan root, ending in "/".
+    include = include or []
+    exclude = exclude or []
+    suffix = f".{extension.lower()}" if extension else None
+    files = []
+    subdirs = []
+    try:
+        iterator = os.scandir(directory)
+    except OSError as e:
+        logger.warning(f"Cannot list {directory}: {e}")
+        if on_skip:
+            on_skip(directory, f"unreadable: {e}")
+        return files, subdirs
+    with iterator:
+        for entry in iterator:
+            relpath = prefix + entry.name
+            try:
+                if entry.is_symlink():
+                    if on_skip:
+                        on_skip(entry.path, "symlink")
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    if not matches_any(relpath, exclude):
+                        subdirs.append((entry.path, relpath + "/"))
+                    continue
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                if suffix and not entry.name.lower().endswith(suffix):
+                    continue
+                if include and not matches_any(relpath, include):
+                    continue
+                if matches_any(relpath, exclude):
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+            except OSError as e:
+                if on_skip:
+                    on_skip(entry.path, f"unreadable: {e}")
+                continue
+            files.append(
+                ScannedFile(entry.path, relpath, stat.st_size, stat.st_mtime)
+            )
+    return files, subdirs
+
+
+def scan_directory(root, recursive=True, include=None, exclude=None,
+                   extension=None, cancel_event=None, on_skip=None):
+    # Yields a ScannedFile for every regular file under root. Uses scandir
+    # so type checks and stat come from the directory listing (no extra
+    # syscalls on Windows, one lstat per file elsewhere). Symlinks are
+    # skipped rather than followed. Excluded directories are not descended
+    # into. extension ("safetensors") is checked on top of the include
+    # patterns. on_skip(path, reason) reports what was left out.
+    pending = [(root, "")]
+    while pending:
+        if cancel_event is not None and cancel_event.is_set():
+            raise TransferCancelledError("File scan cancelled.")
+        directory, prefix = pending.pop()
+        files, subdirs = list_directory(
+            directory, prefix, include, exclude, extension, on_skip
+        )
+        yield from files
+        if recursive:
+            pending.extend(subdirs)
+
+
+class FileTable:
+    # Scan results for very large directories: one string per file plus
+    # sizes and mtimes in typed arrays, instead of an object per file.
+    # Rows are addressed by index; views keep an index array as their order.
+
+    def __init__(self, root):
+        self.root = root
+        self.relpaths = []
+        self.sizes = array("q")
+        self.mtimes = array("d")
+        # relpath -> row, built on the first lookup.
+        self._rows = None
+
+    def __len__(self):
+        return len(self.relpaths)
+
+    def append(self, scanned):
+        if self._rows is not None:
+            self._rows[scanned.relpath] = len(self.relpaths)
+        self.relpaths.append(scanned.relpath)
+        self.sizes.append(scanned.size)
+        self.mtimes.append(scanned.mtime)
+        return len(self.relpaths) - 1
+
+    def row_of(self, relpath):
+        if self._rows is None:
+            self._rows = {
+                relpath: row for row, relpath in enumerate(self.relpaths)
+            }
+        return self._rows.get(relpath)
+
+    def update(self, row, size, mtime):
+        self.sizes[row] = size
+        self.mtimes[row] = mtime
+
+    def remove(self, row):
+        # Rows keep their index; a removed row is marked with size -1 and
+        # left out of every order. A later full scan compacts the table.
+        self.sizes[row] = -1
+        if self._rows is not None:
+            self._rows.pop(self.relpaths[row], None)
+
+    def is_removed(self, row):
+        return self.sizes[row] < 0
+
+    def apply_changes(self, added, removed, modified):
+        # Applies a TreeSnapshot diff. Returns the affected rows as
+        # (added, removed, modified); a re-added path gets a new row.
+        added_rows = []
+        removed_rows = []
+        modified_rows = []
+        for relpath in removed:
+            row = self.row_of(relpath)
+            if row is not None:
+                self.remove(row)
+                removed_rows.append(row)
+        for scanned in modified:
+            row = self.row_of(scanned.relpath)
+            if row is None:
+                added_rows.append(self.append(scanned))
+            else:
+                self.update(row, scanned.size, scanned.mtime)
+                modified_rows.append(row)
+        for scanned in added:
+            row = self.row_of(scanned.relpath)
+            if row is None:
+                added_rows.append(self.append(scanned))
+            else:
+                self.update(row, scanned.size, scanned.mtime)
+                modified_rows.append(row)
+        return added_rows, removed_rows, modified_rows
+
+    def path(self, index):
+        return os.path.join(self.root, *self.relpaths[index].split("/"))
+
+    def total_size(self):
+        return sum(size for size in self.sizes if size > 0)
+
+    def count(self):
+        # Files present, not counting removed rows.
+        return sum(1 for size in self.sizes if size >= 0)
+
+    def matches(self, row, text):
+        return not text or text.lower() in self.relpaths[row].lower()
+
+    def sort_key(self, sort_by="name"):
+        # Key over rows for the given order, usable with bisect.
+        if sort_by == "date":
+            mtimes = self.mtimes
+            return lambda row: -mtimes[row]
+        relpaths = self.relpaths
+        return lambda row: relpaths[row].lower()
+
+    def order(self, sort_by="name", text=None):
+        # Row indices sorted by name (A-Z) or date (newest first), keeping
+        # only paths that contain text (case-insensitive).
+        relpaths = self.relpaths
+        sizes = self.sizes
+        rows = [i for i in range(len(relpaths)) if sizes[i] >= 0]
+        if text:
+            text = text.lower()
+            rows = [i for i in rows if text in relpaths[i].lower()]
+        rows.sort(key=self.sort_key(sort_by))
+        return array("q", rows)
+
+
+class TreeSnapshot:
+    # Last seen state of a scanned tree, kept per directory, so a change
+    # reported for one folder is diffed by listing only that folder. Owned
+    # by one thread at a time.
+
+    def __init__(self, root, recursive=True, include=None, exclude=None,
+                 extension=None):
+        self.root = root
+        self.recursive = recursive
+        self.include = include
+        self.exclude = exclude
+        self.extension = extension
+        # relpath prefix ("" or "a/b/") -> {name: (size, mtime)}
+        self.dirs = {}
+
+    def load_table(self, table):
+        # Seeds the snapshot with what the file list already shows, so the
+        # first rescan only reports what changed since that scan.
+        for row, relpath in enumerate(table.relpaths):
+            if table.is_removed(row):
+                continue
+            prefix, _, name = relpath.rpartition("/")
+            prefix = prefix + "/" if prefix else ""
+            self.dirs.setdefault(prefix, {})[name] = (
+                table.sizes[row],
+                table.mtimes[row],
+            )
+
+    def directory_paths(self):
+        return [
+            os.path.join(self.root, *prefix.rstrip("/").split("/"))
+            if prefix else self.root
+            for prefix in self.dirs
+        ]
+
+    def prefix_for(self, directory):
+        # Relpath prefix of an absolute directory path under root.
+        relative = os.path.relpath(directory, self.root)
+        if relative == ".":
+            return ""
+        return relative.replace(os.sep, "/") + "/"
+
+    def rescan(self, prefixes=None, cancel_event=None):
+        # Lists the given directories (every known one when None) plus any
+        # new subfolders found along the way, and returns (added, removed,
+        # modified): ScannedFiles for added and modified, relpaths for
+        # removed. Vanished folders drop everything below them.
+        if prefixes is None:
+            prefixes = [""] + list(self.dirs)
+        added = []
+        removed = []
+        modified = []
+        pending = list(dict.fromkeys(prefixes))
+        seen = set()
+        while pending:
+            if cancel_event is not None and cancel_event.is_set():
+                raise TransferCancelledError("File scan cancelled.")
+            prefix = pending.pop()
+            if prefix in seen:
+                continue
+            seen.add(prefix)
+            directory = (
+                os.path.join(self.root, *prefix.rstrip("/").split("/"))
+                if prefix else self.root
+            )
+            if not os.path.isdir(directory):
+                removed.extend(self._drop(prefix))
+                continue
+            files, subdirs = list_directory(
+                directory, prefix, self.include, self.exclude,
+                self.extension,
+            )
+            old = self.dirs.get(prefix, {})
+            current = {}
+            for scanned in files:
+                name = scanned.relpath[len(prefix):]
+                state = (scanned.size, scanned.mtime)
+                current[name] = state
+                if name not in old:
+                    added.append(scanned)
+                elif old[name] != state:
+                    modified.append(scanned)
+            removed.extend(prefix + name for name in old if name not in current)
+            self.dirs[prefix] = current
+            if not self.recursive:
+                continue
+            listed = {sub_prefix for _, sub_prefix in subdirs}
+            for _, sub_prefix in subdirs:
+                if sub_prefix not in self.dirs:
+                    pending.append(sub_prefix)
+            # Direct subfolders that are gone (or now excluded).
+            for known in list(self.dirs):
+                if (
+                    known.startswith(prefix)
+                    and known != prefix
+                    and "/" not in known[len(prefix):-1]
+                    and known not in listed
+                ):
+                    removed.extend(self._drop(known))
+        return added, removed, modified
+
+    def _drop(self, prefix):
+        removed = []
+        for known in [p for p in self.dirs if p.startswith(prefix)]:
+            removed.extend(known + name for name in self.dirs.pop(known))
+        return removed
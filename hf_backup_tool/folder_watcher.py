@@ -0,0 +1,247 @@
+import logging
+import os
+import threading
+import time
+from PyQt6.QtCore import QFileSystemWatcher, QObject, QThread, QTimer, pyqtSignal
+from custom_exceptions import TransferCancelledError
+from file_scanner import TreeSnapshot
+
+logger = logging.getLogger(__name__)
+
+# Above this many folders native watches are not used (each one costs an
+# inotify watch or an open handle) and the tree is polled instead.
+MAX_WATCHED_DIRS = 4096
+# Change notifications arriving this close together are handled as one.
+DEBOUNCE_MS = 500
+SETTLE_CHECK_MS = 1000
+
+
+class _RescanWorker(QThread):
+    # (added, removed, modified, directories), or None on failure.
+    finished_signal = pyqtSignal(object)
+
+    def __init__(self, snapshot, prefixes=None, table=None):
+        super().__init__()
+        self.snapshot = snapshot
+        self.prefixes = prefixes
+        self.table = table
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        try:
+            if self.table is not None:
+                self.snapshot.load_table(self.table)
+            added, removed, modified = self.snapshot.rescan(
+                self.prefixes, self.cancel_event
+            )
+            self.finished_signal.emit(
+                (added, removed, modified, self.snapshot.directory_paths())
+            )
+        except TransferCancelledError:
+            self.finished_signal.emit(None)
+        except Exception as e:
+            logger.warning(f"Folder rescan failed: {e}", exc_info=True)
+            self.finished_signal.emit(None)
+
+
+class FolderWatcher(QObject):
+    # Keeps a scanned folder's file list in step with the disk. Folders are
+    # watched with QFileSystemWatcher and only the folders it reports are
+    # relisted; when native watching is unavailable (too many folders,
+    # watch limits reached) or disabled, the whole tree is polled instead.
+    # Either way the result is a diff, never a rebuilt list.
+
+    # (added ScannedFiles, removed relpaths, modified ScannedFiles)
+    changes_signal = pyqtSignal(object, object, object)
+    # [(path, size)] of new or changed files that stopped changing.
+    settled_signal = pyqtSignal(object)
+    output_signal = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._snapshot = None
+        self._watcher = None
+        self._worker = None
+        self._stale_workers = []
+        self._dirty = set()
+        self._full_rescan = False
+        self.polling = False
+        self.settle_seconds = None
+        # path -> (size, mtime, monotonic time of the last change)
+        self._unsettled = {}
+        self._debounce_timer = QTimer(self)
+        self._debounce_timer.setSingleShot(True)
+        self._debounce_timer.setInterval(DEBOUNCE_MS)
+        self._debounce_timer.timeout.connect(self._run_rescan)
+        self._poll_timer = QTimer(self)
+        self._poll_timer.timeout.connect(self._poll)
+        self._settle_timer = QTimer(self)
+        self._settle_timer.setInterval(SETTLE_CHECK_MS)
+        self._settle_timer.timeout.connect(self._check_settled)
+
+    def start(self, table, recursive=False, include=None, exclude=None,
+              extension=None, poll_seconds=5.0, force_polling=False,
+              settle_seconds=None):
+        # Starts watching table.root with the same filters the table was
+        # scanned with. With settle_seconds, files that appear or change
+        # afterwards are reported once they have been unchanged that long.
+        self.stop()
+        self._snapshot = TreeSnapshot(
+            table.root, recursive, include, exclude, extension
+        )
+        self.polling = force_polling
+        self._poll_timer.setInterval(max(1, int(poll_seconds * 1000)))
+        self.settle_seconds = settle_seconds
+        if settle_seconds is not None:
+            self._settle_timer.start()
+        # Seeds the snapshot from the table and catches up on anything that
+        # changed since the scan, which also discovers every folder to watch.
+        self._start_worker(None, table)
+
+    def set_settle_seconds(self, settle_seconds):
+        self.settle_seconds = settle_seconds
+        if settle_seconds is None:
+            self._settle_timer.stop()
+            self._unsettled.clear()
+        elif self._snapshot is not None:
+            self._settle_timer.start()
+
+    def stop(self):
+        self._debounce_timer.stop()
+        self._poll_timer.stop()
+        self._settle_timer.stop()
+        if self._watcher is not None:
+            self._watcher.deleteLater()
+            self._watcher = None
+        if self._worker is not None:
+            self._worker.cancel()
+            self._stale_workers.append(self._worker)
+            self._worker = None
+        self._snapshot = None
+        self._dirty.clear()
+        self._full_rescan = False
+        self._unsettled.clear()
+
+    def wait(self, timeout_ms=5000):
+        for worker in self._stale_workers + [self._worker]:
+            if worker is not None and worker.isRunning():
+                worker.cancel()
+                worker.wait(timeout_ms)
+        self._stale_workers.clear()
+
+    def _start_worker(self, prefixes, table=None):
+        self._worker = _RescanWorker(self._snapshot, prefixes, table)
+        self._worker.finished_signal.connect(self._handle_rescan_finished)
+        self._worker.start()
+
+    def _on_directory_changed(self, path):
+        if self._snapshot is None:
+            return
+        self._dirty.add(self._snapshot.prefix_for(path))
+        self._debounce_timer.start()
+
+    def _poll(self):
+        self._full_rescan = True
+        self._run_rescan()
+
+    def _run_rescan(self):
+        # One rescan at a time owns the snapshot; changes reported meanwhile
+        # are picked up when it finishes.
+        if self._snapshot is None or self._worker is not None:
+            return
+        if self._full_rescan:
+            prefixes = None
+        elif self._dirty:
+            prefixes = list(self._dirty)
+        else:
+            return
+        self._dirty.clear()
+        self._full_rescan = False
+        self._start_worker(prefixes)
+
+    def _handle_rescan_finished(self, result):
+        if self.sender() is not self._worker:
+            if self.sender() in self._stale_workers:
+                self._stale_workers.remove(self.sender())
+            return
+        self._worker = None
+        if result is None:
+            return
+        added, removed, modified, directories = result
+        self._update_watches(directories)
+        if added or removed or modified:
+            self.changes_signal.emit(added, removed, modified)
+        if self.settle_seconds is not None:
+            now = time.monotonic()
+            for scanned in added + modified:
+                self._unsettled[scanned.path] = (
+                    scanned.size, scanned.mtime, now
+                )
+            for relpath in removed:
+                self._unsettled.pop(
+                    os.path.join(self._snapshot.root, *relpath.split("/")),
+                    None,
+                )
+        if self._dirty or self._full_rescan:
+            self._debounce_timer.start()
+
+    def _update_watches(self, directories):
+        if self.polling:
+            if not self._poll_timer.isActive():
+                self._poll_timer.start()
+            return
+        if len(directories) > MAX_WATCHED_DIRS:
+            self._fall_back_to_polling(
+                f"{len(directories)} folders is more than can be watched"
+            )
+            return
+        if self._watcher is None:
+            self._watcher = QFileSystemWatcher(self)
+            self._watcher.directoryChanged.connect(self._on_directory_changed)
+        wanted = set(directories)
+        watched = set(self._watcher.directories())
+        if watched - wanted:
+            self._watcher.removePaths(list(watched - wanted))
+        if wanted - watched:
+            failed = self._watcher.addPaths(list(wanted - watched))
+            if failed:
+                self._fall_back_to_polling(
+                    f"could not watch {len(failed)} folder(s)"
+                )
+
+    def _fall_back_to_polling(self, reason):
+        self.polling = True
+        if self._watcher is not None:
+            self._watcher.deleteLater()
+            self._watcher = None
+        self._poll_timer.start()
+        self.output_signal.emit(
+            f"ℹ️ Watching by polling every "
+            f"{self._poll_timer.interval() / 1000:g}s ({reason})."
+        )
+
+    def _check_settled(self):
+        # Native notifications don't report writes to a file's contents, so
+        # candidates are stat'ed until their size and mtime hold still.
+        if not self._unsettled:
+            return
+        now = time.monotonic()
+        settled = []
+        for path, (size, mtime, since) in list(self._unsettled.items()):
+            if now - since < self.settle_seconds:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                del self._unsettled[path]
+                continue
+            if (stat.st_size, stat.st_mtime) != (size, mtime):
+                self._unsettled[path] = (stat.st_size, stat.st_mtime, now)
+                continue
+            del self._unsettled[path]
+            settled.append((path, size))
+        if settled:
+            self.settled_signal.emit(settled)
@@ -0,0 +1,163 @@
+import logging
+import os
+import sqlite3
+import threading
+from hash_utils import file_hashes, hash_files_parallel
+
+logger = logging.getLogger(__name__)
+cache_path = os.path.expanduser("~/.huggingface_uploader_hashes.sqlite")
+
+
+class HashCache:
+    # On-disk index of file hashes. An entry is only trusted while the
+    # file's size, mtime and inode are unchanged, so unchanged multi-GB files
+    # are never re-read.
+    def __init__(self, path=cache_path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pruned = False
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS file_hashes ("
+                "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, "
+                "inode INTEGER, sha256 TEXT, git_sha1 TEXT)"
+            )
+
+    @staticmethod
+    def _key(path):
+        return os.path.abspath(path)
+
+    def lookup(self, path, stat_result=None):
+        stat_result = stat_result or os.stat(path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, inode, sha256, git_sha1 "
+                "FROM file_hashes WHERE path = ?",
+                (self._key(path),),
+            ).fetchone()
+        if row is None:
+            return None
+        size, mtime_ns, inode, sha256, git_sha1 = row
+        if (size, mtime_ns, inode) != (
+            stat_result.st_size,
+            stat_result.st_mtime_ns,
+            stat_result.st_ino,
+        ):
+            return None
+        return {"sha256": sha256, "git_sha1": git_sha1}
+
+    def store(self, path, stat_result, hashes):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO file_hashes "
+                "(path, size, mtime_ns, inode, sha256, git_sha1) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    self._key(path),
+                    stat_result.st_size,
+                    stat_result.st_mtime_ns,
+                    stat_result.st_ino,
+                    hashes["sha256"],
+                    hashes["git_sha1"],
+                ),
+            )
+
+    def get_hashes(self, path, cancel_event=None):
+        stat_result = os.stat(path)
+        hashes = self.lookup(path, stat_result)
+        if hashes is not None:
+            return hashes
+        hashes = file_hashes(path, stat_result.st_size, cancel_event)
+        if hashes is None:
+            return None
+        # Only cache if the file didn't change while it was being read.
+        if os.stat(path).st_mtime_ns == stat_result.st_mtime_ns:
+            self.store(path, stat_result, hashes)
+        return hashes
+
+    def get_many(self, paths, cancel_event=None, max_workers=None,
+                 on_result=None):
+        # Cached files are answered from the index; the rest are hashed in
+        # parallel across processes. Returns {path: hashes}, leaving out
+        # files that are missing or weren't reached before cancelling.
+        results = {}
+        stats = {}
+        for path in paths:
+            try:
+                stat_result = os.stat(path)
+            except OSError:
+                continue
+            hashes = self.lookup(path, stat_result)
+            if hashes is not None:
+                results[path] = hashes
+                if on_result:
+                    on_result(path, hashes)
+            else:
+                stats[path] = stat_result
+        if not stats:
+            return results
+
+        def store_result(path, hashes):
+            try:
+                if os.stat(path).st_mtime_ns == stats[path].st_mtime_ns:
+                    self.store(path, stats[path], hashes)
+            except OSError:
+                pass
+            if on_result:
+                on_result(path, hashes)
+
+        results.update(hash_files_parallel(
+            list(stats), max_workers, cancel_event, store_result
+        ))
+        return results
+
+    def prune(self):
+        # Drops entries for files that were deleted or changed since they
+        # were hashed.
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, size, mtime_ns, inode FROM file_hashes"
+            ).fetchall()
+        stale = []
+        for path, size, mtime_ns, inode in rows:
+            try:
+                stat_result = os.stat(path)
+            except OSError:
+                stale.append((path,))
+                continue
+            if (size, mtime_ns, inode) != (
+                stat_result.st_size,
+                stat_result.st_mtime_ns,
+                stat_result.st_ino,
+            ):
+                stale.append((path,))
+        if stale:
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "DELETE FROM file_hashes WHERE path = ?", stale
+                )
+            logger.info(f"Evicted {len(stale)} stale hash cache entries.")
+        self._pruned = True
+        return len(stale)
+
+    def prune_once(self):
+        if not self._pruned:
+            self.prune()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_hash_cache = None
+_hash_cache_lock = threading.Lock()
+
+
+def get_hash_cache():
+    global _hash_cache
+    with _hash_cache_lock:
+        if _hash_cache is None:
+            _hash_cache = HashCache()
+        return _hash_cache
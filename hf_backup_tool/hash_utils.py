@@ -0,0 +1,145 @@
+import hashlib
+import logging
+import mmap
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+READ_SIZE = 8 * 1024 * 1024
+# Seconds between cancellation checks while waiting on the process pool.
+CANCEL_POLL_SECONDS = 0.2
+
+# Per pool process: set by the parent when the batch is cancelled.
+_stop_event = None
+
+
+def file_hashes(path, size=None, cancel_event=None):
+    # One read pass gives both identifiers the Hub uses: the SHA-256 of the
+    # content (LFS files) and the git blob SHA-1 (regular files).
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        if size is None:
+            f.seek(0, 2)
+            size = f.tell()
+            f.seek(0)
+        git_sha1 = hashlib.sha1(f"blob {size}\0".encode("utf-8"))
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            block = f.read(READ_SIZE)
+            if not block:
+                break
+            sha256.update(block)
+            git_sha1.update(block)
+    return {"sha256": sha256.hexdigest(), "git_sha1": git_sha1.hexdigest()}
+
+
+def mmap_file_hashes(path, cancel_event=None):
+    # Same result as file_hashes, but feeds hashlib slices of a read-only
+    # mapping, so no per-block buffer is allocated or copied. None if
+    # cancel_event is set before the last block.
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        sha256 = hashlib.sha256()
+        git_sha1 = hashlib.sha1(f"blob {size}\0".encode("utf-8"))
+        if size == 0:
+            return {
+                "sha256": sha256.hexdigest(),
+                "git_sha1": git_sha1.hexdigest(),
+            }
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                for offset in range(0, size, READ_SIZE):
+                    if cancel_event is not None and cancel_event.is_set():
+                        return None
+                    block = view[offset:offset + READ_SIZE]
+                    sha256.update(block)
+                    git_sha1.update(block)
+                    block.release()
+            finally:
+                view.release()
+    return {"sha256": sha256.hexdigest(), "git_sha1": git_sha1.hexdigest()}
+
+
+def _init_worker(stop_event):
+    global _stop_event
+    _stop_event = stop_event
+
+
+def _hash_in_worker(path):
+    return path, mmap_file_hashes(path, _stop_event)
+
+
+def hash_files_parallel(paths, max_workers=None, cancel_event=None,
+                        on_result=None):
+    # Hashes many files at once in a process pool (one file per process at
+    # a time). Returns {path: hashes}; files that can't be read are left
+    # out. Cancelling drops files that haven't started yet and stops the
+    # ones being hashed at their next block.
+    paths = list(dict.fromkeys(paths))
+    if not paths:
+        return {}
+    max_workers = max_workers or os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(paths)))
+    results = {}
+    if max_workers == 1:
+        for path in paths:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            try:
+                results[path] = file_hashes(path, cancel_event=cancel_event)
+            except OSError as e:
+                logger.warning(f"Could not hash {path}: {e}")
+                continue
+            if results[path] is None:
+                del results[path]
+                break
+            if on_result:
+                on_result(path, results[path])
+        return results
+
+    # Spawned rather than forked: the GUI process has Qt and transfer
+    # threads running, which a fork would copy in an undefined state.
+    context = multiprocessing.get_context("spawn")
+    # A threading.Event can't reach the pool processes; this one can.
+    stop_event = context.Event()
+    pool = ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(stop_event,),
+    )
+    try:
+        pending = {pool.submit(_hash_in_worker, path) for path in paths}
+        while pending:
+            done, pending = wait(
+                pending, CANCEL_POLL_SECONDS, return_when=FIRST_COMPLETED
+            )
+            if cancel_event is not None and cancel_event.is_set():
+                stop_event.set()
+                break
+            for future in done:
+                try:
+                    path, hashes = future.result()
+                except OSError as e:
+                    logger.warning(f"Could not hash file: {e}")
+                    continue
+                results[path] = hashes
+                if on_result:
+                    on_result(path, hashes)
+    except BrokenProcessPool:
+        # e.g. a frozen build without multiprocessing support.
+        logger.warning("Hashing process pool failed; hashing in-process.")
+        remaining = [path for path in paths if path not in results]
+        pool.shutdown(wait=False, cancel_futures=True)
+        results.update(hash_files_parallel(
+            remaining, 1, cancel_event, on_result
+        ))
+        return results
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+    return results
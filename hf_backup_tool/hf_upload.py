@@ -1,7 +1,6 @@
+import csv
 import logging
 import os
-import glob
-import traceback
 
 from PyQt6.QtWidgets import (
     QWidget,
@@ -16,21 +15,59 @@ from PyQt6.QtWidgets import (
     QTextEdit,
     QCheckBox,
     QComboBox,
-    QListWidget,
+    QListView,
     QProgressBar,
     QScrollArea,
     QSizePolicy,
 )
-from PyQt6.QtCore import QTimer
-
-from hf_backup_tool.upload_worker import UploadWorker
-from hf_backup_tool.config_manager import (
+from PyQt6.QtCore import QThread, QTimer
+
+from upload_worker import (
+    UploadWorker,
+    CommitWorker,
+    UploadPreflightWorker,
+    FileScanWorker,
+    FileSortWorker,
+    AutoBackupWorker,
+)
+from config_manager import (
     config,
     get_api_token,
     save_config,
     get_max_concurrent_upload_jobs,
+    get_auto_tune_uploads,
+    get_batch_commits,
+    get_operations_per_commit,
+    get_upload_retries,
+    get_upload_retry_backoff,
+    get_skip_unchanged,
+    get_upload_recursive,
+    set_upload_recursive,
+    get_upload_include_patterns,
+    set_upload_include_patterns,
+    get_upload_exclude_patterns,
+    set_upload_exclude_patterns,
+    get_watch_directory,
+    set_watch_directory,
+    get_watch_polling,
+    get_watch_poll_seconds,
+    get_auto_queue_new_files,
+    set_auto_queue_new_files,
+    get_settle_seconds,
+    get_auto_backup_commit_seconds,
+    get_auto_backup_upload_existing,
+)
+from concurrency_controller import ConcurrencyController
+from file_scanner import parse_patterns
+from upload_scheduler import UploadScheduler
+from file_list_model import FileListModel
+from folder_watcher import FolderWatcher
+from config_dialog import ConfigDialog
+from transfer_progress import (
+    ThroughputMeter,
+    format_bytes,
+    format_eta,
 )
-from hf_backup_tool.config_dialog import ConfigDialog
 
 logger = logging.getLogger(__name__)
 
@@ -43,19 +80,61 @@ class HuggingFaceUploader(QWidget):
         self.config_dialog = None
 
         self.active_workers = []
-        self.upload_queue = []
+        # Cancelled workers still unwinding; kept referenced until their
+        # thread exits but no longer counted against the job limit.
+        self.cancelling_workers = []
+        # Pending files, biggest first with small ones packed around them.
+        self.upload_queue = UploadScheduler()
         # Maps worker object to file path for context
         self.worker_file_map = {}
         self.total_files_to_upload = 0
         self.files_processed_count = 0
         self.files_succeeded_count = 0
+        # Byte-level progress rolled up across all concurrent workers.
+        self.file_sizes = {}
+        self.worker_bytes = {}
+        self.total_bytes_to_upload = 0
+        self.bytes_uploaded_total = 0
+        self.throughput_meter = ThroughputMeter()
         self.max_concurrent_jobs = 1
+        # Picks how many of max_concurrent_jobs run at once from measured
+        # throughput and failures.
+        self.concurrency = ConcurrencyController(1)
         self.repo_id_for_upload = ""
         self.repo_type_for_upload = ""
         self.repo_folder_for_upload = ""
         self.commit_msg_for_upload = ""
         self.create_pr_for_upload = False
         self.api_token_for_upload = ""
+        self.upload_retries = 0
+        self.retry_backoff_for_upload = 2.0
+        # Files that still failed after their retries: path -> (size,
+        # base_dir, error). Kept across uploads until retried or cleared.
+        self.failed_uploads = {}
+        # Batched commit mode: workers only pre-upload, then a single
+        # CommitWorker commits the collected (path, operation) pairs.
+        self.batch_commits_for_upload = False
+        self.operations_per_commit = 0
+        self.pending_operations = []
+        self.commit_worker = None
+        # Paths handed to the commit worker that no commit has landed yet,
+        # in commit order.
+        self.uncommitted_files = []
+        self.preflight_worker = None
+        # Directory listing, sorting and filtering run off the UI thread;
+        # the list shows paths relative to scanned_directory.
+        self.scan_worker = None
+        self.sort_worker = None
+        self.scanned_directory = self.current_directory
+        # Filters of the last scan, reused to watch the folder.
+        self.scan_settings = None
+        self.folder_watcher = FolderWatcher(self)
+        # Finished files found while an upload can't take more work (e.g.
+        # during pre-flight or the commit); uploaded once it ends.
+        self.auto_queue_pending = []
+        self.auto_backup_worker = None
+        self.base_dir_for_upload = None
+        self.files_skipped_count = 0
         self._is_upload_active = False  # Flag to manage upload state
         self._cancel_requested = False
 
@@ -162,7 +241,36 @@ class HuggingFaceUploader(QWidget):
         file_type_layout.addWidget(self.file_type_dropdown)
         file_type_layout.addWidget(self.sort_by_label)
         file_type_layout.addWidget(self.sort_by_dropdown)
+        self.recursive_checkbox = QCheckBox(
+            "Include subfolders (keeps folder structure in the repo)"
+        )
+        self.recursive_checkbox.setChecked(get_upload_recursive())
+        file_type_layout.addWidget(self.recursive_checkbox)
         main_layout.addLayout(file_type_layout)
+        pattern_layout = QHBoxLayout()
+        self.include_label = QLabel("Include:")
+        self.include_input = QLineEdit(get_upload_include_patterns())
+        self.include_input.setPlaceholderText("e.g. *.safetensors, configs/*")
+        self.exclude_label = QLabel("Exclude:")
+        self.exclude_input = QLineEdit(get_upload_exclude_patterns())
+        self.exclude_input.setPlaceholderText("e.g. .git, __pycache__, *.tmp")
+        pattern_layout.addWidget(self.include_label)
+        pattern_layout.addWidget(self.include_input, 1)
+        pattern_layout.addWidget(self.exclude_label)
+        pattern_layout.addWidget(self.exclude_input, 1)
+        main_layout.addLayout(pattern_layout)
+        watch_layout = QHBoxLayout()
+        self.watch_checkbox = QCheckBox("Watch folder and update the list")
+        self.watch_checkbox.setChecked(get_watch_directory())
+        self.auto_queue_checkbox = QCheckBox(
+            "Auto-upload new files once they stop changing"
+        )
+        self.auto_queue_checkbox.setChecked(get_auto_queue_new_files())
+        self.auto_queue_checkbox.setEnabled(self.watch_checkbox.isChecked())
+        watch_layout.addWidget(self.watch_checkbox)
+        watch_layout.addWidget(self.auto_queue_checkbox)
+        watch_layout.addStretch()
+        main_layout.addLayout(watch_layout)
 
         header_commit = QLabel("Commit Message")
         header_commit.setStyleSheet("font-weight: bold; font-size: 14px;")
@@ -192,10 +300,18 @@ class HuggingFaceUploader(QWidget):
         self.create_repo_checkbox.setEnabled(False)
         self.clear_after_checkbox = QCheckBox("Clear output after upload")
         self.clear_after_checkbox.setChecked(True)
+        self.batch_commit_checkbox = QCheckBox("Batch files into one commit")
+        self.batch_commit_checkbox.setChecked(get_batch_commits())
+        self.skip_unchanged_checkbox = QCheckBox(
+            "Skip files unchanged on the Hub"
+        )
+        self.skip_unchanged_checkbox.setChecked(get_skip_unchanged())
         options_layout.addWidget(self.create_pr_checkbox)
         options_layout.addWidget(self.check_repo_exists_checkbox)
         options_layout.addWidget(self.create_repo_checkbox)
         options_layout.addWidget(self.clear_after_checkbox)
+        options_layout.addWidget(self.batch_commit_checkbox)
+        options_layout.addWidget(self.skip_unchanged_checkbox)
         main_layout.addLayout(options_layout)
 
         header_files_list = QLabel(
@@ -203,12 +319,31 @@ class HuggingFaceUploader(QWidget):
         )
         header_files_list.setStyleSheet("font-weight: bold; font-size: 14px;")
         main_layout.addWidget(header_files_list)
-        self.file_list = QListWidget()
+        list_tools_layout = QHBoxLayout()
+        self.list_filter_input = QLineEdit()
+        self.list_filter_input.setPlaceholderText("Filter list...")
+        self.list_count_label = QLabel("")
+        self.select_all_button = QPushButton("Select All")
+        list_tools_layout.addWidget(self.list_filter_input, 1)
+        list_tools_layout.addWidget(self.list_count_label)
+        list_tools_layout.addWidget(self.select_all_button)
+        main_layout.addLayout(list_tools_layout)
+        self.file_list_model = FileListModel(self)
+        self.file_list = QListView()
+        self.file_list.setModel(self.file_list_model)
+        # Uniform rows let the view skip measuring every item; only the
+        # visible rows are ever laid out and painted.
+        self.file_list.setUniformItemSizes(True)
+        self.file_list.setLayoutMode(QListView.LayoutMode.Batched)
         self.file_list.setSelectionMode(
-            QListWidget.SelectionMode.ExtendedSelection
+            QListView.SelectionMode.ExtendedSelection
         )
         self.file_list.setMinimumHeight(150)
         main_layout.addWidget(self.file_list, 1)
+        # Filtering waits for a pause in typing.
+        self.list_filter_timer = QTimer(self)
+        self.list_filter_timer.setSingleShot(True)
+        self.list_filter_timer.setInterval(250)
 
         header_output = QLabel("Output & Progress")
         header_output.setStyleSheet("font-weight: bold; font-size: 14px;")
@@ -224,9 +359,20 @@ class HuggingFaceUploader(QWidget):
         progress_status_layout.addWidget(self.progress_label)
         progress_status_layout.addStretch()
         progress_status_layout.addWidget(self.progress_percent_label)
+        failed_layout = QHBoxLayout()
+        self.failed_label = QLabel("")
+        self.retry_failed_button = QPushButton("Retry Failed Files")
+        self.export_failed_button = QPushButton("Export Failed List...")
+        self.clear_failed_button = QPushButton("Clear Failed List")
+        failed_layout.addWidget(self.failed_label)
+        failed_layout.addStretch()
+        failed_layout.addWidget(self.retry_failed_button)
+        failed_layout.addWidget(self.export_failed_button)
+        failed_layout.addWidget(self.clear_failed_button)
         output_layout.addWidget(self.output_text)
         output_layout.addWidget(self.progress_bar)
         output_layout.addLayout(progress_status_layout)
+        output_layout.addLayout(failed_layout)
         main_layout.addLayout(output_layout)
 
         button_layout = QHBoxLayout()
@@ -235,9 +381,15 @@ class HuggingFaceUploader(QWidget):
         self.cancel_button = QPushButton("Cancel Upload")
         self.cancel_button.setEnabled(False)
         self.clear_output_button = QPushButton("Clear Output Log")
+        self.auto_backup_button = QPushButton("Start Auto-Backup")
+        self.auto_backup_button.setToolTip(
+            "Watch the directory and upload files once they stop changing, "
+            "batched into commits."
+        )
         button_layout.addWidget(self.update_files_button)
         button_layout.addWidget(self.upload_button)
         button_layout.addWidget(self.cancel_button)
+        button_layout.addWidget(self.auto_backup_button)
         button_layout.addWidget(self.clear_output_button)
         main_layout.addLayout(button_layout)
 
@@ -263,14 +415,31 @@ class HuggingFaceUploader(QWidget):
             self.update_directory_from_input
         )
         self.update_files_button.clicked.connect(self.update_files)
-        self.upload_button.clicked.connect(self.start_upload)
+        self.upload_button.clicked.connect(lambda: self.start_upload())
         self.cancel_button.clicked.connect(self.cancel_upload)
         self.clear_output_button.clicked.connect(self.clear_output)
+        self.auto_backup_button.clicked.connect(self.toggle_auto_backup)
+        self.retry_failed_button.clicked.connect(self.retry_failed_uploads)
+        self.export_failed_button.clicked.connect(self.export_failed_uploads)
+        self.clear_failed_button.clicked.connect(self.clear_failed_uploads)
         self.check_repo_exists_checkbox.stateChanged.connect(
             self.toggle_create_repo_checkbox
         )
         self.file_type_dropdown.currentIndexChanged.connect(self.update_files)
-        self.sort_by_dropdown.currentIndexChanged.connect(self.update_files)
+        self.sort_by_dropdown.currentIndexChanged.connect(self.resort_files)
+        self.list_filter_input.textChanged.connect(
+            self.list_filter_timer.start
+        )
+        self.list_filter_timer.timeout.connect(self.resort_files)
+        self.select_all_button.clicked.connect(self.select_all_files)
+        self.watch_checkbox.toggled.connect(self._toggle_watch)
+        self.auto_queue_checkbox.toggled.connect(self._toggle_auto_queue)
+        self.folder_watcher.output_signal.connect(self._handle_worker_output)
+        self.folder_watcher.changes_signal.connect(self._handle_folder_changes)
+        self.folder_watcher.settled_signal.connect(self._handle_settled_files)
+        self.recursive_checkbox.toggled.connect(self._save_scan_settings)
+        self.include_input.editingFinished.connect(self._save_scan_settings)
+        self.exclude_input.editingFinished.connect(self._save_scan_settings)
         self.org_input.editingFinished.connect(
             self.save_repo_details_to_config
         )
@@ -278,6 +447,7 @@ class HuggingFaceUploader(QWidget):
             self.save_repo_details_to_config
         )
 
+        self._update_failed_uploads_ui()
         self.update_files()
 
     def save_repo_details_to_config(self):
@@ -331,98 +501,299 @@ class HuggingFaceUploader(QWidget):
         if state == 0:
             self.create_repo_checkbox.setChecked(False)
 
-    def update_files(self):
-        self.file_list.clear()
+    def _save_scan_settings(self, *_):
+        try:
+            set_upload_recursive(self.recursive_checkbox.isChecked())
+            set_upload_include_patterns(self.include_input.text().strip())
+            set_upload_exclude_patterns(self.exclude_input.text().strip())
+        except Exception as e:
+            logger.warning(f"Could not save file filter settings: {e}")
+        self.update_files()
+
+    def _cancel_scan(self):
+        if self.scan_worker and self.scan_worker.isRunning():
+            self.scan_worker.cancel()
+            self.cancelling_workers.append(self.scan_worker)
+        self.scan_worker = None
+
+    def _current_scan_settings(self):
         file_extension_data = self.file_type_dropdown.currentData()
-        search_pattern = (
-            f"*.{file_extension_data}" if file_extension_data != "*" else "*"
-        )
+        return {
+            "recursive": self.recursive_checkbox.isChecked(),
+            "include": parse_patterns(self.include_input.text()),
+            "exclude": parse_patterns(self.exclude_input.text()),
+            "extension": (
+                file_extension_data if file_extension_data != "*" else None
+            ),
+        }
 
+    def update_files(self):
+        self.folder_watcher.stop()
+        self._cancel_scan()
+        self._cancel_sort()
+        self.file_list_model.clear()
+        self.list_count_label.setText("")
         if not os.path.isdir(self.current_directory):
             self.output_text.append(
                 f"❌ Current directory is invalid: {self.current_directory}"
             )
             return
-        try:
-            all_files_in_dir = glob.glob(
-                os.path.join(self.current_directory, search_pattern)
-            )
-
-            filtered_files = []
-            for file_path in all_files_in_dir:
-                if os.path.islink(file_path):
-                    self.output_text.append(
-                        f"ℹ️ Skipping symlink: {os.path.basename(file_path)}"
-                    )
-                    continue
-                if not os.path.isfile(file_path):
-                    continue
-                filtered_files.append(file_path)
+        self.scanned_directory = self.current_directory
+        self.scan_settings = self._current_scan_settings()
+        self.scan_worker = FileScanWorker(
+            self.current_directory,
+            **self.scan_settings,
+            sort_by=self.sort_by_dropdown.currentText(),
+            text_filter=self.list_filter_input.text().strip(),
+        )
+        self.scan_worker.output_signal.connect(self._handle_worker_output)
+        self.scan_worker.finished_signal.connect(self._handle_scan_finished)
+        self.update_files_button.setEnabled(False)
+        self.scan_worker.start()
+
+    def _handle_scan_finished(self, result):
+        if self.sender() is not self.scan_worker:
+            if self.sender() in self.cancelling_workers:
+                self.cancelling_workers.remove(self.sender())
+            return
+        worker = self.scan_worker
+        self.scan_worker = None
+        self.update_files_button.setEnabled(True)
+        if result is None:
+            return
+        table, order = result
+        self.file_list_model.set_files(
+            table, order, worker.sort_by, worker.text_filter
+        )
+        self._update_list_count()
+        self.output_text.append(
+            f"✨ Found {len(table)} files ({format_bytes(table.total_size())}) "
+            f"in {self.scanned_directory}"
+        )
+        # Sort order or filter changed while the scan was running.
+        if (
+            worker.sort_by != self.sort_by_dropdown.currentText()
+            or worker.text_filter != self.list_filter_input.text().strip()
+        ):
+            self.resort_files()
+        if self.watch_checkbox.isChecked():
+            self._start_watching()
 
-            sort_key = (
-                os.path.getmtime
-                if self.sort_by_dropdown.currentText() == "date"
-                else lambda x: os.path.basename(x).lower()
-            )
-            reverse_sort = self.sort_by_dropdown.currentText() == "date"
+    def _start_watching(self):
+        table = self.file_list_model.table()
+        if table is None or self.scan_settings is None:
+            return
+        self.folder_watcher.start(
+            table,
+            **self.scan_settings,
+            poll_seconds=get_watch_poll_seconds(),
+            force_polling=get_watch_polling(),
+            settle_seconds=(
+                get_settle_seconds()
+                if self.auto_queue_checkbox.isChecked() else None
+            ),
+        )
 
-            sorted_files = sorted(
-                filtered_files, key=sort_key, reverse=reverse_sort
-            )
+    def _toggle_watch(self, checked):
+        try:
+            set_watch_directory(checked)
+        except Exception as e:
+            logger.warning(f"Could not save watch setting: {e}")
+        self.auto_queue_checkbox.setEnabled(checked)
+        if checked:
+            if self.scan_worker is None:
+                self._start_watching()
+        else:
+            self.folder_watcher.stop()
+
+    def _toggle_auto_queue(self, checked):
+        if checked:
+            # Checked once here, so the watcher never has to ask.
+            problem = self._auto_queue_problem()
+            if problem:
+                QMessageBox.warning(
+                    self,
+                    "Auto-Upload Unavailable",
+                    f"{problem} Finished files can't be uploaded "
+                    "automatically.",
+                )
+                self.auto_queue_checkbox.setChecked(False)
+                return
+        try:
+            set_auto_queue_new_files(checked)
+        except Exception as e:
+            logger.warning(f"Could not save auto-upload setting: {e}")
+        self.folder_watcher.set_settle_seconds(
+            get_settle_seconds() if checked else None
+        )
 
-            base_names = [os.path.basename(f) for f in sorted_files]
-            self.file_list.addItems(base_names)
+    def _handle_folder_changes(self, added, removed, modified):
+        table = self.file_list_model.table()
+        if table is None:
+            return
+        rows = table.apply_changes(added, removed, modified)
+        self.file_list_model.apply_changes(*rows)
+        if self.sort_worker is not None:
+            # Its order predates these changes.
+            self.resort_files()
+        self._update_list_count()
+        if added or removed:
             self.output_text.append(
-                f"✨ Found {len(sorted_files)} files matching "
-                f"'{search_pattern}' in {self.current_directory}"
+                f"🔄 Folder changed: {len(added)} new, {len(removed)} "
+                "removed file(s)."
             )
-        except Exception as e:
-            logger.error(f"File listing error: {e}\n{traceback.format_exc()}")
-            self.output_text.append(f"❌ Error listing files: {str(e)}")
 
-    def start_upload(self):
-        if self._is_upload_active:
-            QMessageBox.warning(
-                self,
-                "Upload In Progress",
-                "An upload operation is already in progress.",
+    def _handle_settled_files(self, files):
+        if not self.auto_queue_checkbox.isChecked():
+            return
+        queued = set(self.upload_queue)
+        queued.update(self.worker_file_map.values())
+        queued.update(path for path, _ in self.auto_queue_pending)
+        files = [(path, size) for path, size in files if path not in queued]
+        if not files:
+            return
+        self.output_text.append(
+            f"📥 Auto-queued {len(files)} finished file(s): "
+            + ", ".join(
+                os.path.relpath(path, self.scanned_directory)
+                for path, _ in files
             )
+        )
+        if not self._is_upload_active:
+            self._start_auto_upload(files)
+        elif (
+            self.preflight_worker is None
+            and self.commit_worker is None
+            and not self._cancel_requested
+            and self.base_dir_for_upload == self.scanned_directory
+        ):
+            self._enqueue_files(files)
+        else:
+            self.auto_queue_pending.extend(files)
+
+    def _auto_queue_problem(self):
+        # Why finished files can't be uploaded unattended, or None.
+        if (
+            not self.org_input.text().strip()
+            or not self.repo_input.text().strip()
+        ):
+            return "Owner and Repository Name are not filled in."
+        if not get_api_token():
+            return "API token is not configured."
+        return None
+
+    def _start_auto_upload(self, files):
+        # Uploads started by the watcher never open dialogs: a problem is
+        # logged and turns auto-queue off until the user turns it back on.
+        problem = self._auto_queue_problem()
+        if problem is None and self.start_upload(files, interactive=False):
+            return
+        reason = problem or "the upload could not start (see above)."
+        self.output_text.append(f"❌ Auto-upload turned off: {reason}")
+        self.auto_queue_checkbox.setChecked(False)
+
+    def _cancel_sort(self):
+        if self.sort_worker and self.sort_worker.isRunning():
+            self.cancelling_workers.append(self.sort_worker)
+        self.sort_worker = None
+
+    def resort_files(self, *_):
+        table = self.file_list_model.table()
+        if table is None or self.scan_worker is not None:
+            # A running scan picks the new order up when it finishes.
+            return
+        self._cancel_sort()
+        self.sort_worker = FileSortWorker(
+            table,
+            sort_by=self.sort_by_dropdown.currentText(),
+            text_filter=self.list_filter_input.text().strip(),
+        )
+        self.sort_worker.finished_signal.connect(self._handle_sort_finished)
+        self.sort_worker.start()
+
+    def _handle_sort_finished(self, order):
+        if self.sender() is not self.sort_worker:
+            if self.sender() in self.cancelling_workers:
+                self.cancelling_workers.remove(self.sender())
             return
+        worker = self.sort_worker
+        self.sort_worker = None
+        self.file_list_model.set_order(
+            order, worker.sort_by, worker.text_filter
+        )
+        self._update_list_count()
+
+    def _update_list_count(self):
+        table = self.file_list_model.table()
+        total = table.count() if table is not None else 0
+        shown = self.file_list_model.row_total()
+        self.list_count_label.setText(
+            f"{shown} files" if shown == total
+            else f"Showing {shown} of {total} files"
+        )
+
+    def select_all_files(self):
+        # Rows are loaded lazily; selecting all means every row, not only
+        # the ones scrolled into view so far.
+        self.file_list_model.fetch_all()
+        self.file_list.selectAll()
+
+    def start_upload(self, files=None, base_dir=None, interactive=True):
+        # files: [(path, size)] to upload instead of the list selection;
+        # base_dir: folder their repo paths are relative to (default: the
+        # scanned directory). Without interactive, problems are only
+        # logged, never shown in a dialog. True if the upload started.
+        if self._is_upload_active:
+            if interactive:
+                QMessageBox.warning(
+                    self,
+                    "Upload In Progress",
+                    "An upload operation is already in progress.",
+                )
+            return False
 
         org_name = self.org_input.text().strip()
         repo_name = self.repo_input.text().strip()
 
         if not org_name or not repo_name:
-            QMessageBox.warning(
-                self,
-                "Missing Info",
-                "Please fill in both Owner (User/Org) and Repository Name.",
-            )
+            if interactive:
+                QMessageBox.warning(
+                    self,
+                    "Missing Info",
+                    "Please fill in both Owner (User/Org) and Repository "
+                    "Name.",
+                )
             self.output_text.append(
                 "❗ Owner and Repository Name are required."
             )
-            return
+            return False
 
         self.repo_id_for_upload = f"{org_name}/{repo_name}"
 
-        selected_list_items = self.file_list.selectedItems()
-        if not selected_list_items:
-            QMessageBox.warning(
-                self,
-                "No Files Selected",
-                "Please select files from the list to upload.",
+        if files is None:
+            rows = sorted(
+                index.row()
+                for index in self.file_list.selectionModel().selectedRows()
             )
+            files = []
+            for row in rows:
+                path, _, size = self.file_list_model.file_at(row)
+                files.append((path, size))
+        if not files:
+            if interactive:
+                QMessageBox.warning(
+                    self,
+                    "No Files Selected",
+                    "Please select files from the list to upload.",
+                )
             self.output_text.append("📝 Nothing selected for upload.")
-            return
+            return False
 
-        selected_file_basenames = [item.text() for item in selected_list_items]
-        self.upload_queue = [
-            os.path.join(self.current_directory, basename)
-            for basename in selected_file_basenames
-        ]
-        self.total_files_to_upload = len(self.upload_queue)
-        self.files_processed_count = 0
-        self.files_succeeded_count = 0
+        self.base_dir_for_upload = base_dir or self.scanned_directory
+        self._set_upload_queue(
+            [path for path, _ in files], dict(files)
+        )
+        self.files_skipped_count = 0
         self._is_upload_active = True
         self._cancel_requested = False
 
@@ -430,17 +801,33 @@ class HuggingFaceUploader(QWidget):
         self.repo_folder_for_upload = self.repo_folder_input.text().strip("/")
         self.commit_msg_for_upload = self.commit_message_input.toPlainText()
         self.create_pr_for_upload = self.create_pr_checkbox.isChecked()
+        self.batch_commits_for_upload = self.batch_commit_checkbox.isChecked()
+        self.pending_operations = []
+        self.commit_worker = None
+        try:
+            self.operations_per_commit = max(0, get_operations_per_commit())
+        except ValueError:
+            self.operations_per_commit = 0
+        try:
+            self.upload_retries = max(0, get_upload_retries())
+            self.retry_backoff_for_upload = max(
+                0.0, get_upload_retry_backoff()
+            )
+        except ValueError:
+            self.upload_retries = 0
+            self.retry_backoff_for_upload = 2.0
 
         self.api_token_for_upload = get_api_token()
         if not self.api_token_for_upload:
             self.output_text.append(
                 "❌ API token not configured. Please set it via Edit Config."
             )
-            QMessageBox.critical(
-                self, "API Token Missing", "API token is not configured."
-            )
+            if interactive:
+                QMessageBox.critical(
+                    self, "API Token Missing", "API token is not configured."
+                )
             self._is_upload_active = False
-            return
+            return False
 
         try:
             self.max_concurrent_jobs = int(get_max_concurrent_upload_jobs())
@@ -452,6 +839,9 @@ class HuggingFaceUploader(QWidget):
                 "⚠️ Invalid max concurrent upload jobs in config, "
                 "defaulting to 1."
             )
+        self.concurrency = ConcurrencyController(
+            self.max_concurrent_jobs, enabled=get_auto_tune_uploads()
+        )
 
         if self.check_repo_exists_checkbox.isChecked():
             exists = self.repo_exists_on_hub(
@@ -471,18 +861,19 @@ class HuggingFaceUploader(QWidget):
                             f"{self.repo_id_for_upload}."
                         )
                         self.output_text.append("Aborting upload.")
-                        QMessageBox.critical(
-                            self,
-                            "Repo Creation Failed",
-                            (
+                        if interactive:
+                            QMessageBox.critical(
+                                self,
+                                "Repo Creation Failed",
                                 (
-                                    f"Could not create repository "
-                                    f"{self.repo_id_for_upload}."
-                                )
-                            ),
-                        )
+                                    (
+                                        f"Could not create repository "
+                                        f"{self.repo_id_for_upload}."
+                                    )
+                                ),
+                            )
                         self._is_upload_active = False
-                        return
+                        return False
                     self.output_text.append(
                         (
                             (
@@ -501,29 +892,217 @@ class HuggingFaceUploader(QWidget):
                     self.output_text.append(
                         "Creation is not enabled. Aborting."
                     )
-                    QMessageBox.warning(
-                        self,
-                        "Repo Not Found",
-                        (
-                            "Repository "
-                            f"{self.repo_id_for_upload} does not exist and "
-                            "'Create Repo' is not checked."
+                    if interactive:
+                        QMessageBox.warning(
+                            self,
+                            "Repo Not Found",
+                            (
+                                "Repository "
+                                f"{self.repo_id_for_upload} does not exist "
+                                "and 'Create Repo' is not checked."
+                            )
                         )
-                    )
                     self._is_upload_active = False
-                    return
+                    return False
 
         self.upload_button.setEnabled(False)
         self.cancel_button.setEnabled(True)
         self.progress_bar.setValue(0)
         self.progress_percent_label.setText("0%")
+
+        if self.skip_unchanged_checkbox.isChecked():
+            self._start_preflight()
+        else:
+            self._begin_transfers()
+        return True
+
+    def _set_upload_queue(self, file_paths, sizes=None):
+        # sizes: already-known sizes (e.g. from the directory scan).
+        self.file_sizes = {}
+        for file_path in file_paths:
+            if sizes and file_path in sizes:
+                self.file_sizes[file_path] = sizes[file_path]
+                continue
+            try:
+                self.file_sizes[file_path] = os.path.getsize(file_path)
+            except OSError:
+                self.file_sizes[file_path] = 0
+        self.upload_queue = UploadScheduler(self.file_sizes.items())
+        self.total_files_to_upload = len(self.upload_queue)
+        self.total_bytes_to_upload = sum(self.file_sizes.values())
+        self.bytes_uploaded_total = 0
+        self.worker_bytes = {}
+        self.throughput_meter.reset()
+        self.files_processed_count = 0
+        self.files_succeeded_count = 0
+
+    def toggle_auto_backup(self):
+        if self.auto_backup_worker is not None:
+            self.auto_backup_worker.cancel()
+            self.auto_backup_button.setEnabled(False)
+            self.output_text.append(
+                "🔄 Stopping auto-backup after committing uploaded files..."
+            )
+            return
+        org_name = self.org_input.text().strip()
+        repo_name = self.repo_input.text().strip()
+        if not org_name or not repo_name:
+            QMessageBox.warning(
+                self,
+                "Missing Info",
+                "Please fill in both Owner (User/Org) and Repository Name.",
+            )
+            return
+        if not os.path.isdir(self.current_directory):
+            self.output_text.append(
+                f"❌ Current directory is invalid: {self.current_directory}"
+            )
+            return
+        api_token = get_api_token()
+        if not api_token:
+            QMessageBox.critical(
+                self, "API Token Missing", "API token is not configured."
+            )
+            return
+        try:
+            max_workers = max(1, int(get_max_concurrent_upload_jobs()))
+        except ValueError:
+            max_workers = 1
+        try:
+            files_per_commit = max(0, get_operations_per_commit())
+        except ValueError:
+            files_per_commit = 0
+        self.auto_backup_worker = AutoBackupWorker(
+            api_token,
+            f"{org_name}/{repo_name}",
+            self.current_directory,
+            repo_type=self.repo_type_dropdown.currentText(),
+            repo_folder=self.repo_folder_input.text().strip("/") or None,
+            **self._current_scan_settings(),
+            settle_seconds=get_settle_seconds(),
+            poll_seconds=get_watch_poll_seconds(),
+            max_workers=max_workers,
+            files_per_commit=files_per_commit,
+            commit_interval=get_auto_backup_commit_seconds(),
+            commit_message=self.commit_message_input.toPlainText(),
+            create_pr=self.create_pr_checkbox.isChecked(),
+            upload_existing=get_auto_backup_upload_existing(),
+        )
+        self.auto_backup_worker.output_signal.connect(
+            self._handle_worker_output
+        )
+        self.auto_backup_worker.status_signal.connect(
+            self._handle_auto_backup_status
+        )
+        self.auto_backup_worker.finished_signal.connect(
+            self._handle_auto_backup_finished
+        )
+        self.auto_backup_button.setText("Stop Auto-Backup")
+        self.auto_backup_worker.start()
+
+    def _handle_auto_backup_status(self, status):
+        if self.sender() is not self.auto_backup_worker:
+            return
+        if self._is_upload_active:
+            # The manual upload owns the status line.
+            return
+        self.progress_label.setText(
+            f"Status: Auto-backup — {status['settling']} settling, "
+            f"{status['ready']} ready, {status['uploading']} uploading, "
+            f"{status['staged']} awaiting commit, "
+            f"{status['committed']} backed up "
+            f"({format_bytes(status['bytes_committed'])})"
+            + (f", {status['failed']} failed" if status["failed"] else "")
+        )
+
+    def _handle_auto_backup_finished(self, success):
+        if self.sender() is not self.auto_backup_worker:
+            return
+        self.auto_backup_worker = None
+        self.auto_backup_button.setText("Start Auto-Backup")
+        self.auto_backup_button.setEnabled(True)
+
+    def _enqueue_files(self, files):
+        # Adds [(path, size)] to an upload that is transferring files.
+        for path, size in files:
+            self.upload_queue.push(path, size)
+            self.file_sizes[path] = size
+        self.total_files_to_upload += len(files)
+        self.total_bytes_to_upload += sum(size for _, size in files)
+        self._update_overall_progress()
+        self._launch_next_workers()
+
+    def _start_preflight(self):
+        self.progress_label.setText("Status: Comparing files with the Hub...")
+        self.output_text.append(
+            f"🔍 Checking {self.total_files_to_upload} file(s) against "
+            f"{self.repo_id_for_upload} for unchanged content..."
+        )
+        self.preflight_worker = UploadPreflightWorker(
+            api_token=self.api_token_for_upload,
+            repo_id=self.repo_id_for_upload,
+            file_paths=list(self.upload_queue),
+            repo_type=self.repo_type_for_upload,
+            repo_folder=self.repo_folder_for_upload,
+            base_dir=self.base_dir_for_upload,
+        )
+        self.preflight_worker.output_signal.connect(self._handle_worker_output)
+        self.preflight_worker.finished_signal.connect(
+            self._handle_preflight_finished
+        )
+        self.preflight_worker.start()
+
+    def _handle_preflight_finished(self, result):
+        if self.sender() is not self.preflight_worker:
+            if self.sender() in self.cancelling_workers:
+                self.cancelling_workers.remove(self.sender())
+            return
+        self.preflight_worker = None
+        if self._cancel_requested:
+            return
+        if result is None:
+            self.output_text.append(
+                "⚠️ Pre-flight check failed; uploading all selected files."
+            )
+            self._begin_transfers()
+            return
+
+        to_upload, skipped = result
+        self.files_skipped_count = len(skipped)
+        for local_path, _ in skipped:
+            # Already on the Hub, e.g. a retry after the commit went through.
+            self.failed_uploads.pop(local_path, None)
+        if skipped:
+            self._update_failed_uploads_ui()
+        if skipped:
+            bytes_saved = sum(size for _, size in skipped)
+            self.output_text.append(
+                f"⏭️ Skipped {len(skipped)} unchanged file(s), "
+                f"saving {format_bytes(bytes_saved)} of upload:"
+            )
+            for local_path, _ in skipped:
+                self.output_text.append(
+                    "   • " + os.path.relpath(
+                        local_path, self.base_dir_for_upload
+                    )
+                )
+        self._set_upload_queue(to_upload, self.file_sizes)
+        if not self.upload_queue:
+            self._finalize_upload_process()
+            return
+        self._begin_transfers()
+
+    def _begin_transfers(self):
         self.progress_label.setText("Status: Starting uploads...")
         self.output_text.append(
             "🚀 Starting parallel upload of "
             + f"{self.total_files_to_upload} files to "
             + f"{self.repo_id_for_upload} "
-            + f"(max {self.max_concurrent_jobs} jobs)..."
+            + f"(max {self.max_concurrent_jobs} jobs"
+            + (", tuned automatically" if self.concurrency.enabled else "")
+            + ")..."
         )
+        self.concurrency.reset()
 
         self._launch_next_workers()
 
@@ -531,11 +1110,11 @@ class HuggingFaceUploader(QWidget):
         if self._cancel_requested:
             return
 
-        while (
-            len(self.active_workers) < self.max_concurrent_jobs
-            and self.upload_queue
-        ):
-            file_to_upload = self.upload_queue.pop(0)
+        while self.upload_queue:
+            limit = self.concurrency.limit(len(self.active_workers))
+            if len(self.active_workers) >= limit:
+                break
+            file_to_upload = self.upload_queue.pop(limit)
 
             worker = UploadWorker(
                 api_token=self.api_token_for_upload,
@@ -545,11 +1124,22 @@ class HuggingFaceUploader(QWidget):
                 commit_message=self.commit_msg_for_upload,
                 repo_type=self.repo_type_for_upload,
                 repo_folder=self.repo_folder_for_upload,
-                upload_type="File",
+                upload_type=(
+                    "Preupload" if self.batch_commits_for_upload else "File"
+                ),
                 create_repo=False,
                 repo_exists=True,
+                create_pr=self.create_pr_for_upload,
+                base_dir=self.base_dir_for_upload,
+                retries=self.upload_retries,
+                retry_backoff=self.retry_backoff_for_upload,
             )
             worker.output_signal.connect(self._handle_worker_output)
+            worker.progress_signal.connect(
+                lambda sent, worker_instance=worker: (
+                    self._handle_worker_progress(worker_instance, sent)
+                )
+            )
             worker.finished_signal.connect(
                 lambda success, worker_instance=worker, fp=file_to_upload: (
                     self._handle_worker_finished(
@@ -570,14 +1160,140 @@ class HuggingFaceUploader(QWidget):
             and not self.upload_queue
             and self._is_upload_active
         ):
+            self._finish_queue()
+
+    def _finish_queue(self):
+        if (
+            self.batch_commits_for_upload
+            and self.pending_operations
+            and not self._cancel_requested
+        ):
+            self._start_commit_phase()
+        else:
             self._finalize_upload_process()
 
+    def _start_commit_phase(self):
+        staged = self.pending_operations
+        self.pending_operations = []
+        operations = [operation for _, operation in staged]
+        # A fresh list each time: a cancelled commit still in flight keeps
+        # trimming its own list from committed_signal.
+        files = [file_path for file_path, _ in staged]
+        self.uncommitted_files = files
+        self.progress_label.setText(
+            f"Status: Committing {len(operations)} file(s)..."
+        )
+        self.output_text.append(
+            f"📝 Creating commit(s) for {len(operations)} staged file(s) "
+            f"on {self.repo_id_for_upload}..."
+        )
+        self.commit_worker = CommitWorker(
+            api_token=self.api_token_for_upload,
+            repo_id=self.repo_id_for_upload,
+            operations=operations,
+            commit_message=self.commit_msg_for_upload,
+            repo_type=self.repo_type_for_upload,
+            operations_per_commit=self.operations_per_commit,
+            create_pr=self.create_pr_for_upload,
+        )
+        self.commit_worker.output_signal.connect(self._handle_worker_output)
+        self.commit_worker.committed_signal.connect(
+            lambda count, files=files: (
+                self._handle_operations_committed(files, count)
+            )
+        )
+        self.commit_worker.finished_signal.connect(
+            self._handle_commit_finished
+        )
+        self.commit_worker.start()
+
+    def _handle_operations_committed(self, files, count):
+        # Commits land in order, so the first `count` files are in the repo.
+        for file_path in files[:count]:
+            self.failed_uploads.pop(file_path, None)
+        del files[:count]
+        self._update_failed_uploads_ui()
+        self.files_succeeded_count += count
+
+    def _handle_commit_finished(self, success):
+        if self.sender() is not self.commit_worker:
+            if self.sender() in self.cancelling_workers:
+                self.cancelling_workers.remove(self.sender())
+            return
+        self.commit_worker = None
+        if not success:
+            self.output_text.append(
+                f"❌ Commit failed; {len(self.uncommitted_files)} staged "
+                "file(s) were not added to the repo."
+            )
+            self._add_uncommitted_to_failed(
+                self.uncommitted_files,
+                self.sender().error or "Commit failed.",
+            )
+        self.uncommitted_files = []
+        self._finalize_upload_process()
+
+    def _add_uncommitted_to_failed(self, files, error):
+        # Pre-uploaded files whose commit never landed; retrying uploads
+        # them again (blobs already on the Hub are not resent).
+        for file_path in files:
+            self.failed_uploads[file_path] = (
+                self.file_sizes.get(file_path, 0),
+                self.base_dir_for_upload,
+                error,
+            )
+        self._update_failed_uploads_ui()
+
     def _handle_worker_output(self, message):
         self.output_text.append(message)
 
+    def _set_worker_bytes(self, worker, sent):
+        previous = self.worker_bytes.get(worker, 0)
+        if sent <= previous:
+            return
+        self.worker_bytes[worker] = sent
+        self.bytes_uploaded_total += sent - previous
+        self.concurrency.add_bytes(sent - previous)
+        self.throughput_meter.update(self.bytes_uploaded_total)
+
+    def _handle_worker_progress(self, worker, sent):
+        if worker not in self.active_workers:
+            return
+        self._set_worker_bytes(worker, sent)
+        self._update_overall_progress()
+        # The limit may have been raised while a few big files run.
+        if self.upload_queue and not self._cancel_requested:
+            self._launch_next_workers()
+
     def _handle_worker_finished(self, worker, file_path, success):
+        if worker not in self.active_workers:
+            # A cancelled worker that has now stopped.
+            if worker in self.cancelling_workers:
+                self.cancelling_workers.remove(worker)
+            return
         self.files_processed_count += 1
+        self.concurrency.task_finished(success)
+        self.upload_queue.finished(file_path)
         if success:
+            # Finished files count in full: LFS blobs already on the Hub
+            # and small inline files never report byte progress.
+            self._set_worker_bytes(worker, self.file_sizes.get(file_path, 0))
+        self.worker_bytes.pop(worker, None)
+        if not success:
+            self.failed_uploads[file_path] = (
+                self.file_sizes.get(file_path, 0),
+                self.base_dir_for_upload,
+                worker.error or "Upload failed.",
+            )
+            self._update_failed_uploads_ui()
+        elif self.batch_commits_for_upload:
+            # Counted as succeeded, and taken off the failed list, once
+            # the commit lands.
+            if worker.operation is not None:
+                self.pending_operations.append((file_path, worker.operation))
+        else:
+            self.failed_uploads.pop(file_path, None)
+            self._update_failed_uploads_ui()
             self.files_succeeded_count += 1
 
         if worker in self.active_workers:
@@ -595,10 +1311,28 @@ class HuggingFaceUploader(QWidget):
         if self.upload_queue or self.active_workers:
             self._launch_next_workers()
         else:  # No more files in queue and no active workers
-            self._finalize_upload_process()
+            self._finish_queue()
 
     def _update_overall_progress(self):
-        if self.total_files_to_upload > 0:
+        if self.total_bytes_to_upload > 0:
+            progress_percent = int(
+                (self.bytes_uploaded_total / self.total_bytes_to_upload) * 100
+            )
+            rate = self.throughput_meter.rate()
+            eta = self.throughput_meter.eta(
+                self.total_bytes_to_upload - self.bytes_uploaded_total
+            )
+            self.progress_bar.setValue(progress_percent)
+            self.progress_percent_label.setText(f"{progress_percent}%")
+            self.progress_label.setText(
+                f"Status: {format_bytes(self.bytes_uploaded_total)}/"
+                f"{format_bytes(self.total_bytes_to_upload)} "
+                f"({rate / (1024 * 1024):.2f} MB/s, ETA {format_eta(eta)}). "
+                f"Processed {self.files_processed_count}/"
+                f"{self.total_files_to_upload}. "
+                f"Active: {len(self.active_workers)}"
+            )
+        elif self.total_files_to_upload > 0:
             progress_percent = int(
                 (self.files_processed_count / self.total_files_to_upload) * 100
             )
@@ -646,10 +1380,24 @@ class HuggingFaceUploader(QWidget):
                 )
             )
             self.output_text.append(final_message)
+        elif self.files_skipped_count > 0:
+            final_message = (
+                f"✅ All {self.files_skipped_count} selected files are "
+                f"already up to date on {self.repo_id_for_upload}."
+            )
+            self.progress_bar.setValue(100)
+            self.progress_percent_label.setText("100%")
+            self.output_text.append(final_message)
         else:  # No files were selected or processed
             final_message = "No files processed."
             self.output_text.append(final_message)
 
+        if self.failed_uploads and not self._cancel_requested:
+            self.output_text.append(
+                f"❗ {len(self.failed_uploads)} file(s) failed after their "
+                "retries; use Retry Failed Files or Export Failed List."
+            )
+
         self.progress_label.setText(f"Status: {final_message}")
         logger.info(
             f"Upload task to {self.repo_id_for_upload} finished. Succeeded: "
@@ -660,10 +1408,73 @@ class HuggingFaceUploader(QWidget):
         if (
             self.clear_after_checkbox.isChecked()
             and self.files_succeeded_count == self.total_files_to_upload
+            and self.total_files_to_upload > 0
             and not self._cancel_requested
         ):
             QTimer.singleShot(2000, self.clear_output)
 
+        pending = self.auto_queue_pending
+        self.auto_queue_pending = []
+        if pending and not self._cancel_requested:
+            QTimer.singleShot(0, lambda: self._start_auto_upload(pending))
+
+    def _update_failed_uploads_ui(self):
+        count = len(self.failed_uploads)
+        self.failed_label.setText(
+            f"❗ {count} file(s) failed to upload." if count else ""
+        )
+        for button in (
+            self.retry_failed_button,
+            self.export_failed_button,
+            self.clear_failed_button,
+        ):
+            button.setEnabled(bool(count))
+
+    def retry_failed_uploads(self):
+        if not self.failed_uploads:
+            return
+        # One upload has one base folder; files failed from another folder
+        # stay listed for the next retry.
+        base_dir = next(iter(self.failed_uploads.values()))[1]
+        files = [
+            (path, size)
+            for path, (size, failed_base_dir, _) in self.failed_uploads.items()
+            if failed_base_dir == base_dir
+        ]
+        self.start_upload(files, base_dir=base_dir)
+
+    def export_failed_uploads(self):
+        if not self.failed_uploads:
+            return
+        path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Export Failed Uploads",
+            os.path.join(self.scanned_directory, "failed_uploads.csv"),
+            "CSV Files (*.csv);;All Files (*)",
+        )
+        if not path:
+            return
+        try:
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(["path", "size", "base_dir", "error"])
+                for file_path, (size, base_dir, error) in (
+                    self.failed_uploads.items()
+                ):
+                    writer.writerow([file_path, size, base_dir, error])
+        except OSError as e:
+            QMessageBox.critical(
+                self, "Export Failed", f"Could not write {path}: {e}"
+            )
+            return
+        self.output_text.append(
+            f"💾 Exported {len(self.failed_uploads)} failed file(s) to {path}."
+        )
+
+    def clear_failed_uploads(self):
+        self.failed_uploads.clear()
+        self._update_failed_uploads_ui()
+
     def cancel_upload(self):
         if not self._is_upload_active:
             self.output_text.append("ℹ️ No active upload to cancel.")
@@ -672,21 +1483,44 @@ class HuggingFaceUploader(QWidget):
         self.output_text.append("🔄 Requesting cancellation of uploads...")
         self._cancel_requested = True
 
-        # Terminate active QThreads.
-        # UploadWorker does not have a graceful stop.
+        # Workers stop at their next read from disk, which aborts the
+        # request body being streamed. Their slots are released right away.
         for worker in list(self.active_workers):  # Iterate over a copy
             if worker.isRunning():
-                worker.terminate()  # Forcible stop
-                # worker.wait()
-                # Optionally wait,
-                # but terminate is usually immediate
+                worker.cancel()
+                self.cancelling_workers.append(worker)
                 msg = "🛑 Worker for " + os.path.basename(
                     self.worker_file_map.get(worker, "unknown file")
-                ) + " termination signal sent."
+                ) + " cancellation requested."
                 self.output_text.append(msg)
+            self.worker_file_map.pop(worker, None)
+        self.worker_bytes.clear()
+
+        if self.commit_worker and self.commit_worker.isRunning():
+            self.commit_worker.cancel()
+            self.cancelling_workers.append(self.commit_worker)
+            self.output_text.append(
+                "🛑 No further commits will be created. A commit already "
+                "in flight will still complete."
+            )
+        self.commit_worker = None
+        # Staged files not committed yet; a commit still in flight takes
+        # its files back off the list when it lands.
+        self._add_uncommitted_to_failed(
+            self.uncommitted_files
+            + [file_path for file_path, _ in self.pending_operations],
+            "Upload cancelled before the commit.",
+        )
+        self.uncommitted_files = []
+
+        if self.preflight_worker and self.preflight_worker.isRunning():
+            self.preflight_worker.cancel()
+            self.cancelling_workers.append(self.preflight_worker)
+        self.preflight_worker = None
 
         self.active_workers.clear()
         self.upload_queue.clear()
+        self.pending_operations = []
 
         # If no workers were active or they terminated quickly, finalize.
         # Otherwise, _handle_worker_finished will eventually call
@@ -700,6 +1534,21 @@ class HuggingFaceUploader(QWidget):
             False
         )  # Disable cancel button once pressed
 
+    def _wait_for_cancelled_workers(self, timeout_ms=5000):
+        # On exit a QThread must not be destroyed while running; give the
+        # cancelled workers a bounded time to stop before forcing them.
+        for worker in list(self.cancelling_workers):
+            if worker.isRunning() and not worker.wait(timeout_ms):
+                if not isinstance(worker, QThread):
+                    # Jobs on the transfer core can't be killed; whatever
+                    # is left is abandoned when the core shuts down.
+                    logger.warning("Upload did not stop in time.")
+                    continue
+                logger.warning("Upload worker did not stop; terminating.")
+                worker.terminate()
+                worker.wait()
+        self.cancelling_workers.clear()
+
     def clear_output(self):
         self.output_text.clear()
         self.progress_bar.setValue(0)
@@ -781,6 +1630,16 @@ class HuggingFaceUploader(QWidget):
             logger.error(f"Error creating repo {repo_id}: {e}", exc_info=True)
             return False
 
+    def _stop_auto_backup(self, timeout_ms=30000):
+        # Gives the daemon time to commit what it already uploaded.
+        worker = self.auto_backup_worker
+        if worker is not None and worker.isRunning():
+            worker.cancel()
+            if not worker.wait(timeout_ms):
+                logger.warning("Auto-backup did not stop in time; terminating.")
+                worker.terminate()
+                worker.wait()
+
     def closeEvent(self, event):
         if self._is_upload_active:
             reply = QMessageBox.question(
@@ -792,11 +1651,21 @@ class HuggingFaceUploader(QWidget):
                 QMessageBox.StandardButton.No,
             )
             if reply == QMessageBox.StandardButton.Yes:
+                self._stop_auto_backup()
+                self.folder_watcher.stop()
+                self.folder_watcher.wait()
                 self.cancel_upload()
+                self._wait_for_cancelled_workers()
                 QTimer.singleShot(500, event.accept)
             else:
                 event.ignore()
         else:
+            self._stop_auto_backup()
+            self.folder_watcher.stop()
+            self.folder_watcher.wait()
+            self._cancel_scan()
+            self._cancel_sort()
+            self._wait_for_cancelled_workers()
             if self.config_dialog:
                 self.config_dialog.close()
             event.accept()
@@ -1,5 +1,4 @@
 import os
-import time
 import logging
 from PyQt6.QtCore import QThread, pyqtSignal
 from huggingface_hub import upload_file
@@ -14,7 +13,7 @@ class HFUploaderThread(QThread):
     signal_output = pyqtSignal(str, str)
     signal_finished = pyqtSignal(str, bool, str)
 
-    def __init__(self, repo_id, selected_files, repo_type, repo_folder, current_directory, commit_msg, create_pr, rate_limit_delay, task_id=None):
+    def __init__(self, repo_id, selected_files, repo_type, repo_folder, current_directory, commit_msg, create_pr, task_id=None):
         super().__init__()
         self.task_id = task_id
         self.repo_id = repo_id
@@ -24,7 +23,6 @@ class HFUploaderThread(QThread):
         self.current_directory = current_directory
         self.commit_msg = commit_msg
         self.create_pr = create_pr
-        self.rate_limit_delay = rate_limit_delay
         self._is_running = True
 
     def run(self):
@@ -83,10 +81,8 @@ class HFUploaderThread(QThread):
                     overall_success = False
                 progress = int(((i + 1) / total_files) * 100)
                 self.signal_progress.emit(self.task_id, progress)
-                if self.rate_limit_delay > 0 and (i + 1) < total_files:
-                    if not self._is_running:
-                        break
-                    time.sleep(self.rate_limit_delay)
+                # No pause between files: requests are paced by the shared
+                # rate limiter, which only slows down when the Hub throttles.
             if not self._is_running:
                 self.signal_status.emit(self.task_id, "Upload cancelled.")
                 final_message = "Upload task cancelled by user."
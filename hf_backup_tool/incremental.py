@@ -0,0 +1,207 @@
+import json
+import logging
+import os
+import time
+import zipfile
+from custom_exceptions import TransferCancelledError
+from hash_utils import hash_files_parallel
+from zip_engine import collect_entries, open_member, write_zip
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_SUFFIX = ".manifest.json"
+MANIFEST_VERSION = 1
+COPY_SIZE = 1024 * 1024
+
+
+def manifest_path_for(archive_path):
+    # The base archive "backup.zip" keeps its chain in
+    # "backup.manifest.json", next to it.
+    root, _ = os.path.splitext(archive_path)
+    return root + MANIFEST_SUFFIX
+
+
+def delta_path_for(archive_path, index):
+    root, ext = os.path.splitext(archive_path)
+    return f"{root}.delta-{index:04d}{ext or '.zip'}"
+
+
+def load_manifest(path):
+    # {"version", "archives": [{"name", "created", "files", "deleted"}],
+    #  "files": {relpath: {"size", "mtime_ns", "sha256"}}}, or None if
+    # there is no previous run.
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as manifest_file:
+        manifest = json.load(manifest_file)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(
+            f"Unsupported manifest version in {path}: {manifest.get('version')}"
+        )
+    return manifest
+
+
+def save_manifest(path, manifest):
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, indent=1, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def plan_incremental(entries, manifest, hash_cache=None, cancel_event=None,
+                     max_workers=None):
+    # Returns (changed, deleted, unchanged, stats). Size and mtime are
+    # trusted as-is; a file whose mtime moved but size didn't is hashed and
+    # only counts as changed if its content did.
+    previous = manifest["files"] if manifest else {}
+    changed = []
+    unchanged = {}
+    stats = {}
+    touched = []
+    for entry in entries:
+        path, arcname, size = entry
+        try:
+            stats[arcname] = os.stat(path)
+        except OSError as e:
+            logger.warning(f"Skipping unreadable file {path}: {e}")
+            continue
+        old = previous.get(arcname)
+        if old is None or old["size"] != size:
+            changed.append(entry)
+        elif old["mtime_ns"] == stats[arcname].st_mtime_ns:
+            unchanged[arcname] = old
+        else:
+            touched.append(entry)
+    if touched:
+        paths = [path for path, _, _ in touched]
+        if hash_cache is not None:
+            hashed = hash_cache.get_many(paths, cancel_event, max_workers)
+        else:
+            hashed = hash_files_parallel(paths, max_workers, cancel_event)
+        if cancel_event is not None and cancel_event.is_set():
+            raise TransferCancelledError("Zipping was cancelled by user.")
+        for entry in touched:
+            path, arcname, size = entry
+            hashes = hashed.get(path)
+            if hashes and hashes["sha256"] == previous[arcname]["sha256"]:
+                unchanged[arcname] = dict(
+                    previous[arcname], mtime_ns=stats[arcname].st_mtime_ns
+                )
+            else:
+                changed.append(entry)
+    listed = {arcname for _, arcname, _ in entries}
+    deleted = sorted(set(previous) - listed)
+    return changed, deleted, unchanged, stats
+
+
+def write_incremental(folder_path, archive_path, options=None,
+                      cancel_event=None, progress_callback=None,
+                      hash_cache=None, max_workers=None, on_planned=None):
+    # First run: writes archive_path and its manifest. Later runs: writes
+    # the next delta archive with new and changed files only, and records
+    # the deletions in the manifest. Returns (path or None, changed,
+    # deleted); None means nothing changed since the last run.
+    manifest_path = manifest_path_for(archive_path)
+    manifest = load_manifest(manifest_path)
+    entries = collect_entries(folder_path)
+    changed, deleted, files, stats = plan_incremental(
+        entries, manifest, hash_cache, cancel_event, max_workers
+    )
+    if on_planned:
+        on_planned(changed, deleted)
+    if manifest is not None and not changed and not deleted:
+        return None, 0, 0
+    if manifest is None:
+        manifest = {"version": MANIFEST_VERSION, "archives": [], "files": {}}
+        target = archive_path
+    else:
+        target = delta_path_for(archive_path, len(manifest["archives"]))
+
+    def on_entry_done(path, arcname, size, sha256):
+        files[arcname] = {
+            "size": size,
+            "mtime_ns": stats[arcname].st_mtime_ns,
+            "sha256": sha256,
+        }
+
+    write_zip(
+        changed,
+        target,
+        options,
+        cancel_event=cancel_event,
+        progress_callback=progress_callback,
+        on_entry_done=on_entry_done,
+    )
+    manifest["archives"].append({
+        "name": os.path.basename(target),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "files": len(changed),
+        "deleted": deleted,
+    })
+    manifest["files"] = files
+    save_manifest(manifest_path, manifest)
+    return target, len(changed), len(deleted)
+
+
+def _safe_target(target_dir, arcname):
+    # Refuses names that would land outside target_dir.
+    path = os.path.normpath(os.path.join(target_dir, *arcname.split("/")))
+    root = os.path.normpath(target_dir)
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"Refusing to restore outside the target: {arcname}")
+    return path
+
+
+def restore(manifest_path, target_dir, cancel_event=None,
+            progress_callback=None, on_archive=None):
+    # Replays the base archive and then every delta in order: each
+    # archive's deletions are applied, then its files are extracted over
+    # the previous state. Files end up with their recorded mtimes.
+    manifest = load_manifest(manifest_path)
+    if manifest is None:
+        raise FileNotFoundError(f"No manifest at {manifest_path}")
+    archive_dir = os.path.dirname(manifest_path)
+    os.makedirs(target_dir, exist_ok=True)
+    for index, archive in enumerate(manifest["archives"]):
+        if on_archive:
+            on_archive(index, len(manifest["archives"]), archive["name"])
+        for arcname in archive["deleted"]:
+            path = _safe_target(target_dir, arcname)
+            if os.path.isfile(path):
+                os.remove(path)
+        with zipfile.ZipFile(os.path.join(archive_dir, archive["name"])) as zf:
+            for member in zf.infolist():
+                if member.is_dir():
+                    continue
+                path = _safe_target(target_dir, member.filename)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open_member(zf, member) as src, open(path, "wb") as dest:
+                    while True:
+                        if cancel_event is not None and cancel_event.is_set():
+                            raise TransferCancelledError(
+                                "Restore was cancelled by user."
+                            )
+                        block = src.read(COPY_SIZE)
+                        if not block:
+                            break
+                        dest.write(block)
+                        if progress_callback:
+                            progress_callback(len(block))
+    for arcname, state in manifest["files"].items():
+        path = _safe_target(target_dir, arcname)
+        try:
+            os.utime(path, ns=(state["mtime_ns"], state["mtime_ns"]))
+        except OSError:
+            pass
+    return len(manifest["files"])
+
+
+def restore_size(manifest_path):
+    # Total bytes a restore extracts, for progress reporting.
+    manifest = load_manifest(manifest_path)
+    archive_dir = os.path.dirname(manifest_path)
+    total = 0
+    for archive in manifest["archives"]:
+        with zipfile.ZipFile(os.path.join(archive_dir, archive["name"])) as zf:
+            total += sum(member.file_size for member in zf.infolist())
+    return total
@@ -1,6 +1,7 @@
 import logging
 import sys
 from PyQt6.QtWidgets import QApplication, QMessageBox
+from api_session import configure_hub
 from custom_exceptions import ConfigError
 from main_window import MainWindow
 from theme_handler import apply_theme, check_qt_material
@@ -20,6 +21,8 @@ def start_application():
         app = QApplication(sys.argv)
     logger.info("QApplication retrieved or created.")
     try:
+        # Every Hub call shares one pooled, proxy-aware HTTP session.
+        configure_hub()
         if check_qt_material():
             apply_theme(app, theme_name="dark_teal.xml")
             logger.info("Stylesheet applied.")
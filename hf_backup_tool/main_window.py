@@ -4,6 +4,7 @@ from download_app import DownloadApp
 from hf_upload import HuggingFaceUploader  # Corrected import
 from zip_app import ZipApp
 from theme_handler import apply_theme, get_available_themes
+from transfer_core import shutdown_transfer_core
 from PyQt6.QtGui import QAction
 from PyQt6.QtWidgets import (
     QApplication,
@@ -113,6 +114,11 @@ class MainWindow(QMainWindow):
                 self.hf_uploader.closeEvent(event)
                 if not event.isAccepted():
                     return
+            if self.download_app:
+                self.download_app.shutdown()
+            if self.zip_app:
+                self.zip_app.shutdown()
+            shutdown_transfer_core()
             event.accept()
         else:
             event.ignore()
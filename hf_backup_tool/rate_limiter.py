@@ -0,0 +1,180 @@
+import collections
+import contextlib
+import contextvars
+import email.utils
+import logging
+import random
+import threading
+import time
+from custom_exceptions import TransferCancelledError
+
+logger = logging.getLogger(__name__)
+
+# Backoff without a Retry-After: BASE * 2**(strikes - 1), capped, jittered.
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+MIN_RATE = 0.2
+# Requests per second added back per successful request after a throttle.
+RAMP_STEP = 0.1
+# Seconds of history used to measure the current request rate.
+RATE_WINDOW = 10.0
+
+# Cancel event of the transfer the current thread (or task) works for;
+# set through cancellable(), read by acquire().
+_cancel_event = contextvars.ContextVar("rate_limit_cancel_event", default=None)
+
+
+@contextlib.contextmanager
+def cancellable(cancel_event):
+    # Requests made inside the block, however deep in huggingface_hub,
+    # stop waiting for the limiter once cancel_event is set. Thread pools
+    # don't carry it over: their tasks need a block of their own.
+    token = _cancel_event.set(cancel_event)
+    try:
+        yield
+    finally:
+        _cancel_event.reset(token)
+
+
+def parse_retry_after(value):
+    # Seconds to wait from a Retry-After header (delta-seconds or HTTP
+    # date), or None.
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class AdaptiveRateLimiter:
+    # Token bucket shared by every request of the process. With no cap
+    # (max_rate 0) requests pass freely until the Hub throttles one; then
+    # everyone pauses for Retry-After (or an exponential, jittered backoff),
+    # the rate is halved from what was being sent, and each success ramps
+    # it back up until the limit is lifted again.
+
+    def __init__(self, max_rate=0):
+        self.max_rate = max_rate or 0
+        # Requests per second allowed now; None means unlimited.
+        self.rate = self.max_rate or None
+        self._tokens = 1.0
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+        self._strikes = 0
+        # Rate being sent when the Hub pushed back; reaching it again (with
+        # no cap configured) lifts the limit.
+        self._release_rate = None
+        self._recent = collections.deque()
+        self._cond = threading.Condition()
+        # Times the Hub pushed back; lets others (e.g. the concurrency
+        # controllers) notice throttling without hooking into requests.
+        self.throttle_count = 0
+
+    def set_max_rate(self, max_rate):
+        with self._cond:
+            self.max_rate = max_rate or 0
+            if self.max_rate:
+                self.rate = min(self.rate or self.max_rate, self.max_rate)
+            elif self._release_rate is None:
+                self.rate = None
+            self._cond.notify_all()
+
+    def _refill(self, now):
+        capacity = max(1.0, self.rate)
+        self._tokens = min(
+            capacity, self._tokens + (now - self._last_refill) * self.rate
+        )
+        self._last_refill = now
+
+    def acquire(self, cancel_event=None):
+        # Blocks until the request may be sent. Raises
+        # TransferCancelledError once cancel_event (by default the one of
+        # the surrounding cancellable() block) is set.
+        if cancel_event is None:
+            cancel_event = _cancel_event.get()
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wait = self._blocked_until - now
+                if wait <= 0:
+                    if self.rate is None:
+                        break
+                    self._refill(now)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        break
+                    wait = (1 - self._tokens) / self.rate
+                if cancel_event is not None and cancel_event.is_set():
+                    raise TransferCancelledError("Request cancelled.")
+                self._cond.wait(min(wait, 0.25))
+            self._recent.append(now)
+            while self._recent and now - self._recent[0] > RATE_WINDOW:
+                self._recent.popleft()
+
+    def observe(self, status_code, retry_after=None):
+        # Feeds back a response's status and Retry-After header. Returns
+        # True when the response means "slow down" rather than "failed":
+        # a 429, or a 503 that says when to come back.
+        delay = parse_retry_after(retry_after)
+        if status_code == 429 or (status_code == 503 and delay is not None):
+            self.throttled(delay)
+            return True
+        if status_code < 500:
+            self.succeeded()
+        return False
+
+    def throttled(self, retry_after=None):
+        with self._cond:
+            now = time.monotonic()
+            self._strikes += 1
+            self.throttle_count += 1
+            if retry_after is None:
+                retry_after = min(
+                    BACKOFF_MAX, BACKOFF_BASE * 2 ** (self._strikes - 1)
+                ) * random.uniform(0.5, 1.0)
+            sending = len(self._recent) / RATE_WINDOW
+            if self._release_rate is None:
+                self._release_rate = max(MIN_RATE, sending)
+            self.rate = max(MIN_RATE, (self.rate or sending) / 2)
+            if self.max_rate:
+                self.rate = min(self.rate, self.max_rate)
+            self._tokens = 0.0
+            self._last_refill = now
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+            logger.warning(
+                f"Hub asked to slow down; pausing requests for "
+                f"{retry_after:.1f}s, then at most {self.rate:.1f}/s."
+            )
+            self._cond.notify_all()
+
+    def succeeded(self):
+        with self._cond:
+            if self.rate is None or time.monotonic() < self._blocked_until:
+                return
+            self._strikes = 0
+            self.rate += RAMP_STEP
+            if self.max_rate:
+                self.rate = min(self.rate, self.max_rate)
+            elif self.rate >= self._release_rate:
+                self.rate = None
+                self._release_rate = None
+                logger.info("Hub request rate back to unlimited.")
+            self._cond.notify_all()
+
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = AdaptiveRateLimiter()
+        return _rate_limiter
@@ -0,0 +1,56 @@
+import logging
+from PyQt6.QtCore import QObject, pyqtSignal
+from transfer_core import get_transfer_core
+
+logger = logging.getLogger(__name__)
+
+
+class TransferBridge(QObject):
+    # Runs the coroutine function `transfer(job)` it is built with on the
+    # shared TransferCore and hands its events and result to the GUI thread
+    # as Qt signals. Offers the same start / isRunning / cancel / wait calls
+    # as the QThread workers, so the queue managers can hold either kind.
+
+    # (kind, payload) from TransferJob.emit, on any thread.
+    event_signal = pyqtSignal(str, object)
+    # (result, exception or None) once the job and its children stopped.
+    done_signal = pyqtSignal(object, object)
+
+    def __init__(self, transfer, parent=None):
+        super().__init__(parent)
+        self._transfer = transfer
+        self.job = None
+        # Queued across threads: the handlers always run in the GUI thread.
+        self.event_signal.connect(self.handle_event)
+        self.done_signal.connect(self.handle_done)
+
+    def handle_event(self, kind, payload):
+        pass
+
+    def handle_done(self, result, error):
+        pass
+
+    def start(self):
+        self.job = get_transfer_core().submit(
+            self._transfer, on_event=self.event_signal.emit
+        )
+        self.job.future.add_done_callback(self._on_job_done)
+
+    def _on_job_done(self, future):
+        try:
+            result, error = future.result(), None
+        except BaseException as e:
+            result, error = None, e
+        self.done_signal.emit(result, error)
+
+    def cancel(self):
+        if self.job is not None:
+            self.job.cancel()
+
+    def isRunning(self):
+        return self.job is not None and not self.job.done()
+
+    def wait(self, timeout_ms=None):
+        if self.job is None:
+            return True
+        return self.job.wait(None if timeout_ms is None else timeout_ms / 1000)
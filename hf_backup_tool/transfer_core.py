@@ -0,0 +1,279 @@
+import asyncio
+import concurrent.futures
+import functools
+import itertools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from api_session import get_session
+from custom_exceptions import TransferCancelledError
+from rate_limiter import cancellable
+
+logger = logging.getLogger(__name__)
+
+# Blocking calls (huggingface_hub, requests, disk) running at once across
+# every job in the process. Jobs themselves are coroutines: hundreds of
+# them can be queued or waiting without holding a thread each.
+MAX_BLOCKING_CALLS = 32
+
+
+class TransferJob:
+    # Handle to one job on the core. The job's coroutine gets it as its
+    # first argument and does its work through run_blocking() and map();
+    # any thread may cancel() it or wait() for it.
+
+    def __init__(self, core, job_id, on_event=None):
+        self.core = core
+        self.id = job_id
+        self.on_event = on_event
+        # Shared with the engines, which check it between blocks, so calls
+        # already running in a thread stop at their next read or write.
+        self.cancel_event = threading.Event()
+        self.future = None
+        self._task = None
+        self._cancel_callbacks = []
+
+    def emit(self, kind, payload=None):
+        # Safe from any thread; on_event runs on the calling thread.
+        if self.on_event is None:
+            return
+        try:
+            self.on_event(kind, payload)
+        except Exception:
+            logger.exception(f"Event handler of transfer job {self.id} failed")
+
+    def add_cancel_callback(self, callback):
+        # For anything cancel_event alone can't interrupt, e.g. a socket
+        # blocked in a read (ChunkedDownloader.cancel closes it).
+        self._cancel_callbacks.append(callback)
+        if self.cancel_event.is_set():
+            callback()
+
+    def cancel(self):
+        if self.cancel_event.is_set():
+            return
+        self.cancel_event.set()
+        for callback in list(self._cancel_callbacks):
+            try:
+                callback()
+            except Exception:
+                logger.debug("Cancel callback failed", exc_info=True)
+        self.core._call_soon(self._cancel_task)
+
+    def _cancel_task(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    def is_cancelled(self):
+        return self.cancel_event.is_set()
+
+    def done(self):
+        return self.future is not None and self.future.done()
+
+    def wait(self, timeout=None):
+        # True once the job has finished, including everything it started.
+        if self.future is None:
+            return True
+        concurrent.futures.wait([self.future], timeout)
+        return self.future.done()
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+    async def run_blocking(self, func, *args, **kwargs):
+        # Runs func(*args, **kwargs) on the core's thread pool. When the job
+        # is cancelled meanwhile, func is told to stop through cancel_event
+        # and awaited before the cancellation goes on, so a cancelled job
+        # leaves nothing running behind it.
+        loop = asyncio.get_running_loop()
+        async with self.core._slots:
+            if self.cancel_event.is_set():
+                raise TransferCancelledError("Transfer cancelled.")
+            future = loop.run_in_executor(
+                self.core.executor,
+                functools.partial(
+                    self._call_cancellable, func, *args, **kwargs
+                ),
+            )
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                self.cancel_event.set()
+                while not future.done():
+                    try:
+                        await asyncio.wait([future])
+                    except asyncio.CancelledError:
+                        pass
+                if not future.cancelled():
+                    # Usually the TransferCancelledError the engine raised.
+                    future.exception()
+                raise
+
+    def _call_cancellable(self, func, *args, **kwargs):
+        # Requests func makes stop waiting on the rate limiter once the
+        # job is cancelled.
+        with cancellable(self.cancel_event):
+            return func(*args, **kwargs)
+
+    async def map(self, func, items, limit=None):
+        # Awaits func(item) for every item as child tasks, at most `limit`
+        # at a time, and returns the results in order. The first failure
+        # cancels the rest and is raised once they have all stopped (what
+        # asyncio.TaskGroup does on Python 3.11+).
+        semaphore = asyncio.Semaphore(limit) if limit else None
+
+        async def run(item):
+            if semaphore is None:
+                return await func(item)
+            async with semaphore:
+                return await func(item)
+
+        tasks = [asyncio.ensure_future(run(item)) for item in items]
+        if not tasks:
+            return []
+        try:
+            done, pending = await asyncio.wait(
+                tasks, return_when=asyncio.FIRST_EXCEPTION
+            )
+        except asyncio.CancelledError:
+            await _cancel_all(tasks)
+            raise
+        if pending:
+            await _cancel_all(pending)
+        for task in tasks:
+            if task in done and not task.cancelled() and task.exception():
+                raise task.exception()
+        return [task.result() for task in tasks]
+
+
+async def _cancel_all(tasks):
+    for task in tasks:
+        task.cancel()
+    # Shielded from a second cancel so the children really have stopped
+    # when this returns.
+    while not all(task.done() for task in tasks):
+        try:
+            await asyncio.wait(tasks)
+        except asyncio.CancelledError:
+            pass
+
+
+class TransferCore:
+    # One asyncio event loop, on a background thread, shared by every
+    # transfer in the process, plus one thread pool for the blocking calls;
+    # HTTP goes through the shared session of api_session. Knows nothing
+    # about Qt: the GUI drives it through TransferBridge, scripts through
+    # submit() and wait().
+
+    def __init__(self, max_blocking_calls=MAX_BLOCKING_CALLS):
+        self.max_blocking_calls = max(1, int(max_blocking_calls))
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_blocking_calls,
+            thread_name_prefix="transfer",
+        )
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._slots = None
+        self._jobs = {}
+        self._ids = itertools.count(1)
+
+    @property
+    def session(self):
+        # The process-wide session, so jobs share warm connections with
+        # every other Hub call.
+        return get_session()
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                ready = threading.Event()
+                self._thread = threading.Thread(
+                    target=self._run_loop,
+                    args=(ready,),
+                    name="transfer-loop",
+                    daemon=True,
+                )
+                self._thread.start()
+                ready.wait()
+            return self._loop
+
+    def _run_loop(self, ready):
+        asyncio.set_event_loop(self._loop)
+        self._slots = asyncio.Semaphore(self.max_blocking_calls)
+        self._loop.call_soon(ready.set)
+        self._loop.run_forever()
+
+    def _call_soon(self, callback):
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(callback)
+
+    def submit(self, coro_func, *args, on_event=None):
+        # Starts coro_func(job, *args) on the loop and returns its job right
+        # away. A cancelled job finishes with TransferCancelledError.
+        loop = self._ensure_loop()
+        job = TransferJob(self, next(self._ids), on_event)
+        with self._lock:
+            self._jobs[job.id] = job
+        job.future = asyncio.run_coroutine_threadsafe(
+            self._run_job(job, coro_func, args), loop
+        )
+        job.future.add_done_callback(lambda _: self._forget(job))
+        return job
+
+    def _forget(self, job):
+        with self._lock:
+            self._jobs.pop(job.id, None)
+
+    async def _run_job(self, job, coro_func, args):
+        job._task = asyncio.current_task()
+        try:
+            if job.cancel_event.is_set():
+                raise TransferCancelledError("Transfer cancelled before start.")
+            return await coro_func(job, *args)
+        except asyncio.CancelledError:
+            raise TransferCancelledError("Transfer cancelled.") from None
+
+    def active_jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def shutdown(self, timeout=5.0):
+        # Cancels every job and gives them up to timeout seconds to stop.
+        jobs = self.active_jobs()
+        for job in jobs:
+            job.cancel()
+        futures = [job.future for job in jobs if job.future is not None]
+        if futures:
+            _, not_done = concurrent.futures.wait(futures, timeout)
+            if not_done:
+                logger.warning(
+                    f"{len(not_done)} transfer(s) did not stop in time."
+                )
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            self._thread.join(timeout)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+_transfer_core = None
+_transfer_core_lock = threading.Lock()
+
+
+def get_transfer_core():
+    global _transfer_core
+    with _transfer_core_lock:
+        if _transfer_core is None:
+            _transfer_core = TransferCore()
+        return _transfer_core
+
+
+def shutdown_transfer_core(timeout=5.0):
+    global _transfer_core
+    with _transfer_core_lock:
+        core, _transfer_core = _transfer_core, None
+    if core is not None:
+        core.shutdown(timeout)
@@ -0,0 +1,179 @@
+import collections
+import io
+import os
+import threading
+import time
+from custom_exceptions import TransferCancelledError
+
+
+def format_bytes(num_bytes):
+    size = float(num_bytes)
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def format_eta(seconds):
+    if seconds is None:
+        return "--:--"
+    seconds = int(seconds)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+class CountingFileReader(io.BufferedIOBase):
+    # Binary file wrapper that reports how many bytes have been read from
+    # it. huggingface_hub reads a file once to hash it before the transfer,
+    # so counting only starts once start_counting() is called. Setting
+    # cancel_event makes the next read raise, which aborts the request body
+    # being streamed from this file.
+    def __init__(self, path, callback=None, cancel_event=None):
+        super().__init__()
+        self.name = path
+        self._file = open(path, "rb")
+        self._callback = callback
+        self._cancel_event = cancel_event
+        self._counting = False
+        self.size = os.fstat(self._file.fileno()).st_size
+        self.bytes_read = 0
+
+    def start_counting(self):
+        self.bytes_read = 0
+        self._counting = True
+
+    def _count(self, num_bytes):
+        if not self._counting or num_bytes <= 0:
+            return
+        # Retried requests re-read the same bytes; never report more than
+        # the file holds.
+        self.bytes_read = min(self.size, self.bytes_read + num_bytes)
+        if self._callback:
+            self._callback(self.bytes_read)
+
+    def _check_cancelled(self):
+        if self._cancel_event is not None and self._cancel_event.is_set():
+            raise TransferCancelledError("Upload was cancelled by user.")
+
+    def read(self, size=-1):
+        self._check_cancelled()
+        data = self._file.read(size)
+        self._count(len(data))
+        return data
+
+    def read1(self, size=-1):
+        self._check_cancelled()
+        data = self._file.read1(size)
+        self._count(len(data))
+        return data
+
+    def readinto(self, buffer):
+        self._check_cancelled()
+        num_bytes = self._file.readinto(buffer)
+        self._count(num_bytes or 0)
+        return num_bytes
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+class ThroughputMeter:
+    # Rolling-window transfer rate over the last `window` seconds.
+    def __init__(self, window=10.0):
+        self.window = window
+        self.samples = collections.deque()
+
+    def reset(self):
+        self.samples.clear()
+
+    def update(self, total_bytes, now=None):
+        now = time.monotonic() if now is None else now
+        self.samples.append((now, total_bytes))
+        while len(self.samples) > 2 and now - self.samples[0][0] > self.window:
+            self.samples.popleft()
+
+    def rate(self):
+        if len(self.samples) < 2:
+            return 0.0
+        (start_time, start_bytes), (end_time, end_bytes) = (
+            self.samples[0],
+            self.samples[-1],
+        )
+        elapsed = end_time - start_time
+        if elapsed <= 0:
+            return 0.0
+        return max(0.0, (end_bytes - start_bytes) / elapsed)
+
+    def eta(self, remaining_bytes):
+        rate = self.rate()
+        if rate <= 0:
+            return None
+        return remaining_bytes / rate
+
+
+class ProgressThrottle:
+    # Passes through at most one update per `interval` seconds so worker
+    # threads don't flood the Qt event loop with signal emits. Safe to call
+    # from several transfer threads at once.
+    def __init__(self, callback, interval=0.25):
+        self.callback = callback
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._last_emit = 0.0
+        self._pending = None
+
+    def __call__(self, value):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_emit < self.interval:
+                self._pending = value
+                return
+            self._last_emit = now
+            self._pending = None
+        self.callback(value)
+
+    def flush(self):
+        with self._lock:
+            if self._pending is None:
+                return
+            value, self._pending = self._pending, None
+            self._last_emit = time.monotonic()
+        self.callback(value)
+
+
+class ByteCounter:
+    # Running total fed by transfer threads: O(1) per chunk, no stat calls.
+    def __init__(self, total=0, callback=None):
+        self.total = total
+        self.done = 0
+        self._callback = callback
+        self._lock = threading.Lock()
+
+    def add(self, num_bytes):
+        with self._lock:
+            self.done += num_bytes
+            if self.total:
+                self.done = min(self.total, self.done)
+            done = self.done
+        if self._callback:
+            self._callback(done)
@@ -0,0 +1,402 @@
+import functools
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import requests
+from huggingface_hub import CommitOperationAdd
+from huggingface_hub.utils import EntryNotFoundError
+from transfer_progress import ByteCounter, CountingFileReader
+from custom_exceptions import TransferCancelledError
+from hash_utils import hash_files_parallel
+from rate_limiter import cancellable
+
+logger = logging.getLogger(__name__)
+
+# Failures a later attempt may not hit: timeouts, throttling, server errors
+# and dropped connections. Anything else (auth, missing file, 4xx) is final.
+TRANSIENT_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+TRANSIENT_ERRORS = (
+    ConnectionError,
+    TimeoutError,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+try:
+    # huggingface_hub 1.x talks httpx.
+    import httpx
+    TRANSIENT_ERRORS += (httpx.TransportError,)
+except ImportError:
+    pass
+RETRY_BACKOFF_MAX = 120.0
+
+
+def is_transient_error(error):
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is not None:
+        return status in TRANSIENT_STATUSES
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+def retry_delay(attempt, backoff):
+    # Seconds before retry number `attempt` (1-based): doubles each time,
+    # capped and jittered so parallel failures don't retry in lockstep.
+    delay = min(RETRY_BACKOFF_MAX, backoff * 2 ** (attempt - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def call_with_retries(
+    func, *args, retries=0, backoff=2.0, cancel_event=None, on_retry=None,
+    **kwargs
+):
+    # func(*args, cancel_event=cancel_event, **kwargs), retried up to
+    # `retries` times on transient errors. on_retry(attempt, delay, error)
+    # is called before each wait; setting cancel_event ends the wait, and
+    # any wait on the rate limiter.
+    attempt = 0
+    while True:
+        try:
+            with cancellable(cancel_event):
+                return func(*args, cancel_event=cancel_event, **kwargs)
+        except Exception as e:
+            if attempt >= retries or not is_transient_error(e):
+                raise
+            attempt += 1
+            delay = retry_delay(attempt, backoff)
+            if on_retry:
+                on_retry(attempt, delay, e)
+            if cancel_event is None:
+                time.sleep(delay)
+            elif cancel_event.wait(delay):
+                raise TransferCancelledError("Upload cancelled by user.")
+
+
+def build_path_in_repo(file_path, repo_folder=None, base_dir=None):
+    # With base_dir, the file keeps its path relative to that folder.
+    if base_dir:
+        filename = os.path.relpath(file_path, base_dir).replace(os.sep, "/")
+    else:
+        filename = os.path.basename(file_path)
+    if repo_folder:
+        return f"{repo_folder.strip('/')}/{filename}"
+    return filename
+
+
+def preupload_file(
+    api,
+    repo_id,
+    repo_type,
+    file_path,
+    path_in_repo,
+    create_pr=False,
+    progress_callback=None,
+    cancel_event=None,
+):
+    # Hashes the file and pushes the LFS blob (if any) to storage without
+    # creating a commit. The returned operation is marked as uploaded, so a
+    # later create_commit only sends the pointer.
+    reader = CountingFileReader(file_path, progress_callback, cancel_event)
+    try:
+        operation = CommitOperationAdd(
+            path_in_repo=path_in_repo, path_or_fileobj=reader
+        )
+        reader.start_counting()
+        api.preupload_lfs_files(
+            repo_id=repo_id,
+            additions=[operation],
+            repo_type=repo_type,
+            create_pr=create_pr,
+        )
+    finally:
+        reader.close()
+    # Don't keep a handle open per staged file until the commit; regular
+    # (non-LFS) files are re-read from disk when the commit is created.
+    operation.path_or_fileobj = file_path
+    return operation
+
+
+def upload_single_file(
+    api,
+    repo_id,
+    repo_type,
+    file_path,
+    path_in_repo,
+    commit_message,
+    create_pr=False,
+    progress_callback=None,
+    cancel_event=None,
+):
+    # Same as huggingface_hub.upload_file, but reads through a counting
+    # wrapper so callers get byte-level progress.
+    with CountingFileReader(
+        file_path, progress_callback, cancel_event
+    ) as reader:
+        operation = CommitOperationAdd(
+            path_in_repo=path_in_repo, path_or_fileobj=reader
+        )
+        reader.start_counting()
+        return api.create_commit(
+            repo_id=repo_id,
+            operations=[operation],
+            commit_message=commit_message,
+            repo_type=repo_type,
+            create_pr=create_pr,
+        )
+
+
+def upload_stream(
+    api,
+    repo_id,
+    repo_type,
+    stream,
+    path_in_repo,
+    commit_message,
+    create_pr=False,
+):
+    # Uploads a seekable, generated file object (e.g. a ZipStream). Creating
+    # the operation reads it once to hash it; counting starts for the pass
+    # that actually sends the bytes.
+    operation = CommitOperationAdd(
+        path_in_repo=path_in_repo, path_or_fileobj=stream
+    )
+    stream.start_counting()
+    return api.create_commit(
+        repo_id=repo_id,
+        operations=[operation],
+        commit_message=commit_message,
+        repo_type=repo_type,
+        create_pr=create_pr,
+    )
+
+
+def _remote_sha256(entry):
+    lfs = getattr(entry, "lfs", None)
+    if not lfs:
+        return None
+    if isinstance(lfs, dict):
+        return lfs.get("sha256")
+    return getattr(lfs, "sha256", None)
+
+
+def list_remote_files(api, repo_id, repo_type, path_in_repo=None,
+                      revision=None):
+    # {path_in_repo: RepoFile} for every file under path_in_repo.
+    try:
+        entries = api.list_repo_tree(
+            repo_id,
+            path_in_repo=path_in_repo or None,
+            recursive=True,
+            repo_type=repo_type,
+            revision=revision,
+        )
+        return {
+            entry.path: entry
+            for entry in entries
+            if getattr(entry, "blob_id", None) is not None
+        }
+    except EntryNotFoundError:
+        return {}
+
+
+def plan_upload(api, repo_id, repo_type, files, path_in_repo=None,
+                revision=None, cancel_event=None, on_checked=None,
+                hash_cache=None, max_workers=None):
+    # files: list of (local_path, path_in_repo). Returns (to_upload,
+    # skipped) where skipped holds (local_path, size) for files whose bytes
+    # already sit at that path on the Hub.
+    with cancellable(cancel_event):
+        remote_files = list_remote_files(
+            api, repo_id, repo_type, path_in_repo, revision
+        )
+    sizes = {}
+    candidates = []
+    for local_path, target_path in files:
+        try:
+            sizes[local_path] = os.path.getsize(local_path)
+        except OSError:
+            continue
+        # Different sizes can't match, so only same-size files are hashed.
+        remote = remote_files.get(target_path)
+        if remote is not None and remote.size == sizes[local_path]:
+            candidates.append(local_path)
+
+    # Hash every candidate up front so the work spreads over all cores.
+    if hash_cache is not None:
+        hashed = hash_cache.get_many(candidates, cancel_event, max_workers)
+    else:
+        hashed = hash_files_parallel(candidates, max_workers, cancel_event)
+    if cancel_event is not None and cancel_event.is_set():
+        raise TransferCancelledError("Pre-flight check cancelled.")
+
+    to_upload = []
+    skipped = []
+    for local_path, target_path in files:
+        if local_path not in sizes:
+            # Let the upload itself report the missing file.
+            to_upload.append(local_path)
+            continue
+        unchanged = False
+        hashes = hashed.get(local_path)
+        if hashes is not None:
+            remote = remote_files[target_path]
+            remote_sha256 = _remote_sha256(remote)
+            if remote_sha256:
+                unchanged = hashes["sha256"] == remote_sha256
+            else:
+                unchanged = hashes["git_sha1"] == remote.blob_id
+        if unchanged:
+            skipped.append((local_path, sizes[local_path]))
+        else:
+            to_upload.append(local_path)
+        if on_checked:
+            on_checked(local_path, unchanged)
+    return to_upload, skipped
+
+
+def chunk_operations(operations, operations_per_commit):
+    if operations_per_commit <= 0:
+        return [list(operations)] if operations else []
+    return [
+        operations[i:i + operations_per_commit]
+        for i in range(0, len(operations), operations_per_commit)
+    ]
+
+
+def commit_operations(
+    api,
+    repo_id,
+    repo_type,
+    operations,
+    commit_message,
+    operations_per_commit=0,
+    create_pr=False,
+    on_commit=None,
+    cancel_event=None,
+):
+    chunks = chunk_operations(operations, operations_per_commit)
+    commit_infos = []
+    for index, chunk in enumerate(chunks):
+        # A commit in flight can't be interrupted; stop before the next one.
+        if cancel_event is not None and cancel_event.is_set():
+            raise TransferCancelledError(
+                f"Commit cancelled after {index}/{len(chunks)} commit(s)."
+            )
+        message = commit_message
+        if len(chunks) > 1:
+            message = f"{commit_message} ({index + 1}/{len(chunks)})"
+        logger.info(
+            f"Creating commit {index + 1}/{len(chunks)} on {repo_id} "
+            f"with {len(chunk)} operation(s)."
+        )
+        with cancellable(cancel_event):
+            commit_info = api.create_commit(
+                repo_id=repo_id,
+                operations=chunk,
+                commit_message=message,
+                repo_type=repo_type,
+                create_pr=create_pr,
+            )
+        commit_infos.append(commit_info)
+        if on_commit:
+            on_commit(index, len(chunks), chunk, commit_info)
+    return commit_infos
+
+
+def upload_files(
+    api,
+    repo_id,
+    repo_type,
+    files,
+    commit_message,
+    max_workers=1,
+    operations_per_commit=0,
+    create_pr=False,
+    progress_callback=None,
+    cancel_event=None,
+    on_file_done=None,
+    on_commit=None,
+    retries=0,
+    retry_backoff=2.0,
+    on_retry=None,
+):
+    # files: list of (local_path, path_in_repo). Pre-uploads up to
+    # max_workers files at once, then commits every file that made it
+    # (split per operations_per_commit). progress_callback(bytes_sent) gets
+    # the running total over all files; on_file_done(local_path, error) is
+    # called as each file is staged, with error None on success. A file
+    # hitting a transient error is retried up to `retries` times, calling
+    # on_retry(local_path, attempt, delay, error) first. Returns
+    # (committed operations, [(local_path, error)] for the files that
+    # failed).
+    counter = ByteCounter(0, progress_callback)
+    sent = {}
+    sent_lock = threading.Lock()
+
+    def tracker(local_path):
+        def on_progress(total):
+            with sent_lock:
+                delta = total - sent.get(local_path, 0)
+                if delta <= 0:
+                    return
+                sent[local_path] = total
+            counter.add(delta)
+        return on_progress
+
+    staged = {}
+    failures = []
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            executor.submit(
+                call_with_retries,
+                preupload_file,
+                api,
+                repo_id,
+                repo_type,
+                local_path,
+                target_path,
+                create_pr=create_pr,
+                progress_callback=tracker(local_path),
+                cancel_event=cancel_event,
+                retries=retries,
+                backoff=retry_backoff,
+                on_retry=(
+                    functools.partial(on_retry, local_path)
+                    if on_retry else None
+                ),
+            ): local_path
+            for local_path, target_path in files
+        }
+        for future in as_completed(futures):
+            local_path = futures[future]
+            error = None
+            try:
+                staged[local_path] = future.result()
+            except TransferCancelledError:
+                continue
+            except Exception as e:
+                error = e
+                failures.append((local_path, e))
+            if on_file_done:
+                on_file_done(local_path, error)
+    if cancel_event is not None and cancel_event.is_set():
+        raise TransferCancelledError("Upload cancelled by user.")
+    # Commits list files in the order they were given.
+    operations = [
+        staged[local_path] for local_path, _ in files if local_path in staged
+    ]
+    if operations:
+        commit_operations(
+            api,
+            repo_id,
+            repo_type,
+            operations,
+            commit_message,
+            operations_per_commit=operations_per_commit,
+            create_pr=create_pr,
+            on_commit=on_commit,
+            cancel_event=cancel_event,
+        )
+    return operations, failures
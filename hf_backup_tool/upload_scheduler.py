@@ -0,0 +1,66 @@
+import heapq
+import itertools
+
+
+class UploadScheduler:
+    # Pending uploads ordered by size. Half of the slots (at least one) go
+    # to the largest files, so the longest transfers start first instead of
+    # dragging out the end of the batch; the other slots drain the smallest
+    # files around them, so small files never wait for every big one.
+    # Two heaps over the same files, each skipping what the other already
+    # handed out: push and pop are O(log n).
+
+    def __init__(self, items=()):
+        # (-size, seq, path) and (size, seq, path); seq keeps equal sizes
+        # in arrival order and identifies the live entry of a path.
+        self._largest = []
+        self._smallest = []
+        self._pending = {}
+        self._large_running = set()
+        self._seq = itertools.count()
+        for path, size in items:
+            self.push(path, size)
+
+    def push(self, path, size):
+        if path in self._pending:
+            return
+        seq = next(self._seq)
+        self._pending[path] = seq
+        heapq.heappush(self._largest, (-size, seq, path))
+        heapq.heappush(self._smallest, (size, seq, path))
+
+    def pop(self, slots):
+        # Next file to start when `slots` uploads may run at once.
+        large = len(self._large_running) < max(1, slots // 2)
+        heap = self._largest if large else self._smallest
+        while True:
+            _, seq, path = heapq.heappop(heap)
+            if self._pending.get(path) == seq:
+                break
+        del self._pending[path]
+        if not self._pending:
+            # Only entries already handed out are left.
+            self._largest.clear()
+            self._smallest.clear()
+        if large:
+            self._large_running.add(path)
+        return path
+
+    def finished(self, path):
+        # Frees the big-file slot `path` may hold.
+        self._large_running.discard(path)
+
+    def clear(self):
+        self._largest.clear()
+        self._smallest.clear()
+        self._pending.clear()
+        self._large_running.clear()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def __iter__(self):
+        return iter(list(self._pending))
+
+    def __contains__(self, path):
+        return path in self._pending
@@ -1,10 +1,32 @@
 from PyQt6.QtCore import QThread, pyqtSignal
-from huggingface_hub import HfApi, create_repo, upload_file, upload_folder
+from huggingface_hub import HfApi, create_repo, upload_folder
+import asyncio
 import os
-from custom_exceptions import UploadError, APIKeyError
+import threading
+from custom_exceptions import UploadError, APIKeyError, TransferCancelledError
+from upload_engine import (
+    build_path_in_repo,
+    preupload_file,
+    upload_single_file,
+    commit_operations,
+    plan_upload,
+    is_transient_error,
+    retry_delay,
+)
+from transfer_progress import ProgressThrottle
+from hash_cache import get_hash_cache
+from config_manager import get_hash_workers
+from file_scanner import FileTable, scan_directory
+from backup_daemon import BackupDaemon
+from transfer_bridge import TransferBridge
 
-class UploadWorker(QThread):
-    progress_signal = pyqtSignal(int)
+class UploadWorker(TransferBridge):
+    # One file (or folder) upload as a job on the shared transfer core, so
+    # many small uploads share one pool of threads instead of a QThread
+    # each.
+
+    # Bytes of this worker's file sent so far (may exceed 32-bit int).
+    progress_signal = pyqtSignal(object)
     output_signal = pyqtSignal(str)
     finished_signal = pyqtSignal(bool)
 
@@ -21,8 +43,12 @@ class UploadWorker(QThread):
         upload_type="File",
         create_repo=False,
         repo_exists=False,
+        create_pr=False,
+        base_dir=None,
+        retries=0,
+        retry_backoff=2.0,
     ):
-        super().__init__()
+        super().__init__(self.transfer)
         self.api_token = api_token
         self.repo_owner = repo_owner
         self.repo_name = repo_name
@@ -34,90 +60,441 @@ class UploadWorker(QThread):
         self.upload_type = upload_type
         self.create_repo = create_repo
         self.repo_exists = repo_exists
+        self.create_pr = create_pr
+        # Files keep their path relative to base_dir under repo_folder.
+        self.base_dir = base_dir
+        # Set by the "Preupload" mode; committed later by a CommitWorker.
+        self.operation = None
+        # File uploads hitting a transient error are tried again after
+        # retry_backoff seconds, doubling each time.
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        # Why the upload failed for good, for the failed-uploads list.
+        self.error = None
+
+    def handle_event(self, kind, payload):
+        if kind == "output":
+            self.output_signal.emit(payload)
+        elif kind == "progress":
+            self.progress_signal.emit(payload)
+
+    def handle_done(self, result, error):
+        if error is not None and not isinstance(error, TransferCancelledError):
+            self.error = str(error)
+        if isinstance(error, TransferCancelledError):
+            self.output_signal.emit(
+                f"🛑 Upload of '{os.path.basename(self.file_path or '')}' "
+                "cancelled."
+            )
+        elif isinstance(error, APIKeyError):
+            self.output_signal.emit(f"❌ API Key Error: {str(error)}")
+        elif isinstance(error, UploadError):
+            self.output_signal.emit(f"❌ Upload Error: {str(error)}")
+        elif error is not None:
+            self.output_signal.emit(
+                f"❌ An unexpected error occurred: {str(error)}"
+            )
+        self.finished_signal.emit(error is None and bool(result))
+
+    async def _with_retries(self, job, func, *args, **kwargs):
+        # The backoff waits on the event loop, not on a pool thread.
+        attempt = 0
+        while True:
+            try:
+                return await job.run_blocking(func, *args, **kwargs)
+            except TransferCancelledError:
+                raise
+            except Exception as e:
+                if attempt >= self.retries or not is_transient_error(e):
+                    raise
+                attempt += 1
+                delay = retry_delay(attempt, self.retry_backoff)
+                job.emit(
+                    "output",
+                    f"🔁 '{os.path.basename(self.file_path)}' failed ({e}); "
+                    f"retry {attempt}/{self.retries} in {delay:.0f}s...",
+                )
+                await asyncio.sleep(delay)
+
+    async def transfer(self, job):
+        if not self.api_token:
+            raise APIKeyError("API token not found in configuration.")
+        progress = ProgressThrottle(lambda sent: job.emit("progress", sent))
+        api = HfApi(token=self.api_token)
+        repo_id = f"{self.repo_owner}/{self.repo_name}"
+        if self.repo_exists:
+            try:
+                await job.run_blocking(
+                    api.repo_info, repo_id, repo_type=self.repo_type
+                )
+                job.emit("output", f"✅ Repository '{repo_id}' found.")
+            except TransferCancelledError:
+                raise
+            except Exception as e:
+                job.emit(
+                    "output",
+                    f"❌ Repository '{repo_id}' not found. Error: {str(e)}",
+                )
+                return False
+        if self.create_repo:
+            try:
+                await job.run_blocking(
+                    create_repo,
+                    repo_id,
+                    repo_type=self.repo_type,
+                    token=self.api_token,
+                    private=False,
+                )
+                job.emit(
+                    "output", f"✅ Repository '{repo_id}' created successfully."
+                )
+            except TransferCancelledError:
+                raise
+            except Exception as e:
+                job.emit(
+                    "output",
+                    f"❌ Failed to create repository '{repo_id}'. "
+                    f"Error: {str(e)}",
+                )
+                return False
+        if self.upload_type == "File":
+            if not self.file_path:
+                raise UploadError("No file selected for upload.")
+            try:
+                filename = os.path.basename(self.file_path)
+                await self._with_retries(
+                    job,
+                    upload_single_file,
+                    api,
+                    repo_id,
+                    self.repo_type,
+                    self.file_path,
+                    build_path_in_repo(
+                        self.file_path, self.repo_folder, self.base_dir
+                    ),
+                    self.commit_message,
+                    create_pr=self.create_pr,
+                    progress_callback=progress,
+                    cancel_event=job.cancel_event,
+                )
+                progress.flush()
+                job.emit(
+                    "output",
+                    f"✅ File '{filename}' uploaded to '{repo_id}' successfully.",
+                )
+            except TransferCancelledError:
+                raise
+            except Exception as e:
+                self.error = str(e)
+                job.emit("output", f"❌ File upload failed. Error: {str(e)}")
+                return False
+        elif self.upload_type == "Preupload":
+            if not self.file_path:
+                raise UploadError("No file selected for upload.")
+            try:
+                filename = os.path.basename(self.file_path)
+                self.operation = await self._with_retries(
+                    job,
+                    preupload_file,
+                    api,
+                    repo_id,
+                    self.repo_type,
+                    self.file_path,
+                    build_path_in_repo(
+                        self.file_path, self.repo_folder, self.base_dir
+                    ),
+                    create_pr=self.create_pr,
+                    progress_callback=progress,
+                    cancel_event=job.cancel_event,
+                )
+                progress.flush()
+                job.emit(
+                    "output",
+                    f"📦 File '{filename}' staged for commit to '{repo_id}'.",
+                )
+            except TransferCancelledError:
+                raise
+            except Exception as e:
+                self.error = str(e)
+                job.emit(
+                    "output", f"❌ File pre-upload failed. Error: {str(e)}"
+                )
+                return False
+        elif self.upload_type == "Folder":
+            if not self.folder_path:
+                raise UploadError("No folder selected for upload.")
+            try:
+                await job.run_blocking(
+                    upload_folder,
+                    folder_path=self.folder_path,
+                    repo_id=repo_id,
+                    repo_type=self.repo_type,
+                    commit_message=self.commit_message,
+                    token=self.api_token,
+                )
+                job.emit(
+                    "output",
+                    f"✅ Folder '{self.folder_path}' uploaded to '{repo_id}' "
+                    "successfully.",
+                )
+            except TransferCancelledError:
+                raise
+            except Exception as e:
+                job.emit("output", f"❌ Folder upload failed. Error: {str(e)}")
+                return False
+        return True
+
+
+class CommitWorker(QThread):
+    output_signal = pyqtSignal(str)
+    committed_signal = pyqtSignal(int)
+    finished_signal = pyqtSignal(bool)
+
+    def __init__(
+        self,
+        api_token,
+        repo_id,
+        operations,
+        commit_message,
+        repo_type="model",
+        operations_per_commit=0,
+        create_pr=False,
+    ):
+        super().__init__()
+        self.api_token = api_token
+        self.repo_id = repo_id
+        self.operations = operations
+        self.commit_message = commit_message
+        self.repo_type = repo_type
+        self.operations_per_commit = operations_per_commit
+        self.create_pr = create_pr
+        self.cancel_event = threading.Event()
+        # Why the commit failed, for the failed-files list.
+        self.error = None
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def _on_commit(self, index, total, chunk, commit_info):
+        url = getattr(commit_info, "pr_url", None) or getattr(
+            commit_info, "commit_url", ""
+        )
+        self.output_signal.emit(
+            f"✅ Commit {index + 1}/{total} with {len(chunk)} file(s) "
+            f"created on '{self.repo_id}'. {url}"
+        )
+        self.committed_signal.emit(len(chunk))
 
     def run(self):
         try:
             if not self.api_token:
                 raise APIKeyError("API token not found in configuration.")
             api = HfApi(token=self.api_token)
-            repo_id = f"{self.repo_owner}/{self.repo_name}"
-            if self.repo_exists:
-                try:
-                    api.repo_info(repo_id, repo_type=self.repo_type)
-                    self.output_signal.emit(f"✅ Repository '{repo_id}' found.")
-                except Exception as e:
-                    self.output_signal.emit(
-                        f"❌ Repository '{repo_id}' not found. Error: {str(e)}"
-                    )
-                    self.finished_signal.emit(False)
-                    return
-            if self.create_repo:
-                try:
-                    create_repo(
-                        repo_id,
-                        repo_type=self.repo_type,
-                        token=self.api_token,
-                        private=False,
-                    )
-                    self.output_signal.emit(
-                        f"✅ Repository '{repo_id}' created successfully."
-                    )
-                except Exception as e:
-                    self.output_signal.emit(
-                        f"❌ Failed to create repository '{repo_id}'. Error: {str(e)}"
-                    )
-                    self.finished_signal.emit(False)
-                    return
-            if self.upload_type == "File":
-                if not self.file_path:
-                    raise UploadError("No file selected for upload.")
-                try:
-                    filename = os.path.basename(self.file_path)
-                    if self.repo_folder:
-                        upload_path = os.path.join(self.repo_folder, filename)
-                    else:
-                        upload_path = filename
-                    upload_file(
-                        path_or_fileobj=self.file_path,
-                        path_in_repo=upload_path,
-                        repo_id=repo_id,
-                        repo_type=self.repo_type,
-                        commit_message=self.commit_message,
-                        token=self.api_token,
-                        create_pr=False,
-                    )
-                    self.output_signal.emit(
-                        f"✅ File '{filename}' uploaded to '{repo_id}' successfully."
-                    )
-                except Exception as e:
-                    self.output_signal.emit(f"❌ File upload failed. Error: {str(e)}")
-                    self.finished_signal.emit(False)
-                    return
-            elif self.upload_type == "Folder":
-                if not self.folder_path:
-                    raise UploadError("No folder selected for upload.")
-                try:
-                    upload_folder(
-                        folder_path=self.folder_path,
-                        repo_id=repo_id,
-                        repo_type=self.repo_type,
-                        commit_message=self.commit_message,
-                        token=self.api_token,
-                    )
-                    self.output_signal.emit(
-                        f"✅ Folder '{self.folder_path}' uploaded to '{repo_id}' successfully."
-                    )
-                except Exception as e:
-                    self.output_signal.emit(f"❌ Folder upload failed. Error: {str(e)}")
-                    self.finished_signal.emit(False)
-                    return
+            commit_operations(
+                api,
+                self.repo_id,
+                self.repo_type,
+                self.operations,
+                self.commit_message,
+                operations_per_commit=self.operations_per_commit,
+                create_pr=self.create_pr,
+                on_commit=self._on_commit,
+                cancel_event=self.cancel_event,
+            )
             self.finished_signal.emit(True)
+        except TransferCancelledError as e:
+            self.error = str(e)
+            self.output_signal.emit(f"🛑 {str(e)}")
+            self.finished_signal.emit(False)
         except APIKeyError as e:
+            self.error = str(e)
             self.output_signal.emit(f"❌ API Key Error: {str(e)}")
             self.finished_signal.emit(False)
-        except UploadError as e:
-            self.output_signal.emit(f"❌ Upload Error: {str(e)}")
+        except Exception as e:
+            self.error = str(e)
+            self.output_signal.emit(f"❌ Commit failed. Error: {str(e)}")
+            self.finished_signal.emit(False)
+
+
+class UploadPreflightWorker(QThread):
+    output_signal = pyqtSignal(str)
+    # (to_upload, skipped) on success, None on failure or cancellation.
+    finished_signal = pyqtSignal(object)
+
+    def __init__(
+        self,
+        api_token,
+        repo_id,
+        file_paths,
+        repo_type="model",
+        repo_folder=None,
+        base_dir=None,
+    ):
+        super().__init__()
+        self.api_token = api_token
+        self.repo_id = repo_id
+        self.file_paths = file_paths
+        self.repo_type = repo_type
+        self.repo_folder = repo_folder
+        self.base_dir = base_dir
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        try:
+            api = HfApi(token=self.api_token)
+            hash_cache = get_hash_cache()
+            hash_cache.prune_once()
+            files = [
+                (
+                    file_path,
+                    build_path_in_repo(
+                        file_path, self.repo_folder, self.base_dir
+                    ),
+                )
+                for file_path in self.file_paths
+            ]
+            result = plan_upload(
+                api,
+                self.repo_id,
+                self.repo_type,
+                files,
+                path_in_repo=self.repo_folder,
+                cancel_event=self.cancel_event,
+                hash_cache=hash_cache,
+                max_workers=get_hash_workers() or None,
+            )
+            self.finished_signal.emit(result)
+        except TransferCancelledError:
+            self.output_signal.emit("🛑 Pre-flight check cancelled.")
+            self.finished_signal.emit(None)
+        except Exception as e:
+            self.output_signal.emit(
+                f"❌ Could not compare files with the Hub. Error: {str(e)}"
+            )
+            self.finished_signal.emit(None)
+
+
+class FileScanWorker(QThread):
+    output_signal = pyqtSignal(str)
+    # (FileTable, row order), or None on failure or cancellation.
+    finished_signal = pyqtSignal(object)
+
+    def __init__(
+        self,
+        directory,
+        recursive=False,
+        include=None,
+        exclude=None,
+        extension=None,
+        sort_by="name",
+        text_filter=None,
+    ):
+        super().__init__()
+        self.directory = directory
+        self.recursive = recursive
+        self.include = include
+        self.exclude = exclude
+        self.extension = extension
+        self.sort_by = sort_by
+        self.text_filter = text_filter
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        symlinks = []
+        unreadable = []
+
+        def on_skip(path, reason):
+            (symlinks if reason == "symlink" else unreadable).append(path)
+
+        try:
+            table = FileTable(self.directory)
+            for scanned in scan_directory(
+                self.directory,
+                recursive=self.recursive,
+                include=self.include,
+                exclude=self.exclude,
+                extension=self.extension,
+                cancel_event=self.cancel_event,
+                on_skip=on_skip,
+            ):
+                table.append(scanned)
+            order = table.order(self.sort_by, self.text_filter)
+        except TransferCancelledError:
+            self.finished_signal.emit(None)
+            return
+        except Exception as e:
+            self.output_signal.emit(f"❌ Error listing files: {str(e)}")
+            self.finished_signal.emit(None)
+            return
+        if symlinks:
+            self.output_signal.emit(f"ℹ️ Skipped {len(symlinks)} symlink(s).")
+        if unreadable:
+            self.output_signal.emit(
+                f"⚠️ Skipped {len(unreadable)} unreadable file(s) or folder(s)."
+            )
+        self.finished_signal.emit((table, order))
+
+
+class FileSortWorker(QThread):
+    # Re-sorts or re-filters an already scanned FileTable; emits the new
+    # row order.
+    finished_signal = pyqtSignal(object)
+
+    def __init__(self, table, sort_by="name", text_filter=None):
+        super().__init__()
+        self.table = table
+        self.sort_by = sort_by
+        self.text_filter = text_filter
+
+    def run(self):
+        # Can't be interrupted; a superseded result is ignored by the caller.
+        self.finished_signal.emit(
+            self.table.order(self.sort_by, self.text_filter)
+        )
+
+
+class AutoBackupWorker(QThread):
+    output_signal = pyqtSignal(str)
+    # Counts by stage, see BackupDaemon._report_status.
+    status_signal = pyqtSignal(object)
+    finished_signal = pyqtSignal(bool)
+
+    def __init__(self, api_token, repo_id, folder, **daemon_options):
+        super().__init__()
+        self.api_token = api_token
+        self.repo_id = repo_id
+        self.folder = folder
+        self.daemon_options = daemon_options
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        try:
+            if not self.api_token:
+                raise APIKeyError("API token not found in configuration.")
+            daemon = BackupDaemon(
+                HfApi(token=self.api_token),
+                self.repo_id,
+                self.folder,
+                hash_cache=get_hash_cache(),
+                cancel_event=self.cancel_event,
+                on_output=self.output_signal.emit,
+                on_status=self.status_signal.emit,
+                **self.daemon_options,
+            )
+            daemon.run()
+            self.finished_signal.emit(True)
+        except APIKeyError as e:
+            self.output_signal.emit(f"❌ API Key Error: {str(e)}")
             self.finished_signal.emit(False)
         except Exception as e:
-            self.output_signal.emit(f"❌ An unexpected error occurred: {str(e)}")
+            self.output_signal.emit(f"❌ Auto-backup stopped. Error: {str(e)}")
             self.finished_signal.emit(False)
@@ -1,7 +1,5 @@
 import logging
 import os
-import shutil
-import zipfile
 from PyQt6.QtWidgets import (
     QWidget,
     QLabel,
@@ -11,10 +9,30 @@ from PyQt6.QtWidgets import (
     QHBoxLayout,
     QFileDialog,
     QTextEdit,
-    QScrollArea
+    QScrollArea,
+    QCheckBox,
+    QComboBox,
+    QProgressBar,
 )
 from PyQt6.QtCore import Qt
-from config_manager import config
+from config_manager import (
+    config,
+    get_api_token,
+    get_zip_compression,
+    get_zip_compression_level,
+    get_zip_compression_threads,
+    get_zip_auto_store,
+    get_zip_store_extensions,
+    get_zip_volume_size_mb,
+    set_zip_volume_size_mb,
+    get_zip_split_format,
+    set_zip_split_format,
+)
+from custom_exceptions import ConfigError
+from transfer_progress import format_bytes
+from zip_engine import CompressionOptions, INCOMPRESSIBLE_EXTENSIONS
+from zip_worker import RestoreWorker, ZipWorker
+from incremental import MANIFEST_SUFFIX
 
 logger = logging.getLogger(__name__)
 
@@ -29,9 +47,42 @@ class ZipApp(QWidget):
         self.folder_button = QPushButton("Select Folder")
         self.zip_name_label = QLabel("Zip Name:")
         self.zip_name_input = QLineEdit(config["Zip"]["default_zip_name"])
+        self.incremental_checkbox = QCheckBox(
+            "Incremental: only archive changes since the last run"
+        )
+        self.restore_button = QPushButton("Restore from Manifest...")
+        self.split_checkbox = QCheckBox("Split into volumes")
+        self.volume_size_label = QLabel("Volume Size (MB):")
+        self.volume_size_input = QLineEdit(str(get_zip_volume_size_mb()))
+        self.split_format_dropdown = QComboBox()
+        self.split_format_dropdown.addItem("Zip volumes", "zip")
+        self.split_format_dropdown.addItem("Tar shards (WebDataset)", "tar")
+        self.split_format_dropdown.setCurrentIndex(
+            max(0, self.split_format_dropdown.findData(get_zip_split_format()))
+        )
+        self.delete_volumes_checkbox = QCheckBox(
+            "Delete each volume once it is uploaded"
+        )
+        self.upload_checkbox = QCheckBox(
+            "Upload the archive to the Hub instead of saving it"
+        )
+        self.repo_id_label = QLabel("Repo ID (owner/name):")
+        self.repo_id_input = QLineEdit()
+        org = config.get("HuggingFace", "org", fallback="")
+        repo = config.get("HuggingFace", "repo", fallback="")
+        if org and repo:
+            self.repo_id_input.setText(f"{org}/{repo}")
+        self.repo_type_dropdown = QComboBox()
+        self.repo_type_dropdown.addItems(["model", "dataset", "space"])
+        self.repo_folder_label = QLabel("Path in Repo (Optional):")
+        self.repo_folder_input = QLineEdit()
         self.zip_button = QPushButton("Zip and Save")
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setEnabled(False)
+        self.progress_bar = QProgressBar()
         self.output_text = QTextEdit()
         self.output_text.setReadOnly(True)
+        self.zip_worker = None
         
         # Create layouts
         folder_layout = QHBoxLayout()
@@ -46,7 +97,28 @@ class ZipApp(QWidget):
         content_layout.addLayout(folder_layout)
         content_layout.addWidget(self.zip_name_label)
         content_layout.addWidget(self.zip_name_input)
-        content_layout.addWidget(self.zip_button)
+        content_layout.addWidget(self.incremental_checkbox)
+        split_layout = QHBoxLayout()
+        split_layout.addWidget(self.split_checkbox)
+        split_layout.addWidget(self.volume_size_label)
+        split_layout.addWidget(self.volume_size_input)
+        split_layout.addWidget(self.split_format_dropdown)
+        content_layout.addLayout(split_layout)
+        content_layout.addWidget(self.upload_checkbox)
+        content_layout.addWidget(self.delete_volumes_checkbox)
+        repo_layout = QHBoxLayout()
+        repo_layout.addWidget(self.repo_id_label)
+        repo_layout.addWidget(self.repo_id_input, 2)
+        repo_layout.addWidget(self.repo_type_dropdown)
+        repo_layout.addWidget(self.repo_folder_label)
+        repo_layout.addWidget(self.repo_folder_input, 1)
+        content_layout.addLayout(repo_layout)
+        button_layout = QHBoxLayout()
+        button_layout.addWidget(self.zip_button)
+        button_layout.addWidget(self.cancel_button)
+        button_layout.addWidget(self.restore_button)
+        content_layout.addLayout(button_layout)
+        content_layout.addWidget(self.progress_bar)
         content_layout.addWidget(self.output_text, 1)  # Let output text expand
         
         # Create scrollable container to handle small screens
@@ -71,6 +143,12 @@ class ZipApp(QWidget):
         self.setLayout(main_layout)
         self.folder_button.clicked.connect(self.select_folder)
         self.zip_button.clicked.connect(self.zip_and_save)
+        self.cancel_button.clicked.connect(self.cancel_zip)
+        self.upload_checkbox.toggled.connect(self._update_mode)
+        self.split_checkbox.toggled.connect(self._update_mode)
+        self.incremental_checkbox.toggled.connect(self._update_mode)
+        self.restore_button.clicked.connect(self.restore_archive)
+        self._update_mode()
 
     def select_folder(self):
         self.folder_path = QFileDialog.getExistingDirectory(
@@ -78,6 +156,30 @@ class ZipApp(QWidget):
         )
         self.folder_input.setText(self.folder_path)
 
+    def _update_mode(self, *_):
+        # Incremental chains are plain local archives.
+        incremental = self.incremental_checkbox.isChecked()
+        self.split_checkbox.setEnabled(not incremental)
+        self.upload_checkbox.setEnabled(not incremental)
+        upload = self.upload_checkbox.isChecked() and not incremental
+        split = self.split_checkbox.isChecked() and not incremental
+        for widget in (
+            self.volume_size_label,
+            self.volume_size_input,
+            self.split_format_dropdown,
+        ):
+            widget.setEnabled(split)
+        self.delete_volumes_checkbox.setVisible(upload and split)
+        for widget in (
+            self.repo_id_label,
+            self.repo_id_input,
+            self.repo_type_dropdown,
+            self.repo_folder_label,
+            self.repo_folder_input,
+        ):
+            widget.setVisible(upload)
+        self.zip_button.setText("Zip and Upload" if upload else "Zip and Save")
+
     def zip_and_save(self):
         folder_path = self.folder_input.text()
         zip_file_name = self.zip_name_input.text().strip()
@@ -93,36 +195,165 @@ class ZipApp(QWidget):
             )
             return
         zip_file_path = zip_file_name + ".zip"
-        temp_dir = "temp_zip_dir"
         try:
-            os.makedirs(temp_dir, exist_ok=True)
-            temp_zip_path = os.path.join(temp_dir, zip_file_path)
-            with zipfile.ZipFile(
-                temp_zip_path, "w", zipfile.ZIP_DEFLATED
-            ) as zipf:
-                for root, _, files in os.walk(folder_path):
-                    for file in files:
-                        file_path_in_folder = os.path.join(root, file)
-                        relative_path = os.path.relpath(
-                            file_path_in_folder, folder_path
-                        )
-                        zipf.write(file_path_in_folder, relative_path)
-            save_path, _ = QFileDialog.getSaveFileName(
-                self, "Save Zip File", zip_file_path, "Zip files (*.zip)"
+            options = CompressionOptions(
+                codec=get_zip_compression(),
+                level=get_zip_compression_level(),
+                threads=get_zip_compression_threads(),
+                auto_store=get_zip_auto_store(),
+                store_extensions=INCOMPRESSIBLE_EXTENSIONS.union(
+                    get_zip_store_extensions()
+                ),
             )
-            if save_path:
-                shutil.copy2(temp_zip_path, save_path)
+        except ValueError as e:
+            self.output_text.append(f"Invalid zip settings: {e}")
+            return
+        incremental = self.incremental_checkbox.isChecked()
+        upload_kwargs = {}
+        if self.upload_checkbox.isChecked() and not incremental:
+            repo_id = self.repo_id_input.text().strip()
+            if repo_id.count("/") != 1:
                 self.output_text.append(
-                    (
-                        f"Successfully created and saved {zip_file_path} to "
-                        f"{save_path}"
-                    )
+                    "Please enter the repo ID as owner/name."
                 )
-            else:
+                return
+            upload_kwargs = {
+                "api_token": get_api_token(),
+                "repo_id": repo_id,
+                "repo_type": self.repo_type_dropdown.currentText(),
+            }
+        if self.split_checkbox.isChecked() and not incremental:
+            try:
+                volume_size_mb = int(self.volume_size_input.text())
+                if volume_size_mb <= 0:
+                    raise ValueError
+            except ValueError:
+                self.output_text.append(
+                    "Volume size must be a positive number of MB."
+                )
+                return
+            archive_format = self.split_format_dropdown.currentData()
+            try:
+                set_zip_volume_size_mb(volume_size_mb)
+                set_zip_split_format(archive_format)
+            except ConfigError as e:
+                logger.warning(f"Could not save split settings: {e}")
+            # Volumes are kept locally (and uploaded from there when
+            # uploading), so they need a folder either way.
+            volume_dir = QFileDialog.getExistingDirectory(
+                self, "Select Folder for Volumes"
+            )
+            if not volume_dir:
                 self.output_text.append("Zip file creation cancelled.")
-        except Exception as e:
-            logger.error(f"Zip error: {e}", exc_info=True)
-            self.output_text.append(f"Error creating zip file: {e}")
-        finally:
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir, ignore_errors=True)
+                return
+            worker = ZipWorker(
+                folder_path,
+                path_in_repo=self.repo_folder_input.text().strip("/") or None,
+                options=options,
+                volume_dir=volume_dir,
+                base_name=zip_file_name,
+                volume_size=volume_size_mb * 1024 * 1024,
+                archive_format=archive_format,
+                delete_after_upload=self.delete_volumes_checkbox.isChecked(),
+                **upload_kwargs,
+            )
+        elif upload_kwargs:
+            repo_folder = self.repo_folder_input.text().strip("/")
+            path_in_repo = (
+                f"{repo_folder}/{zip_file_path}" if repo_folder
+                else zip_file_path
+            )
+            worker = ZipWorker(
+                folder_path,
+                path_in_repo=path_in_repo,
+                options=options,
+                **upload_kwargs,
+            )
+        else:
+            # Asked up front so the archive is written straight to its
+            # final location instead of being staged and copied.
+            # In incremental mode this picks the chain's base archive, which
+            # is kept, not overwritten, when it already exists.
+            save_path, _ = QFileDialog.getSaveFileName(
+                self,
+                "Save Zip File",
+                zip_file_path,
+                "Zip files (*.zip)",
+                options=(
+                    QFileDialog.Option.DontConfirmOverwrite if incremental
+                    else QFileDialog.Option(0)
+                ),
+            )
+            if not save_path:
+                self.output_text.append("Zip file creation cancelled.")
+                return
+            worker = ZipWorker(
+                folder_path,
+                save_path=save_path,
+                options=options,
+                incremental=incremental,
+            )
+        self._start_worker(worker)
+
+    def _start_worker(self, worker):
+        self.zip_worker = worker
+        worker.output_signal.connect(self.output_text.append)
+        worker.progress_signal.connect(self._handle_progress)
+        worker.finished_signal.connect(self._handle_finished)
+        self.progress_bar.setValue(0)
+        self.zip_button.setEnabled(False)
+        self.restore_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        worker.start()
+
+    def restore_archive(self):
+        manifest_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Select Archive Manifest",
+            "",
+            f"Archive manifests (*{MANIFEST_SUFFIX})",
+        )
+        if not manifest_path:
+            return
+        target_dir = QFileDialog.getExistingDirectory(
+            self, "Select Folder to Restore Into"
+        )
+        if not target_dir:
+            self.output_text.append("Restore cancelled.")
+            return
+        self._start_worker(RestoreWorker(manifest_path, target_dir))
+
+    def _handle_progress(self, done, total):
+        if self.sender() is not self.zip_worker:
+            return
+        if total > 0:
+            self.progress_bar.setValue(int(done / total * 100))
+            self.progress_bar.setFormat(
+                f"{format_bytes(done)} / {format_bytes(total)}"
+            )
+
+    def _handle_finished(self, success):
+        if self.sender() is not self.zip_worker:
+            return
+        if success:
+            self.progress_bar.setValue(100)
+        self.progress_bar.resetFormat()
+        self.zip_worker = None
+        self.zip_button.setEnabled(True)
+        self.restore_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+
+    def cancel_zip(self):
+        if self.zip_worker is not None:
+            self.zip_worker.cancel()
+            self.cancel_button.setEnabled(False)
+            self.output_text.append("Cancelling...")
+
+    def shutdown(self, timeout_ms=5000):
+        worker = self.zip_worker
+        if worker is not None and worker.isRunning():
+            worker.cancel()
+            if not worker.wait(timeout_ms):
+                logger.warning("Zip worker did not stop in time; terminating.")
+                worker.terminate()
+                worker.wait()
@@ -0,0 +1,789 @@
+import collections
+import hashlib
+import io
+import logging
+import lzma
+import os
+import struct
+import tarfile
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from custom_exceptions import TransferCancelledError
+from transfer_progress import CountingFileReader
+
+try:
+    import zstandard
+except ImportError:  # Optional: only needed for the "zstd" codec.
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+INCOMPLETE_SUFFIX = ".incomplete"
+# Files are compressed in blocks of this size, several blocks at a time.
+BLOCK_SIZE = 4 * 1024 * 1024
+SAMPLE_SIZE = 256 * 1024
+# A sample that doesn't shrink below this ratio is stored as-is.
+STORE_RATIO = 0.95
+DEFLATE_WINDOW = 32 * 1024
+
+METHODS = {"store": 0, "deflate": 8, "lzma": 14, "zstd": 93}
+DEFAULT_LEVELS = {"deflate": 6, "lzma": 6, "zstd": 3}
+INCOMPRESSIBLE_EXTENSIONS = frozenset({
+    ".safetensors", ".ckpt", ".pt", ".pth", ".bin", ".gguf", ".onnx",
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".heic",
+    ".mp3", ".mp4", ".mkv", ".webm", ".mov", ".ogg", ".flac", ".opus",
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".zst", ".7z", ".rar", ".lz4",
+    ".parquet", ".npz",
+})
+
+_ZIP64_LIMIT = (1 << 31) - 1
+_MAX_U32 = 0xFFFFFFFF
+_MAX_U16 = 0xFFFF
+
+
+class CompressionOptions:
+    def __init__(
+        self,
+        codec="deflate",
+        level=None,
+        threads=0,
+        auto_store=True,
+        store_extensions=INCOMPRESSIBLE_EXTENSIONS,
+    ):
+        if codec not in METHODS:
+            raise ValueError(f"Unknown compression codec: {codec}")
+        if codec == "zstd" and zstandard is None:
+            raise ValueError(
+                "zstd compression needs the 'zstandard' package to be installed."
+            )
+        self.codec = codec
+        self.level = level or DEFAULT_LEVELS.get(codec)
+        self.threads = threads or os.cpu_count() or 1
+        self.auto_store = auto_store
+        self.store_extensions = frozenset(
+            ext.lower() for ext in store_extensions
+        )
+
+
+def collect_entries(folder_path):
+    # (path, arcname, size) for every file under folder_path, in a stable
+    # order so the same tree always produces the same archive bytes.
+    entries = []
+    for root, dirs, files in os.walk(folder_path):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            arcname = os.path.relpath(path, folder_path).replace(os.sep, "/")
+            try:
+                size = os.path.getsize(path)
+            except OSError as e:
+                logger.warning(f"Skipping unreadable file {path}: {e}")
+                continue
+            entries.append((path, arcname, size))
+    return entries
+
+
+def choose_codec(path, size, options):
+    # Already-compressed formats (weights, media, archives) barely shrink;
+    # storing them saves the CPU time without costing space.
+    if options.codec == "store" or size == 0:
+        return "store"
+    if not options.auto_store:
+        return options.codec
+    if os.path.splitext(path)[1].lower() in options.store_extensions:
+        return "store"
+    if size >= SAMPLE_SIZE:
+        with open(path, "rb") as f:
+            sample = f.read(SAMPLE_SIZE)
+        if len(zlib.compress(sample, 1)) > len(sample) * STORE_RATIO:
+            return "store"
+    return options.codec
+
+
+def _lzma_compressor(level):
+    # Zip's LZMA method: a small header with the LZMA1 properties, then a
+    # raw LZMA1 stream with an end marker (zipfile.LZMACompressor, plus a
+    # level).
+    props = lzma._encode_filter_properties(
+        {"id": lzma.FILTER_LZMA1, "preset": level}
+    )
+    compressor = lzma.LZMACompressor(
+        lzma.FORMAT_RAW,
+        filters=[lzma._decode_filter_properties(lzma.FILTER_LZMA1, props)],
+    )
+    return compressor, struct.pack("<BBH", 9, 4, len(props)) + props
+
+
+class _Entry:
+    def __init__(self, path, arcname, size, codec):
+        zinfo = zipfile.ZipInfo.from_file(
+            path, arcname, strict_timestamps=False
+        )
+        self.path = path
+        self.zinfo = zinfo
+        self.size = size
+        self.codec = codec
+        self.method = METHODS[codec]
+        self.crc = 0
+        self.compress_size = 0
+        self.file_size = 0
+        self.header_offset = 0
+        # Sizes aren't known up front, so large files get ZIP64 fields.
+        self.zip64 = size * 1.05 > _ZIP64_LIMIT
+        self.lzma = None
+        self.sha256 = None
+
+    def name_and_flags(self):
+        # Bit 3: sizes and CRC follow the data in a data descriptor.
+        flags = 0x08
+        if self.codec == "lzma":
+            flags |= 0x02
+        try:
+            name = self.zinfo.filename.encode("ascii")
+        except UnicodeEncodeError:
+            name = self.zinfo.filename.encode("utf-8")
+            flags |= 0x800
+        return name, flags
+
+    def version(self):
+        version = {"store": 10, "deflate": 20}.get(self.codec, 63)
+        if self.zip64:
+            version = max(version, 45)
+        return version
+
+    def dos_time(self):
+        year, month, day, hour, minute, second = self.zinfo.date_time
+        dos_date = (year - 1980) << 9 | month << 5 | day
+        dos_time = hour << 11 | minute << 5 | (second // 2)
+        return dos_time, dos_date
+
+
+class _ZipWriter:
+    # Emits a zip archive as a sequence of byte strings without ever
+    # seeking: each entry is a local header, its data and a data descriptor,
+    # followed at the end by the central directory (ZIP64 where needed).
+    def __init__(self):
+        self.offset = 0
+        self.entries = []
+
+    def _emit(self, data):
+        self.offset += len(data)
+        return data
+
+    def begin_entry(self, entry):
+        entry.header_offset = self.offset
+        name, flags = entry.name_and_flags()
+        dos_time, dos_date = entry.dos_time()
+        extra = b""
+        sizes = 0
+        if entry.zip64:
+            extra = struct.pack("<HHQQ", 0x0001, 16, 0, 0)
+            sizes = _MAX_U32
+        header = struct.pack(
+            "<IHHHHHIIIHH",
+            0x04034B50,
+            entry.version(),
+            flags,
+            entry.method,
+            dos_time,
+            dos_date,
+            0,
+            sizes,
+            sizes,
+            len(name),
+            len(extra),
+        )
+        self.entries.append(entry)
+        return self._emit(header + name + extra)
+
+    def add_data(self, entry, data, raw_size):
+        entry.compress_size += len(data)
+        entry.file_size += raw_size
+        return self._emit(data)
+
+    def end_entry(self, entry, crc):
+        entry.crc = crc
+        if entry.zip64:
+            descriptor = struct.pack(
+                "<IIQQ", 0x08074B50, crc, entry.compress_size, entry.file_size
+            )
+        else:
+            if entry.file_size > _MAX_U32 or entry.compress_size > _MAX_U32:
+                raise IOError(
+                    f"{entry.path} grew past 4 GB while it was being zipped."
+                )
+            descriptor = struct.pack(
+                "<IIII", 0x08074B50, crc, entry.compress_size, entry.file_size
+            )
+        return self._emit(descriptor)
+
+    def finish(self):
+        cd_offset = self.offset
+        parts = []
+        for entry in self.entries:
+            name, flags = entry.name_and_flags()
+            dos_time, dos_date = entry.dos_time()
+            zip64_fields = []
+            file_size, compress_size = entry.file_size, entry.compress_size
+            header_offset = entry.header_offset
+            if file_size > _MAX_U32 or entry.zip64:
+                zip64_fields.append(file_size)
+                file_size = _MAX_U32
+            if compress_size > _MAX_U32 or entry.zip64:
+                zip64_fields.append(compress_size)
+                compress_size = _MAX_U32
+            if header_offset > _MAX_U32:
+                zip64_fields.append(header_offset)
+                header_offset = _MAX_U32
+            extra = b""
+            version = entry.version()
+            if zip64_fields:
+                extra = struct.pack(
+                    f"<HH{len(zip64_fields)}Q",
+                    0x0001,
+                    8 * len(zip64_fields),
+                    *zip64_fields,
+                )
+                version = max(version, 45)
+            parts.append(struct.pack(
+                "<IHHHHHHIIIHHHHHII",
+                0x02014B50,
+                entry.zinfo.create_system << 8 | version,
+                version,
+                flags,
+                entry.method,
+                dos_time,
+                dos_date,
+                entry.crc,
+                compress_size,
+                file_size,
+                len(name),
+                len(extra),
+                0,
+                0,
+                0,
+                entry.zinfo.external_attr,
+                header_offset,
+            ) + name + extra)
+        central_directory = b"".join(parts)
+        cd_size = len(central_directory)
+        count = len(self.entries)
+        tail = b""
+        if count > _MAX_U16 or cd_offset > _MAX_U32 or cd_size > _MAX_U32:
+            zip64_eocd_offset = cd_offset + cd_size
+            tail += struct.pack(
+                "<IQHHIIQQQQ",
+                0x06064B50, 44, 45, 45, 0, 0, count, count, cd_size, cd_offset,
+            )
+            tail += struct.pack("<IIQI", 0x07064B50, 0, zip64_eocd_offset, 1)
+        tail += struct.pack(
+            "<IHHHHIIH",
+            0x06054B50,
+            0,
+            0,
+            min(count, _MAX_U16),
+            min(count, _MAX_U16),
+            min(cd_size, _MAX_U32),
+            min(cd_offset, _MAX_U32),
+            0,
+        )
+        return self._emit(central_directory + tail)
+
+
+def _compress_block(entry, level, data, last, zdict, previous):
+    # Runs on a pool thread; zlib, lzma and zstandard release the GIL.
+    if entry.codec == "store":
+        return data
+    if entry.codec == "deflate":
+        # pigz-style: each block is raw deflate primed with the previous
+        # block's last 32 KB and ends on a byte boundary, so the blocks
+        # concatenate into one valid stream.
+        if zdict:
+            compressor = zlib.compressobj(
+                level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=zdict
+            )
+        else:
+            compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        return compressor.compress(data) + compressor.flush(
+            zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH
+        )
+    if entry.codec == "zstd":
+        # Concatenated zstd frames decode as one stream.
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    # LZMA can't be split, so blocks of one file run through a single
+    # compressor in order. The previous block was submitted (and so
+    # started) first, which makes waiting on it deadlock-free.
+    if previous is not None:
+        previous.result()
+    header = b""
+    if entry.lzma is None:
+        entry.lzma, header = _lzma_compressor(level)
+    out = header + entry.lzma.compress(data)
+    if last:
+        out += entry.lzma.flush()
+    return out
+
+
+class _BoundedReader:
+    # The first `size` bytes of a file object from its current position.
+    def __init__(self, file_obj, size):
+        self._file = file_obj
+        self._remaining = size
+
+    def read(self, size=-1):
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+
+class _ZstdMemberReader:
+    # Reads a zstd member (method 93) of an archive, which zipfile can't
+    # decode: the raw data after the local header goes through zstandard,
+    # and the CRC and size are checked at the end like zipfile does.
+    def __init__(self, archive_path, member):
+        self.name = member.filename
+        self._member = member
+        self._crc = 0
+        self._size = 0
+        self._file = open(archive_path, "rb")
+        try:
+            self._file.seek(member.header_offset)
+            header = self._file.read(30)
+            if len(header) != 30 or header[:4] != b"PK\x03\x04":
+                raise zipfile.BadZipFile(
+                    f"Bad local file header for {member.filename!r}"
+                )
+            name_length, extra_length = struct.unpack("<HH", header[26:30])
+            self._file.seek(name_length + extra_length, io.SEEK_CUR)
+            # Blocks are separate frames; they decode as one stream.
+            self._reader = zstandard.ZstdDecompressor().stream_reader(
+                _BoundedReader(self._file, member.compress_size),
+                read_across_frames=True,
+            )
+        except BaseException:
+            self._file.close()
+            raise
+
+    def read(self, size=-1):
+        data = self._reader.read(size)
+        if data:
+            self._crc = zlib.crc32(data, self._crc)
+            self._size += len(data)
+        elif (self._crc, self._size) != (
+            self._member.CRC, self._member.file_size
+        ):
+            raise zipfile.BadZipFile(f"Bad CRC-32 for file {self.name!r}")
+        return data
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_member(zf, member):
+    # zf.open(member) for reading, including the zstd members written by
+    # the "zstd" codec.
+    if member.compress_type != METHODS["zstd"]:
+        return zf.open(member)
+    if zstandard is None:
+        raise ValueError(
+            f"{member.filename} is zstd-compressed; reading it needs the "
+            "'zstandard' package to be installed."
+        )
+    return _ZstdMemberReader(zf.filename, member)
+
+
+def iter_archive(entries, options=None, cancel_event=None,
+                 progress_callback=None, on_entry_done=None):
+    # Generator of byte strings forming a zip archive of `entries`. Blocks
+    # are compressed on a thread pool, a bounded number ahead of the one
+    # being written, and the output is assembled in order, so it is the
+    # same for the same input regardless of thread timing. on_entry_done
+    # (path, arcname, size, sha256) is called as each file is written; the
+    # hash comes from the same read that feeds the compressor.
+    options = options or CompressionOptions()
+    writer = _ZipWriter()
+    pending = collections.deque()
+    window = options.threads * 2
+    pool = ThreadPoolExecutor(max_workers=options.threads)
+
+    def drain(limit):
+        while len(pending) > limit:
+            kind, entry, payload, raw_size = pending.popleft()
+            if kind == "begin":
+                yield writer.begin_entry(entry)
+            elif kind == "block":
+                data = writer.add_data(entry, payload.result(), raw_size)
+                if progress_callback:
+                    progress_callback(raw_size)
+                yield data
+            else:
+                descriptor = writer.end_entry(entry, payload)
+                if on_entry_done:
+                    on_entry_done(
+                        entry.path,
+                        entry.zinfo.filename,
+                        entry.file_size,
+                        entry.sha256.hexdigest(),
+                    )
+                yield descriptor
+
+    try:
+        for path, arcname, size in entries:
+            entry = _Entry(path, arcname, size, choose_codec(path, size, options))
+            pending.append(("begin", entry, None, 0))
+            crc = 0
+            previous = None
+            zdict = None
+            blocks = 0
+            if on_entry_done:
+                entry.sha256 = hashlib.sha256()
+            with open(path, "rb") as f:
+                block = f.read(BLOCK_SIZE)
+                while block:
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise TransferCancelledError(
+                            "Zipping was cancelled by user."
+                        )
+                    next_block = f.read(BLOCK_SIZE)
+                    crc = zlib.crc32(block, crc)
+                    if on_entry_done:
+                        entry.sha256.update(block)
+                    future = pool.submit(
+                        _compress_block,
+                        entry,
+                        options.level,
+                        block,
+                        not next_block,
+                        zdict,
+                        previous,
+                    )
+                    pending.append(("block", entry, future, len(block)))
+                    blocks += 1
+                    if entry.codec == "lzma":
+                        previous = future
+                    elif entry.codec == "deflate":
+                        zdict = block[-DEFLATE_WINDOW:]
+                    yield from drain(window)
+                    block = next_block
+            if not blocks and entry.codec != "store":
+                # The file emptied since it was listed; compressed formats
+                # still need their end-of-stream marker.
+                future = pool.submit(
+                    _compress_block, entry, options.level, b"", True, None, None
+                )
+                pending.append(("block", entry, future, 0))
+            pending.append(("end", entry, crc, 0))
+        yield from drain(0)
+        yield writer.finish()
+    finally:
+        for _, _, payload, _ in pending:
+            if hasattr(payload, "cancel"):
+                payload.cancel()
+        pool.shutdown(wait=True)
+
+
+def write_zip(entries, dest_path, options=None, cancel_event=None,
+              progress_callback=None, on_entry_done=None):
+    # Writes the archive straight to its destination; it only takes the
+    # final name once complete, and is removed if zipping fails.
+    temp_path = dest_path + INCOMPLETE_SUFFIX
+    try:
+        with open(temp_path, "wb") as f:
+            for data in iter_archive(
+                entries, options, cancel_event, progress_callback,
+                on_entry_done,
+            ):
+                f.write(data)
+        os.replace(temp_path, dest_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return dest_path
+
+
+def volume_name(base_name, index, archive_format="zip"):
+    # WebDataset's shard naming for tar; numbered parts for zip.
+    if archive_format == "tar":
+        return f"{base_name}-{index:06d}.tar"
+    return f"{base_name}-{index:05d}.zip"
+
+
+def _sample_key(arcname):
+    # WebDataset groups files into samples by their path up to the first
+    # dot of the file name: "a/0001.jpg" and "a/0001.json" form one sample.
+    directory, _, name = arcname.rpartition("/")
+    return f"{directory}/{name.split('.', 1)[0]}"
+
+
+def _tar_member_size(size):
+    # One 512-byte header plus data padded to whole blocks.
+    return 512 + (size + 511) // 512 * 512
+
+
+def _tar_size(members_size):
+    # tarfile pads the finished archive to whole 10 KB records.
+    record = tarfile.RECORDSIZE
+    return (members_size + 1024 + record - 1) // record * record
+
+
+def plan_tar_shards(entries, shard_size):
+    # Groups entries into shards of at most shard_size bytes, never
+    # splitting a sample. A sample larger than a shard gets its own shard.
+    shards = []
+    current = []
+    current_size = 0
+    samples = []
+    for entry in entries:
+        key = _sample_key(entry[1])
+        if samples and samples[-1][0] == key:
+            samples[-1][1].append(entry)
+        else:
+            samples.append((key, [entry]))
+    for _, sample in samples:
+        sample_size = sum(_tar_member_size(size) for _, _, size in sample)
+        if current and _tar_size(current_size + sample_size) > shard_size:
+            shards.append(current)
+            current = []
+            current_size = 0
+        current.extend(sample)
+        current_size += sample_size
+    if current:
+        shards.append(current)
+    return shards
+
+
+def write_tar(entries, dest_path, cancel_event=None, progress_callback=None):
+    # Uncompressed tar, as WebDataset loaders expect; written in place
+    # like write_zip.
+    temp_path = dest_path + INCOMPLETE_SUFFIX
+    try:
+        with tarfile.open(temp_path, "w", format=tarfile.PAX_FORMAT) as tar:
+            for path, arcname, _ in entries:
+                tarinfo = tar.gettarinfo(path, arcname)
+                last = [0]
+
+                def on_read(bytes_read):
+                    if progress_callback:
+                        progress_callback(bytes_read - last[0])
+                    last[0] = bytes_read
+
+                with CountingFileReader(path, on_read, cancel_event) as f:
+                    f.start_counting()
+                    # Archive what was listed even if the file grows.
+                    tarinfo.size = min(tarinfo.size, f.size)
+                    tar.addfile(tarinfo, f)
+        os.replace(temp_path, dest_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return dest_path
+
+
+def _write_zip_volumes(entries, dest_dir, base_name, volume_size, options,
+                       cancel_event, progress_callback, on_volume_sealed):
+    # Zip volumes are packed lazily: the next file joins the current volume
+    # only if the volume can't exceed volume_size even if the file doesn't
+    # compress at all.
+    remaining = collections.deque(entries)
+    paths = []
+    while remaining:
+        index = len(paths) + 1
+        path = os.path.join(dest_dir, volume_name(base_name, index))
+        state = {"written": 0, "pulled": 0, "drained": 0}
+
+        def volume_entries():
+            first = True
+            while remaining:
+                entry = remaining[0]
+                # Bytes on disk, plus an upper bound for what's in flight.
+                estimate = (
+                    state["written"] + state["pulled"] - state["drained"]
+                    + entry[2] + 1024
+                )
+                if not first and estimate > volume_size:
+                    return
+                remaining.popleft()
+                first = False
+                state["pulled"] += entry[2]
+                yield entry
+
+        def on_progress(num_bytes):
+            state["drained"] += num_bytes
+            if progress_callback:
+                progress_callback(num_bytes)
+
+        temp_path = path + INCOMPLETE_SUFFIX
+        try:
+            with open(temp_path, "wb") as f:
+                for data in iter_archive(
+                    volume_entries(), options, cancel_event, on_progress
+                ):
+                    f.write(data)
+                    state["written"] += len(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        if state["written"] > volume_size:
+            logger.warning(
+                f"{path} exceeds the volume size: it holds a single file "
+                "larger than one volume."
+            )
+        paths.append(path)
+        if on_volume_sealed:
+            on_volume_sealed(path, index)
+    return paths
+
+
+def write_volumes(entries, dest_dir, base_name, volume_size, options=None,
+                  archive_format="zip", cancel_event=None,
+                  progress_callback=None, on_volume_sealed=None):
+    # Splits the archive into self-contained volumes of about volume_size
+    # bytes. Each volume is complete and final when on_volume_sealed(path,
+    # index) is called, so it can be uploaded while the next one is built.
+    os.makedirs(dest_dir, exist_ok=True)
+    if archive_format == "zip":
+        return _write_zip_volumes(
+            entries, dest_dir, base_name, volume_size, options,
+            cancel_event, progress_callback, on_volume_sealed,
+        )
+    paths = []
+    for index, shard in enumerate(plan_tar_shards(entries, volume_size), 1):
+        path = os.path.join(dest_dir, volume_name(base_name, index, "tar"))
+        write_tar(shard, path, cancel_event, progress_callback)
+        paths.append(path)
+        if on_volume_sealed:
+            on_volume_sealed(path, index)
+    return paths
+
+
+class ZipStream(io.BufferedIOBase):
+    # Read-only file object whose content is a zip archive generated on the
+    # fly, so it can be handed to an upload without ever existing on disk.
+    # Seeking backwards regenerates the archive from the start (the output
+    # is deterministic); huggingface_hub reads it twice, once to hash it and
+    # once to send it. Like CountingFileReader, progress is only reported
+    # after start_counting().
+    def __init__(self, entries, options=None, callback=None,
+                 cancel_event=None):
+        super().__init__()
+        self.entries = entries
+        self.options = options
+        self.name = "archive.zip"
+        self.size = None
+        self.bytes_read = 0
+        self._callback = callback
+        self._cancel_event = cancel_event
+        self._counting = False
+        self._position = 0
+        self._chunks = None
+        self._restart()
+
+    def _restart(self):
+        if self._chunks is not None:
+            self._chunks.close()
+        self._chunks = iter_archive(
+            self.entries, self.options, self._cancel_event
+        )
+        self._buffer = b""
+        self._buffer_start = 0
+
+    def _fill_to(self, position):
+        # Advances the generator until `position` falls inside the buffer.
+        # Returns False at the end of the archive.
+        if position < self._buffer_start:
+            self._restart()
+        while position >= self._buffer_start + len(self._buffer):
+            self._buffer_start += len(self._buffer)
+            try:
+                self._buffer = next(self._chunks)
+            except StopIteration:
+                self._buffer = b""
+                self.size = self._buffer_start
+                return False
+        return True
+
+    def start_counting(self):
+        self.bytes_read = 0
+        self._counting = True
+
+    def read(self, size=-1):
+        if self._cancel_event is not None and self._cancel_event.is_set():
+            raise TransferCancelledError("Upload was cancelled by user.")
+        parts = []
+        while size is None or size < 0 or size > 0:
+            if not self._fill_to(self._position):
+                break
+            start = self._position - self._buffer_start
+            end = len(self._buffer) if size is None or size < 0 else start + size
+            part = self._buffer[start:end]
+            parts.append(part)
+            self._position += len(part)
+            if size is not None and size >= 0:
+                size -= len(part)
+        data = b"".join(parts)
+        if self._counting and data:
+            self.bytes_read = min(
+                self.size or self._position, self.bytes_read + len(data)
+            )
+            if self._callback:
+                self._callback(self.bytes_read)
+        return data
+
+    def read1(self, size=-1):
+        return self.read(size)
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            if self.size is None:
+                # Only known once the whole archive has been generated.
+                self._fill_to(float("inf"))
+            position = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if position < 0:
+            raise ValueError("Negative seek position.")
+        # Lazy: nothing is generated until the next read.
+        self._position = position
+        return position
+
+    def tell(self):
+        return self._position
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def close(self):
+        if self._chunks is not None:
+            self._chunks.close()
+        super().close()
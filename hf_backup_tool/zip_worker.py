@@ -0,0 +1,328 @@
+import os
+import queue
+import threading
+from PyQt6.QtCore import QThread, pyqtSignal
+from huggingface_hub import HfApi
+from custom_exceptions import APIKeyError, TransferCancelledError
+from transfer_progress import ByteCounter, ProgressThrottle, format_bytes
+from upload_engine import build_path_in_repo, upload_single_file, upload_stream
+from zip_engine import ZipStream, collect_entries, write_volumes, write_zip
+from incremental import restore, restore_size, write_incremental
+from hash_cache import get_hash_cache
+from config_manager import get_hash_workers
+
+# Sealed volumes allowed to wait for upload before zipping pauses, which
+# bounds the disk space a split upload needs.
+MAX_PENDING_VOLUMES = 2
+
+
+class ZipWorker(QThread):
+    # (bytes done, bytes total); 64-bit values.
+    progress_signal = pyqtSignal(object, object)
+    output_signal = pyqtSignal(str)
+    finished_signal = pyqtSignal(bool)
+    # Path of each split volume once it is complete.
+    volume_sealed = pyqtSignal(str)
+
+    def __init__(
+        self,
+        folder_path,
+        save_path=None,
+        api_token=None,
+        repo_id=None,
+        repo_type="model",
+        path_in_repo=None,
+        options=None,
+        volume_dir=None,
+        base_name=None,
+        volume_size=None,
+        archive_format="zip",
+        delete_after_upload=False,
+        incremental=False,
+    ):
+        # Either writes the archive to save_path, or (with repo_id) streams
+        # it straight into a Hub upload without writing it locally. With
+        # volume_size, it writes volumes into volume_dir instead, uploading
+        # each one (into the path_in_repo folder) as soon as it is sealed.
+        # With incremental, save_path is the base of an archive chain and
+        # only changes since the previous run are archived.
+        super().__init__()
+        self.folder_path = folder_path
+        self.save_path = save_path
+        self.api_token = api_token
+        self.repo_id = repo_id
+        self.repo_type = repo_type
+        self.path_in_repo = path_in_repo
+        self.options = options
+        self.volume_dir = volume_dir
+        self.base_name = base_name
+        self.volume_size = volume_size
+        self.archive_format = archive_format
+        self.delete_after_upload = delete_after_upload
+        self.incremental = incremental
+        self.cancel_event = threading.Event()
+        self._upload_errors = []
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        try:
+            if self.incremental:
+                self._zip_incremental()
+                self.finished_signal.emit(True)
+                return
+            entries = collect_entries(self.folder_path)
+            if not entries:
+                self.output_signal.emit("❌ The selected folder has no files.")
+                self.finished_signal.emit(False)
+                return
+            if self.volume_size:
+                self._zip_to_volumes(entries)
+            elif self.repo_id:
+                self._zip_to_hub(entries)
+            else:
+                self._zip_to_file(entries)
+            self.finished_signal.emit(True)
+        except TransferCancelledError:
+            if self._upload_errors:
+                self.output_signal.emit(
+                    f"❌ Volume upload failed: {self._upload_errors[0]}"
+                )
+            else:
+                self.output_signal.emit("🛑 Zipping cancelled.")
+            self.finished_signal.emit(False)
+        except Exception as e:
+            self.output_signal.emit(f"❌ Error creating zip file: {e}")
+            self.finished_signal.emit(False)
+
+    def _zip_to_file(self, entries):
+        total = sum(size for _, _, size in entries)
+        throttle = ProgressThrottle(
+            lambda done: self.progress_signal.emit(done, total)
+        )
+        counter = ByteCounter(total, throttle)
+        write_zip(
+            entries,
+            self.save_path,
+            self.options,
+            cancel_event=self.cancel_event,
+            progress_callback=counter.add,
+        )
+        throttle.flush()
+        self.output_signal.emit(
+            f"✅ Saved {len(entries)} files ({format_bytes(total)}) to "
+            f"{self.save_path}"
+        )
+
+    def _zip_incremental(self):
+        total = [0]
+        throttle = ProgressThrottle(
+            lambda done: self.progress_signal.emit(done, total[0])
+        )
+        counter = ByteCounter(0, throttle)
+
+        def on_planned(changed, deleted):
+            total[0] = counter.total = sum(size for _, _, size in changed)
+            self.output_signal.emit(
+                f"{len(changed)} new or changed files "
+                f"({format_bytes(total[0])}), {len(deleted)} deleted since "
+                "the last archive."
+            )
+
+        target, changed, deleted = write_incremental(
+            self.folder_path,
+            self.save_path,
+            self.options,
+            cancel_event=self.cancel_event,
+            progress_callback=counter.add,
+            hash_cache=get_hash_cache(),
+            max_workers=get_hash_workers() or None,
+            on_planned=on_planned,
+        )
+        throttle.flush()
+        if target is None:
+            self.output_signal.emit(
+                "✅ Nothing changed since the last archive; no delta written."
+            )
+        else:
+            self.output_signal.emit(f"✅ Saved {target}")
+
+    def _zip_to_hub(self, entries):
+        if not self.api_token:
+            raise APIKeyError("API token not found in configuration.")
+        api = HfApi(token=self.api_token)
+        stream = None
+        # The archive size is known once the hashing pass has run.
+        throttle = ProgressThrottle(
+            lambda done: self.progress_signal.emit(done, stream.size or 0)
+        )
+        stream = ZipStream(
+            entries,
+            self.options,
+            callback=throttle,
+            cancel_event=self.cancel_event,
+        )
+        self.output_signal.emit(
+            f"Streaming an archive of {len(entries)} files to "
+            f"{self.repo_id}/{self.path_in_repo}. The Hub needs its hash "
+            "before the upload, so it is built twice instead of being "
+            "staged on disk..."
+        )
+        try:
+            upload_stream(
+                api,
+                self.repo_id,
+                self.repo_type,
+                stream,
+                self.path_in_repo,
+                f"Upload {self.path_in_repo}",
+            )
+            throttle.flush()
+        finally:
+            stream.close()
+        self.output_signal.emit(
+            f"✅ Uploaded {self.path_in_repo} to '{self.repo_id}'."
+        )
+
+    def _zip_to_volumes(self, entries):
+        total = sum(size for _, _, size in entries)
+        throttle = ProgressThrottle(
+            lambda done: self.progress_signal.emit(done, total)
+        )
+        counter = ByteCounter(total, throttle)
+        pending = None
+        uploader = None
+        if self.repo_id:
+            if not self.api_token:
+                raise APIKeyError("API token not found in configuration.")
+            pending = queue.Queue(maxsize=MAX_PENDING_VOLUMES)
+            uploader = threading.Thread(
+                target=self._upload_volumes,
+                args=(HfApi(token=self.api_token), pending),
+                daemon=True,
+            )
+            uploader.start()
+
+        def on_volume_sealed(path, index):
+            self.volume_sealed.emit(path)
+            self.output_signal.emit(
+                f"📦 Sealed volume {index}: {os.path.basename(path)} "
+                f"({format_bytes(os.path.getsize(path))})"
+            )
+            if pending is None:
+                return
+            # Blocks while too many volumes wait for upload.
+            while True:
+                if self.cancel_event.is_set():
+                    raise TransferCancelledError("Zipping was cancelled by user.")
+                try:
+                    pending.put(path, timeout=0.5)
+                    return
+                except queue.Full:
+                    continue
+
+        try:
+            paths = write_volumes(
+                entries,
+                self.volume_dir,
+                self.base_name,
+                self.volume_size,
+                self.options,
+                self.archive_format,
+                cancel_event=self.cancel_event,
+                progress_callback=counter.add,
+                on_volume_sealed=on_volume_sealed,
+            )
+        finally:
+            if uploader is not None:
+                pending.put(None)
+                uploader.join()
+        throttle.flush()
+        if self._upload_errors:
+            raise self._upload_errors[0]
+        if self.repo_id:
+            self.output_signal.emit(
+                f"✅ Uploaded {len(paths)} volumes to '{self.repo_id}'."
+            )
+        else:
+            self.output_signal.emit(
+                f"✅ Saved {len(paths)} volumes to {self.volume_dir}"
+            )
+
+    def _upload_volumes(self, api, pending):
+        # Runs alongside the zipping: uploads each sealed volume while the
+        # next one is being built.
+        while True:
+            path = pending.get()
+            if path is None:
+                return
+            if self.cancel_event.is_set():
+                continue
+            name = os.path.basename(path)
+            try:
+                upload_single_file(
+                    api,
+                    self.repo_id,
+                    self.repo_type,
+                    path,
+                    build_path_in_repo(path, self.path_in_repo),
+                    f"Upload {name}",
+                    cancel_event=self.cancel_event,
+                )
+            except TransferCancelledError:
+                continue
+            except Exception as e:
+                self._upload_errors.append(e)
+                # Stop zipping: nothing more would get uploaded.
+                self.cancel_event.set()
+                continue
+            self.output_signal.emit(f"☁️ Uploaded {name} to '{self.repo_id}'.")
+            if self.delete_after_upload:
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    self.output_signal.emit(f"⚠️ Could not delete {name}: {e}")
+
+
+class RestoreWorker(QThread):
+    progress_signal = pyqtSignal(object, object)
+    output_signal = pyqtSignal(str)
+    finished_signal = pyqtSignal(bool)
+
+    def __init__(self, manifest_path, target_dir):
+        super().__init__()
+        self.manifest_path = manifest_path
+        self.target_dir = target_dir
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        try:
+            total = restore_size(self.manifest_path)
+            throttle = ProgressThrottle(
+                lambda done: self.progress_signal.emit(done, total)
+            )
+            counter = ByteCounter(total, throttle)
+            count = restore(
+                self.manifest_path,
+                self.target_dir,
+                cancel_event=self.cancel_event,
+                progress_callback=counter.add,
+                on_archive=lambda index, archives, name: self.output_signal.emit(
+                    f"Replaying {index + 1}/{archives}: {name}"
+                ),
+            )
+            throttle.flush()
+            self.output_signal.emit(
+                f"✅ Restored {count} files into {self.target_dir}"
+            )
+            self.finished_signal.emit(True)
+        except TransferCancelledError:
+            self.output_signal.emit("🛑 Restore cancelled.")
+            self.finished_signal.emit(False)
+        except Exception as e:
+            self.output_signal.emit(f"❌ Restore failed: {e}")
+            self.finished_signal.emit(False)
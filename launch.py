@@ -1,3 +1,4 @@
+import multiprocessing
 import sys
 import os
 
@@ -5,6 +6,8 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 hf_backup_tool_dir = os.path.join(current_dir, "hf_backup_tool")
 
 if __name__ == "__main__":
+    # Hashing runs in a process pool; frozen builds need this to start it.
+    multiprocessing.freeze_support()
     sys.path.insert(0, hf_backup_tool_dir)
     from main import start_application
     exit_code = start_application()
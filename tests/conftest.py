@@ -0,0 +1,12 @@
+import os
+import sys
+
+# The modules import each other by bare name; put the package folder on
+# the path the same way launch.py does.
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        "hf_backup_tool",
+    ),
+)
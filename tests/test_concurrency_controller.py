@@ -0,0 +1,102 @@
+import pytest
+import rate_limiter
+from concurrency_controller import (
+    EPOCH_SECONDS,
+    HOLD_EPOCHS,
+    ConcurrencyController,
+)
+from rate_limiter import AdaptiveRateLimiter
+
+
+@pytest.fixture(autouse=True)
+def limiter(monkeypatch):
+    # A fresh process-wide limiter, so throttles don't leak between tests.
+    limiter = AdaptiveRateLimiter()
+    monkeypatch.setattr(rate_limiter, "_rate_limiter", limiter)
+    return limiter
+
+
+def run_epoch(controller, rate, active=None, ok=1, failed=0):
+    # One epoch moving `rate` bytes per second with every slot busy.
+    controller.add_bytes(int(rate * EPOCH_SECONDS))
+    for _ in range(ok):
+        controller.task_finished(True)
+    for _ in range(failed):
+        controller.task_finished(False)
+    if active is None:
+        active = controller.current
+    return controller.limit(
+        active, now=controller._epoch_start + EPOCH_SECONDS
+    )
+
+
+def test_disabled_controller_uses_max_workers():
+    controller = ConcurrencyController(8, enabled=False)
+    assert controller.limit(0) == 8
+
+
+def test_no_decision_before_the_epoch_ends():
+    controller = ConcurrencyController(8)
+    controller.add_bytes(10**9)
+    assert controller.limit(1, now=controller._epoch_start + 1) == 1
+
+
+def test_slow_start_doubles_while_throughput_grows():
+    controller = ConcurrencyController(6)
+    assert [run_epoch(controller, rate) for rate in (100, 200, 400)] == [
+        2, 4, 6,
+    ]
+
+
+def test_probe_without_gain_is_undone_then_held():
+    controller = ConcurrencyController(16)
+    run_epoch(controller, 100)
+    run_epoch(controller, 200)
+    assert controller.current == 4
+    # Twice the workers, no more throughput.
+    assert run_epoch(controller, 200) == 2
+    for _ in range(HOLD_EPOCHS):
+        assert run_epoch(controller, 200) == 2
+    # Then probes one worker at a time.
+    assert run_epoch(controller, 200) == 3
+    assert run_epoch(controller, 300) == 4
+
+
+def test_idle_slots_are_not_probed():
+    controller = ConcurrencyController(8)
+    run_epoch(controller, 100)
+    # The queue only kept one of the two slots busy: no verdict either way.
+    assert run_epoch(controller, 100, active=1) == 2
+    assert run_epoch(controller, 100, active=1) == 2
+    assert run_epoch(controller, 200) == 4
+
+
+def test_failures_halve_the_limit():
+    controller = ConcurrencyController(8)
+    run_epoch(controller, 100)
+    run_epoch(controller, 200)
+    assert run_epoch(controller, 400, ok=3, failed=1) == 2
+    controller = ConcurrencyController(8)
+    run_epoch(controller, 100)
+    # One failure in ten is tolerated.
+    assert run_epoch(controller, 200, ok=9, failed=1) == 4
+
+
+def test_hub_throttling_halves_the_limit(limiter):
+    controller = ConcurrencyController(8, min_workers=2)
+    run_epoch(controller, 100)
+    assert controller.current == 4
+    limiter.throttled(0)
+    assert run_epoch(controller, 400) == 2
+    limiter.throttled(0)
+    # Never below min_workers.
+    assert run_epoch(controller, 400) == 2
+
+
+def test_reset_starts_over():
+    controller = ConcurrencyController(8)
+    run_epoch(controller, 100)
+    run_epoch(controller, 200)
+    controller.reset()
+    assert controller.current == 1
+    assert run_epoch(controller, 100) == 2
@@ -0,0 +1,333 @@
+import hashlib
+import os
+import threading
+import time
+import pytest
+
+pytest.importorskip("huggingface_hub")
+pytest.importorskip("requests")
+
+import download_engine  # noqa: E402
+from custom_exceptions import IntegrityError  # noqa: E402
+from download_engine import ChunkedDownloader  # noqa: E402
+from download_journal import DownloadJournal  # noqa: E402
+
+CHUNK = download_engine.READ_SIZE
+URL = "https://huggingface.co/user/repo/resolve/main/model.bin"
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=b"", headers=None, url=URL):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+        self.url = url
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        pass
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise IOError(f"HTTP {self.status_code}")
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+
+class FakeSession:
+    # Serves one file with Range support; fail(start) may return an
+    # exception to raise for the range starting there.
+    def __init__(self, data, fail=None):
+        self.data = data
+        self.fail = fail
+        self.ranges = []
+        self._lock = threading.Lock()
+
+    def head(self, url, **kwargs):
+        return FakeResponse(200, headers={
+            "Content-Length": str(len(self.data)),
+            "Accept-Ranges": "bytes",
+        })
+
+    def get(self, url, headers=None, **kwargs):
+        first, last = headers["Range"].split("=")[1].split("-")
+        start, end = int(first), int(last)
+        with self._lock:
+            self.ranges.append(start)
+        error = self.fail(start) if self.fail else None
+        if error is not None:
+            raise error
+        return FakeResponse(206, self.data[start:end + 1])
+
+
+def make_downloader(session, **kwargs):
+    return ChunkedDownloader(
+        chunk_size=CHUNK, streams_per_file=2, session=session, **kwargs
+    )
+
+
+@pytest.fixture
+def data():
+    return os.urandom(4 * CHUNK)
+
+
+def test_resume_fetches_only_missing_ranges(tmp_path, data):
+    local_path = str(tmp_path / "model.bin")
+    etag = hashlib.sha256(data).hexdigest()
+    journal = DownloadJournal(str(tmp_path / "journal.json"))
+    journal.begin_file("model.bin", len(data), etag, CHUNK)
+    # An earlier run got the first and third chunks onto disk.
+    with open(local_path + download_engine.INCOMPLETE_SUFFIX, "wb") as f:
+        f.truncate(len(data))
+        for start in (0, 2 * CHUNK):
+            f.seek(start)
+            f.write(data[start:start + CHUNK])
+            journal.mark_range_done("model.bin", start)
+    journal.flush()
+
+    session = FakeSession(data)
+    resumed = DownloadJournal(journal.path)
+    status = make_downloader(session, verify=True).download_file(
+        URL, local_path, len(data), "model.bin", etag, resumed
+    )
+
+    assert status == "downloaded"
+    assert sorted(session.ranges) == [CHUNK, 3 * CHUNK]
+    with open(local_path, "rb") as f:
+        assert f.read() == data
+    assert resumed.begin_file("model.bin", len(data), etag, CHUNK)["complete"]
+
+
+def test_interrupted_download_resumes_where_it_stopped(tmp_path, data):
+    local_path = str(tmp_path / "model.bin")
+    etag = hashlib.sha256(data).hexdigest()
+    journal = DownloadJournal(str(tmp_path / "journal.json"))
+
+    def fail(start):
+        if start == 3 * CHUNK:
+            return PermissionError("403 Forbidden")
+        return None
+
+    with pytest.raises(PermissionError):
+        make_downloader(FakeSession(data, fail)).download_file(
+            URL, local_path, len(data), "model.bin", etag, journal
+        )
+    journal.flush()
+    assert not os.path.exists(local_path)
+
+    resumed = DownloadJournal(journal.path)
+    done = resumed.begin_file(
+        "model.bin", len(data), etag, CHUNK
+    )["ranges_done"]
+    session = FakeSession(data)
+    make_downloader(session, verify=True).download_file(
+        URL, local_path, len(data), "model.bin", etag, resumed
+    )
+
+    missing = {start for start in range(0, len(data), CHUNK)} - done
+    assert 3 * CHUNK in missing
+    assert sorted(session.ranges) == sorted(missing)
+    with open(local_path, "rb") as f:
+        assert f.read() == data
+
+
+
+BLOCK = 1024
+
+
+def written_cursor(tmp_path, data,
+                   buffer_size=download_engine.HASH_BUFFER_SIZE):
+    writer = download_engine._PositionalWriter(
+        str(tmp_path / "part.bin"), len(data)
+    )
+    cursor = download_engine._HashCursor(
+        hashlib.sha256(), writer, buffer_size
+    )
+    return writer, cursor
+
+
+def feed_blocks(writer, cursor, data, starts):
+    for start in starts:
+        block = data[start:start + BLOCK]
+        writer.write_at(block, start)
+        cursor.feed(block, start)
+
+
+@pytest.mark.parametrize("buffer_size", [64 * BLOCK, 3 * BLOCK])
+def test_hash_cursor_hashes_out_of_order_extents(tmp_path, buffer_size):
+    # The small buffer makes blocks that arrive early spill to disk and be
+    # read back.
+    data = os.urandom(16 * BLOCK)
+    writer, cursor = written_cursor(tmp_path, data, buffer_size)
+    starts = list(range(0, len(data), BLOCK))
+    order = starts[1::2][::-1] + starts[::2][::-1]
+    try:
+        feed_blocks(writer, cursor, data, order)
+        cursor.finish()
+        assert cursor.position == len(data)
+        assert cursor.hexdigest() == hashlib.sha256(data).hexdigest()
+    finally:
+        cursor.close()
+        writer.close()
+
+
+def test_hash_cursor_in_order_with_a_full_buffer(tmp_path):
+    data = os.urandom(32 * BLOCK)
+    writer, cursor = written_cursor(tmp_path, data, 2 * BLOCK)
+    try:
+        feed_blocks(writer, cursor, data, range(0, len(data), BLOCK))
+        cursor.finish()
+        assert cursor.hexdigest() == hashlib.sha256(data).hexdigest()
+    finally:
+        cursor.close()
+        writer.close()
+
+
+def test_hash_cursor_reads_back_resumed_data(tmp_path):
+    data = os.urandom(8 * BLOCK)
+    writer, cursor = written_cursor(tmp_path, data)
+    try:
+        # Left on disk by an earlier run.
+        for start in (0, 4 * BLOCK):
+            writer.write_at(data[start:start + 2 * BLOCK], start)
+            cursor.add_written(start, start + 2 * BLOCK)
+        feed_blocks(writer, cursor, data, [7 * BLOCK, 3 * BLOCK, 6 * BLOCK])
+        assert cursor.position <= 3 * BLOCK
+        feed_blocks(writer, cursor, data, [2 * BLOCK])
+        cursor.finish()
+        assert cursor.position == len(data)
+        assert cursor.hexdigest() == hashlib.sha256(data).hexdigest()
+    finally:
+        cursor.close()
+        writer.close()
+
+
+def test_hash_cursor_reset_starts_over(tmp_path):
+    data = os.urandom(4 * BLOCK)
+    writer, cursor = written_cursor(tmp_path, data)
+    try:
+        feed_blocks(writer, cursor, b"x" * len(data), [0, BLOCK])
+        cursor.reset(hashlib.sha256())
+        feed_blocks(writer, cursor, data, [3 * BLOCK, 0, 2 * BLOCK, BLOCK])
+        cursor.finish()
+        assert cursor.hexdigest() == hashlib.sha256(data).hexdigest()
+    finally:
+        cursor.close()
+        writer.close()
+
+
+def test_hash_cursor_stops_at_a_gap(tmp_path):
+    data = os.urandom(4 * BLOCK)
+    writer, cursor = written_cursor(tmp_path, data)
+    try:
+        feed_blocks(writer, cursor, data, [0, 2 * BLOCK, 3 * BLOCK])
+        cursor.finish()
+        assert cursor.position == BLOCK
+    finally:
+        cursor.close()
+        writer.close()
+
+
+def test_hash_cursor_reports_read_back_errors(tmp_path):
+    writer = download_engine._PositionalWriter(str(tmp_path / "part.bin"), 0)
+    cursor = download_engine._HashCursor(hashlib.sha256(), writer)
+    try:
+        cursor.add_written(0, BLOCK)
+        with pytest.raises(IOError):
+            cursor.finish()
+    finally:
+        cursor.close()
+        writer.close()
+
+
+def test_transient_error_resumes_the_range(tmp_path, data):
+    failures = []
+
+    def fail(start):
+        if start == CHUNK and not failures:
+            failures.append(start)
+            return ConnectionError("connection reset")
+        return None
+
+    session = FakeSession(data, fail)
+    local_path = str(tmp_path / "model.bin")
+    make_downloader(session, range_retry_backoff=0.01).download_file(
+        URL, local_path, len(data)
+    )
+
+    assert sorted(session.ranges) == [0, CHUNK, CHUNK, 2 * CHUNK, 3 * CHUNK]
+    with open(local_path, "rb") as f:
+        assert f.read() == data
+
+
+def test_permanent_error_fails_fast(tmp_path, data):
+    def fail(start):
+        return PermissionError("403 Forbidden")
+
+    session = FakeSession(data, fail)
+    started = time.monotonic()
+    with pytest.raises(PermissionError):
+        make_downloader(session, range_retry_backoff=30).download_file(
+            URL, str(tmp_path / "model.bin"), len(data)
+        )
+    # Not retried: a single backoff would take 15s or more.
+    assert time.monotonic() - started < 10
+    assert len(session.ranges) == len(set(session.ranges))
+
+
+class CorruptingSession(FakeSession):
+    # Flips a byte of the first response for the range at 0.
+    def __init__(self, data):
+        super().__init__(data)
+        self.corrupted = False
+
+    def get(self, url, headers=None, **kwargs):
+        response = super().get(url, headers, **kwargs)
+        if not self.corrupted and response.body[:1]:
+            self.corrupted = True
+            body = response.body
+            response.body = bytes([body[0] ^ 0xFF]) + body[1:]
+        return response
+
+
+def test_corrupt_download_is_discarded_and_fetched_again(tmp_path, data):
+    etag = hashlib.sha256(data).hexdigest()
+    journal = DownloadJournal(str(tmp_path / "journal.json"))
+    session = CorruptingSession(data)
+    downloader = make_downloader(session, verify=True, verify_retries=1)
+    retries = []
+
+    status = downloader.download_repo_file(
+        "user/repo", "model", "main", "model.bin", len(data), etag,
+        str(tmp_path), journal,
+        on_file_retry=lambda path, attempt, error: retries.append(attempt),
+    )
+
+    assert status == "downloaded"
+    assert retries == [1]
+    assert len(session.ranges) == 8
+    with open(tmp_path / "model.bin", "rb") as f:
+        assert f.read() == data
+
+
+def test_verify_failure_leaves_nothing_to_resume(tmp_path, data):
+    etag = hashlib.sha256(b"something else").hexdigest()
+    local_path = str(tmp_path / "model.bin")
+    journal = DownloadJournal(str(tmp_path / "journal.json"))
+    downloader = make_downloader(FakeSession(data), verify=True)
+
+    with pytest.raises(IntegrityError):
+        downloader.download_file(
+            URL, local_path, len(data), "model.bin", etag, journal
+        )
+
+    assert not os.path.exists(local_path)
+    assert not os.path.exists(local_path + download_engine.INCOMPLETE_SUFFIX)
+    assert "model.bin" not in DownloadJournal(journal.path).files
@@ -0,0 +1,149 @@
+import json
+import os
+import pytest
+import download_journal
+from download_journal import DownloadJournal
+
+CHUNK = 1024
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / "journal" / "task.json")
+
+
+def test_round_trip_restores_partial_progress(journal_path):
+    journal = DownloadJournal(journal_path)
+    journal.begin_file("model.bin", 4 * CHUNK, "etag-1", CHUNK)
+    journal.mark_range_done("model.bin", 0)
+    journal.mark_range_done("model.bin", 2 * CHUNK)
+    journal.begin_file("config.json", 10, "etag-2", CHUNK)
+    journal.mark_offset("config.json", 6)
+    journal.flush()
+
+    resumed = DownloadJournal(journal_path)
+    state = resumed.begin_file("model.bin", 4 * CHUNK, "etag-1", CHUNK)
+    assert state == {
+        "complete": False,
+        "ranges_done": {0, 2 * CHUNK},
+        "offset": 0,
+    }
+    state = resumed.begin_file("config.json", 10, "etag-2", CHUNK)
+    assert state["offset"] == 6
+
+
+def test_complete_file_is_skipped_on_resume(journal_path):
+    journal = DownloadJournal(journal_path)
+    journal.begin_file("model.bin", 4 * CHUNK, "etag-1", CHUNK)
+    journal.mark_range_done("model.bin", CHUNK)
+    journal.mark_complete("model.bin")
+    journal.flush()
+
+    state = DownloadJournal(journal_path).begin_file(
+        "model.bin", 4 * CHUNK, "etag-1", CHUNK
+    )
+    assert state == {
+        "complete": True,
+        "ranges_done": set(),
+        "offset": 4 * CHUNK,
+    }
+
+
+@pytest.mark.parametrize(
+    "size, etag, chunk_size",
+    [
+        (8 * CHUNK, "etag-1", CHUNK),
+        (4 * CHUNK, "etag-new", CHUNK),
+        (4 * CHUNK, "etag-1", 2 * CHUNK),
+    ],
+)
+def test_changed_file_starts_over(journal_path, size, etag, chunk_size):
+    journal = DownloadJournal(journal_path)
+    journal.begin_file("model.bin", 4 * CHUNK, "etag-1", CHUNK)
+    journal.mark_range_done("model.bin", 0)
+    journal.flush()
+
+    state = DownloadJournal(journal_path).begin_file(
+        "model.bin", size, etag, chunk_size
+    )
+    assert state == {"complete": False, "ranges_done": set(), "offset": 0}
+
+
+def test_progress_is_batched_until_flush(journal_path, monkeypatch):
+    monkeypatch.setattr(download_journal, "FLUSH_EVERY", 3)
+    monkeypatch.setattr(download_journal, "FLUSH_INTERVAL", 3600.0)
+    journal = DownloadJournal(journal_path)
+    journal.begin_file("model.bin", 8 * CHUNK, "etag-1", CHUNK)
+    journal.mark_range_done("model.bin", 0)
+    journal.mark_range_done("model.bin", CHUNK)
+    assert not os.path.exists(journal_path)
+
+    # The third update fills the batch.
+    journal.mark_range_done("model.bin", 2 * CHUNK)
+    with open(journal_path, encoding="utf-8") as journal_file:
+        saved = json.load(journal_file)
+    assert saved["files"]["model.bin"]["ranges_done"] == [0, CHUNK, 2 * CHUNK]
+
+    journal.mark_range_done("model.bin", 3 * CHUNK)
+    journal.flush()
+    resumed = DownloadJournal(journal_path)
+    state = resumed.begin_file("model.bin", 8 * CHUNK, "etag-1", CHUNK)
+    assert state["ranges_done"] == {0, CHUNK, 2 * CHUNK, 3 * CHUNK}
+
+
+def test_repeated_range_is_not_counted_twice(journal_path):
+    journal = DownloadJournal(journal_path)
+    journal.begin_file("model.bin", 4 * CHUNK, "etag-1", CHUNK)
+    journal.mark_range_done("model.bin", 0)
+    journal.mark_range_done("model.bin", 0)
+    assert journal.files["model.bin"]["ranges_done"] == [0]
+
+
+def test_reset_file_is_written_at_once(journal_path):
+    journal = DownloadJournal(journal_path)
+    journal.begin_file("model.bin", 4 * CHUNK, "etag-1", CHUNK)
+    journal.mark_range_done("model.bin", 0)
+    journal.flush()
+
+    journal.reset_file("model.bin")
+    assert DownloadJournal(journal_path).files == {}
+
+
+def test_unreadable_journal_is_ignored(journal_path):
+    os.makedirs(os.path.dirname(journal_path))
+    with open(journal_path, "w", encoding="utf-8") as journal_file:
+        journal_file.write("{not json")
+    journal = DownloadJournal(journal_path)
+    assert journal.files == {}
+    state = journal.begin_file("model.bin", CHUNK, "etag-1", CHUNK)
+    assert state["ranges_done"] == set()
+
+
+def test_for_task_keys_on_repo_revision_and_folder(tmp_path):
+    directory = str(tmp_path)
+    first = DownloadJournal.for_task(directory, "user/repo", "model", "main")
+    again = DownloadJournal.for_task(directory, "user/repo", "model", "main")
+    other = DownloadJournal.for_task(directory, "user/repo", "model", "v2")
+    assert first.path == again.path
+    assert first.path != other.path
+    assert os.path.dirname(first.path) == os.path.join(
+        directory, download_journal.JOURNAL_DIR_NAME
+    )
+
+
+class _LfsInfo:
+    sha256 = "abc123"
+
+
+class _FileInfo:
+    def __init__(self, lfs=None, blob_id="blob-1"):
+        self.lfs = lfs
+        self.blob_id = blob_id
+
+
+def test_sibling_etag_prefers_lfs_sha256():
+    assert download_journal.sibling_etag(_FileInfo(_LfsInfo())) == "abc123"
+    assert download_journal.sibling_etag(
+        _FileInfo({"sha256": "def456"})
+    ) == "def456"
+    assert download_journal.sibling_etag(_FileInfo()) == "blob-1"
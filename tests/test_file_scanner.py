@@ -0,0 +1,119 @@
+import os
+import shutil
+import threading
+import pytest
+from custom_exceptions import TransferCancelledError
+from file_scanner import FileTable, TreeSnapshot, scan_directory
+
+
+def write(path, data=b"x"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+@pytest.fixture
+def root(tmp_path):
+    root = str(tmp_path / "tree")
+    write(os.path.join(root, "a.bin"))
+    write(os.path.join(root, "sub", "b.bin"))
+    write(os.path.join(root, "sub", "deep", "c.bin"))
+    write(os.path.join(root, "other", "d.bin"))
+    return root
+
+
+def relpaths(scanned):
+    return sorted(item.relpath for item in scanned)
+
+
+def test_first_rescan_reports_the_whole_tree(root):
+    added, removed, modified = TreeSnapshot(root).rescan()
+    assert relpaths(added) == [
+        "a.bin", "other/d.bin", "sub/b.bin", "sub/deep/c.bin",
+    ]
+    assert (removed, modified) == ([], [])
+
+
+def test_rescan_reports_only_what_changed(root):
+    snapshot = TreeSnapshot(root)
+    snapshot.rescan()
+    write(os.path.join(root, "sub", "b.bin"), b"longer")
+    write(os.path.join(root, "sub", "deep", "new.bin"))
+    os.remove(os.path.join(root, "a.bin"))
+
+    added, removed, modified = snapshot.rescan()
+
+    assert relpaths(added) == ["sub/deep/new.bin"]
+    assert removed == ["a.bin"]
+    assert relpaths(modified) == ["sub/b.bin"]
+    assert snapshot.rescan() == ([], [], [])
+
+
+def test_rescan_of_one_folder_leaves_the_others_alone(root):
+    snapshot = TreeSnapshot(root)
+    snapshot.rescan()
+    write(os.path.join(root, "other", "e.bin"))
+    write(os.path.join(root, "sub", "f.bin"))
+
+    added, _, _ = snapshot.rescan(
+        [snapshot.prefix_for(os.path.join(root, "sub"))]
+    )
+
+    assert relpaths(added) == ["sub/f.bin"]
+    assert relpaths(snapshot.rescan()[0]) == ["other/e.bin"]
+
+
+def test_vanished_folder_drops_everything_below_it(root):
+    snapshot = TreeSnapshot(root)
+    snapshot.rescan()
+    shutil.rmtree(os.path.join(root, "sub"))
+
+    added, removed, modified = snapshot.rescan([""])
+
+    assert sorted(removed) == ["sub/b.bin", "sub/deep/c.bin"]
+    assert (added, modified) == ([], [])
+    assert sorted(snapshot.dirs) == ["", "other/"]
+
+
+def test_filters_and_non_recursive_snapshots(root):
+    write(os.path.join(root, "sub", "skip.tmp"))
+    snapshot = TreeSnapshot(root, exclude=["other", "*.tmp"])
+    assert relpaths(snapshot.rescan()[0]) == [
+        "a.bin", "sub/b.bin", "sub/deep/c.bin",
+    ]
+    flat = TreeSnapshot(root, recursive=False)
+    assert relpaths(flat.rescan()[0]) == ["a.bin"]
+
+
+def test_snapshot_seeded_from_a_table(root):
+    table = FileTable(root)
+    for scanned in scan_directory(root):
+        table.append(scanned)
+    table.remove(table.row_of("a.bin"))
+    snapshot = TreeSnapshot(root)
+    snapshot.load_table(table)
+    write(os.path.join(root, "sub", "deep", "c.bin"), b"edited")
+
+    added, removed, modified = snapshot.rescan()
+
+    # a.bin is on disk but not in the table any more.
+    assert relpaths(added) == ["a.bin"]
+    assert removed == []
+    assert relpaths(modified) == ["sub/deep/c.bin"]
+
+    added_rows, removed_rows, modified_rows = table.apply_changes(
+        added, removed, modified
+    )
+    assert [table.relpaths[row] for row in added_rows] == ["a.bin"]
+    assert [table.relpaths[row] for row in modified_rows] == [
+        "sub/deep/c.bin",
+    ]
+    assert table.sizes[table.row_of("sub/deep/c.bin")] == len(b"edited")
+    assert table.count() == 4
+
+
+def test_cancelled_rescan_raises(root):
+    cancel_event = threading.Event()
+    cancel_event.set()
+    with pytest.raises(TransferCancelledError):
+        TreeSnapshot(root).rescan(cancel_event=cancel_event)
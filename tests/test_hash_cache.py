@@ -0,0 +1,92 @@
+import hashlib
+import os
+import pytest
+from hash_cache import HashCache
+
+
+def expected_hashes(data):
+    git_sha1 = hashlib.sha1(f"blob {len(data)}\0".encode("utf-8") + data)
+    return {
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "git_sha1": git_sha1.hexdigest(),
+    }
+
+
+def write(path, data, mtime_ns=None):
+    with open(path, "wb") as f:
+        f.write(data)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return str(path)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = HashCache(str(tmp_path / "hashes.sqlite"))
+    yield cache
+    cache.close()
+
+
+def test_hashes_are_computed_then_served_from_the_index(tmp_path, cache):
+    path = write(tmp_path / "a.bin", b"hello")
+    assert cache.lookup(path) is None
+    assert cache.get_hashes(path) == expected_hashes(b"hello")
+    assert cache.lookup(path) == expected_hashes(b"hello")
+
+
+def test_index_survives_reopening(tmp_path, cache):
+    path = write(tmp_path / "a.bin", b"hello")
+    cache.get_hashes(path)
+    cache.close()
+    reopened = HashCache(cache.path)
+    try:
+        assert reopened.lookup(path) == expected_hashes(b"hello")
+    finally:
+        reopened.close()
+
+
+def test_changed_file_is_not_trusted(tmp_path, cache):
+    path = write(tmp_path / "a.bin", b"hello", mtime_ns=10**18)
+    cache.get_hashes(path)
+    # Same size, different content and mtime.
+    write(path, b"world", mtime_ns=2 * 10**18)
+    assert cache.lookup(path) is None
+    assert cache.get_hashes(path) == expected_hashes(b"world")
+
+
+def test_get_many_mixes_cached_and_new_files(tmp_path, cache):
+    cached = write(tmp_path / "cached.bin", b"old")
+    fresh = write(tmp_path / "fresh.bin", b"new")
+    missing = str(tmp_path / "missing.bin")
+    cache.get_hashes(cached)
+    seen = []
+
+    results = cache.get_many(
+        [cached, fresh, missing], max_workers=1,
+        on_result=lambda path, hashes: seen.append(path),
+    )
+
+    assert results == {
+        cached: expected_hashes(b"old"),
+        fresh: expected_hashes(b"new"),
+    }
+    assert sorted(seen) == sorted([cached, fresh])
+    assert cache.lookup(fresh) == expected_hashes(b"new")
+
+
+def test_prune_drops_deleted_and_changed_files(tmp_path, cache):
+    kept = write(tmp_path / "kept.bin", b"same")
+    deleted = write(tmp_path / "deleted.bin", b"gone")
+    changed = write(tmp_path / "changed.bin", b"before")
+    for path in (kept, deleted, changed):
+        cache.get_hashes(path)
+    os.remove(deleted)
+    write(changed, b"after, longer")
+
+    assert cache.prune() == 2
+    assert cache.lookup(kept) == expected_hashes(b"same")
+    # Only runs once per session.
+    write(kept, b"edited")
+    cache.prune_once()
+    count = cache._conn.execute("SELECT COUNT(*) FROM file_hashes").fetchone()
+    assert count == (1,)
@@ -0,0 +1,80 @@
+import hashlib
+import os
+import threading
+import time
+import pytest
+from hash_utils import (
+    READ_SIZE,
+    file_hashes,
+    hash_files_parallel,
+    mmap_file_hashes,
+)
+
+
+def expected_hashes(data):
+    git_sha1 = hashlib.sha1(f"blob {len(data)}\0".encode("utf-8") + data)
+    return {
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "git_sha1": git_sha1.hexdigest(),
+    }
+
+
+@pytest.fixture
+def files(tmp_path):
+    contents = {
+        "empty.bin": b"",
+        "small.bin": b"hello",
+        "blocks.bin": os.urandom(2 * READ_SIZE + 7),
+    }
+    paths = {}
+    for name, data in contents.items():
+        path = str(tmp_path / name)
+        with open(path, "wb") as f:
+            f.write(data)
+        paths[path] = data
+    return paths
+
+
+def test_file_and_mmap_hashes_agree(files):
+    for path, data in files.items():
+        assert file_hashes(path) == expected_hashes(data)
+        assert mmap_file_hashes(path) == expected_hashes(data)
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_hash_files_parallel(tmp_path, files, max_workers):
+    missing = str(tmp_path / "missing.bin")
+    seen = []
+    results = hash_files_parallel(
+        list(files) + [missing], max_workers,
+        on_result=lambda path, hashes: seen.append(path),
+    )
+    assert results == {
+        path: expected_hashes(data) for path, data in files.items()
+    }
+    assert sorted(seen) == sorted(files)
+
+
+def test_cancelled_hash_returns_none(files):
+    cancel_event = threading.Event()
+    cancel_event.set()
+    path = next(path for path, data in files.items() if data)
+    assert file_hashes(path, cancel_event=cancel_event) is None
+    assert mmap_file_hashes(path, cancel_event) is None
+
+
+def test_cancel_stops_the_in_process_batch(files):
+    cancel_event = threading.Event()
+    results = hash_files_parallel(
+        list(files), 1, cancel_event,
+        on_result=lambda path, hashes: cancel_event.set(),
+    )
+    assert len(results) == 1
+
+
+def test_cancelled_pool_returns_no_results(files):
+    cancel_event = threading.Event()
+    cancel_event.set()
+    started = time.monotonic()
+    assert hash_files_parallel(list(files), 2, cancel_event) == {}
+    assert time.monotonic() - started < 30
@@ -0,0 +1,143 @@
+import os
+import zipfile
+import pytest
+import incremental
+from zip_engine import CompressionOptions, collect_entries
+
+
+def write(path, data, mtime_ns=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def read_tree(root):
+    tree = {}
+    for path, arcname, _ in collect_entries(root):
+        with open(path, "rb") as f:
+            tree[arcname] = f.read()
+    return tree
+
+
+@pytest.fixture
+def folder(tmp_path):
+    root = str(tmp_path / "data")
+    write(os.path.join(root, "a.txt"), b"first version")
+    write(os.path.join(root, "b.txt"), b"to be deleted")
+    write(os.path.join(root, "sub", "c.txt"), b"unchanged")
+    return root
+
+
+def backup(folder, archive, options=None):
+    return incremental.write_incremental(
+        folder, archive, options, max_workers=1
+    )
+
+
+def test_restore_replays_base_and_deltas(tmp_path, folder):
+    archive = str(tmp_path / "out" / "backup.zip")
+    os.makedirs(os.path.dirname(archive))
+    assert backup(folder, archive) == (archive, 3, 0)
+
+    write(os.path.join(folder, "a.txt"), b"second version, longer")
+    os.remove(os.path.join(folder, "b.txt"))
+    write(os.path.join(folder, "sub", "d.txt"), b"new file")
+    delta = incremental.delta_path_for(archive, 1)
+    assert backup(folder, archive) == (delta, 2, 1)
+    with zipfile.ZipFile(delta) as zf:
+        assert sorted(zf.namelist()) == ["a.txt", "sub/d.txt"]
+
+    os.remove(os.path.join(folder, "sub", "c.txt"))
+    delta = incremental.delta_path_for(archive, 2)
+    assert backup(folder, archive) == (delta, 0, 1)
+
+    manifest_path = incremental.manifest_path_for(archive)
+    target = str(tmp_path / "restored")
+    assert incremental.restore(manifest_path, target) == 2
+    assert read_tree(target) == read_tree(folder)
+    assert read_tree(target) == {
+        "a.txt": b"second version, longer",
+        "sub/d.txt": b"new file",
+    }
+    manifest = incremental.load_manifest(manifest_path)
+    for arcname, state in manifest["files"].items():
+        path = os.path.join(target, *arcname.split("/"))
+        assert os.stat(path).st_mtime_ns == state["mtime_ns"]
+
+
+def test_unchanged_tree_writes_nothing(tmp_path, folder):
+    archive = str(tmp_path / "backup.zip")
+    backup(folder, archive)
+    assert backup(folder, archive) == (None, 0, 0)
+    assert not os.path.exists(incremental.delta_path_for(archive, 1))
+
+
+def test_touched_file_is_only_changed_if_its_content_is(tmp_path, folder):
+    archive = str(tmp_path / "backup.zip")
+    backup(folder, archive)
+    manifest = incremental.load_manifest(
+        incremental.manifest_path_for(archive)
+    )
+    touched = os.path.join(folder, "a.txt")
+    edited = os.path.join(folder, "sub", "c.txt")
+    write(touched, b"first version", mtime_ns=10**18)
+    write(edited, b"Unchanged", mtime_ns=10**18)
+
+    changed, deleted, unchanged, _ = incremental.plan_incremental(
+        collect_entries(folder), manifest, max_workers=1
+    )
+
+    assert [arcname for _, arcname, _ in changed] == ["sub/c.txt"]
+    assert deleted == []
+    assert sorted(unchanged) == ["a.txt", "b.txt"]
+    assert unchanged["a.txt"]["mtime_ns"] == 10**18
+    assert unchanged["a.txt"]["sha256"] == manifest["files"]["a.txt"]["sha256"]
+
+
+def test_first_run_plans_everything(folder):
+    entries = collect_entries(folder)
+    changed, deleted, unchanged, stats = incremental.plan_incremental(
+        entries, None
+    )
+    assert changed == entries
+    assert (deleted, unchanged) == ([], {})
+    assert sorted(stats) == ["a.txt", "b.txt", "sub/c.txt"]
+
+
+def test_zstd_round_trip(tmp_path, folder):
+    pytest.importorskip("zstandard")
+    archive = str(tmp_path / "backup.zip")
+    backup(folder, archive, CompressionOptions(codec="zstd"))
+    write(os.path.join(folder, "a.txt"), b"zstd delta " * 100)
+    backup(folder, archive, CompressionOptions(codec="zstd"))
+
+    target = str(tmp_path / "restored")
+    incremental.restore(incremental.manifest_path_for(archive), target)
+    assert read_tree(target) == read_tree(folder)
+
+
+def test_restore_refuses_paths_outside_the_target(tmp_path):
+    archive = str(tmp_path / "backup.zip")
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("../escaped.txt", b"nope")
+    incremental.save_manifest(incremental.manifest_path_for(archive), {
+        "version": incremental.MANIFEST_VERSION,
+        "archives": [{
+            "name": "backup.zip", "created": "", "files": 1, "deleted": [],
+        }],
+        "files": {},
+    })
+    with pytest.raises(ValueError):
+        incremental.restore(
+            incremental.manifest_path_for(archive), str(tmp_path / "out")
+        )
+    assert not os.path.exists(tmp_path / "escaped.txt")
+
+
+def test_unknown_manifest_version_is_rejected(tmp_path):
+    path = str(tmp_path / "backup.manifest.json")
+    incremental.save_manifest(path, {"version": 99})
+    with pytest.raises(ValueError):
+        incremental.load_manifest(path)
@@ -0,0 +1,99 @@
+import email.utils
+import threading
+import time
+import pytest
+import rate_limiter
+from custom_exceptions import TransferCancelledError
+from rate_limiter import AdaptiveRateLimiter, cancellable, parse_retry_after
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("5") == 5.0
+    assert parse_retry_after("-3") == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    date = email.utils.formatdate(time.time() + 30, usegmt=True)
+    assert 25 <= parse_retry_after(date) <= 30
+
+
+def test_observe_tells_throttling_from_failures():
+    limiter = AdaptiveRateLimiter()
+    assert limiter.observe(200) is False
+    assert limiter.observe(500) is False
+    assert limiter.observe(503) is False
+    assert limiter.throttle_count == 0
+    assert limiter.observe(503, "0") is True
+    assert limiter.observe(429, "0") is True
+    assert limiter.throttle_count == 2
+
+
+def test_throttle_pauses_then_halves_the_rate_sent():
+    limiter = AdaptiveRateLimiter()
+    for _ in range(200):
+        limiter.acquire()
+    limiter.throttled(0.3)
+    # 200 requests in the last RATE_WINDOW seconds, halved.
+    assert limiter.rate == 200 / rate_limiter.RATE_WINDOW / 2
+    started = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - started >= 0.25
+
+
+def test_rate_ramps_back_to_unlimited():
+    limiter = AdaptiveRateLimiter()
+    limiter.throttled(0)
+    assert limiter.rate == rate_limiter.MIN_RATE
+    limiter.succeeded()
+    assert limiter.rate is None
+
+
+def test_configured_cap_is_kept():
+    limiter = AdaptiveRateLimiter(max_rate=4)
+    limiter.throttled(0)
+    assert limiter.rate == 2
+    for _ in range(50):
+        limiter.succeeded()
+    assert limiter.rate == 4
+    limiter.set_max_rate(0)
+    assert limiter.rate == 4
+    limiter.set_max_rate(1)
+    assert limiter.rate == 1
+
+
+def test_capped_rate_spaces_requests_out():
+    limiter = AdaptiveRateLimiter(max_rate=20)
+    started = time.monotonic()
+    for _ in range(3):
+        limiter.acquire()
+    # The first request uses the initial token, the next two wait ~50ms.
+    assert time.monotonic() - started >= 0.08
+
+
+def cancel_soon(cancel_event):
+    timer = threading.Timer(0.1, cancel_event.set)
+    timer.start()
+    return timer
+
+
+def test_cancel_ends_the_wait():
+    limiter = AdaptiveRateLimiter()
+    limiter.throttled(30)
+    cancel_event = threading.Event()
+    timer = cancel_soon(cancel_event)
+    started = time.monotonic()
+    with pytest.raises(TransferCancelledError):
+        limiter.acquire(cancel_event)
+    assert time.monotonic() - started < 5
+    timer.join()
+
+
+def test_cancellable_block_applies_to_nested_requests():
+    limiter = AdaptiveRateLimiter()
+    limiter.throttled(30)
+    cancel_event = threading.Event()
+    timer = cancel_soon(cancel_event)
+    with cancellable(cancel_event):
+        with pytest.raises(TransferCancelledError):
+            limiter.acquire()
+    timer.join()
+    assert rate_limiter._cancel_event.get() is None
@@ -0,0 +1,158 @@
+import threading
+import pytest
+
+pytest.importorskip("huggingface_hub")
+pytest.importorskip("requests")
+
+import upload_engine  # noqa: E402
+from custom_exceptions import TransferCancelledError  # noqa: E402
+from upload_engine import (  # noqa: E402
+    call_with_retries,
+    chunk_operations,
+    commit_operations,
+    is_transient_error,
+    retry_delay,
+)
+
+
+class FakeApi:
+    def __init__(self, fail_at=None):
+        self.commits = []
+        self.fail_at = fail_at
+
+    def create_commit(self, repo_id, operations, commit_message, repo_type,
+                      create_pr):
+        if len(self.commits) == self.fail_at:
+            raise IOError("commit rejected")
+        self.commits.append((commit_message, list(operations)))
+        return f"commit-{len(self.commits)}"
+
+
+def test_chunk_operations():
+    assert chunk_operations([1, 2, 3, 4, 5], 2) == [[1, 2], [3, 4], [5]]
+    assert chunk_operations([1, 2, 3], 0) == [[1, 2, 3]]
+    assert chunk_operations([], 0) == []
+    assert chunk_operations([], 2) == []
+
+
+def test_commit_operations_numbers_the_batches():
+    api = FakeApi()
+    done = []
+    infos = commit_operations(
+        api, "user/repo", "model", list("abcde"), "Upload", 2,
+        on_commit=lambda index, total, chunk, info: done.append(
+            (index, total, chunk, info)
+        ),
+    )
+    assert infos == ["commit-1", "commit-2", "commit-3"]
+    assert [message for message, _ in api.commits] == [
+        "Upload (1/3)", "Upload (2/3)", "Upload (3/3)",
+    ]
+    assert done[-1] == (2, 3, ["e"], "commit-3")
+
+
+def test_single_commit_keeps_its_message():
+    api = FakeApi()
+    commit_operations(api, "user/repo", "model", list("abc"), "Upload")
+    assert api.commits == [("Upload", ["a", "b", "c"])]
+
+
+def test_failed_batch_stops_the_rest():
+    api = FakeApi(fail_at=1)
+    done = []
+    with pytest.raises(IOError):
+        commit_operations(
+            api, "user/repo", "model", list("abcd"), "Upload", 2,
+            on_commit=lambda index, total, chunk, info: done.append(chunk),
+        )
+    # Only the first batch landed; the caller keeps the rest as failed.
+    assert done == [["a", "b"]]
+
+
+def test_cancel_stops_before_the_next_commit():
+    api = FakeApi()
+    cancel_event = threading.Event()
+
+    def on_commit(index, total, chunk, info):
+        cancel_event.set()
+
+    with pytest.raises(TransferCancelledError):
+        commit_operations(
+            api, "user/repo", "model", list("abcd"), "Upload", 2,
+            on_commit=on_commit, cancel_event=cancel_event,
+        )
+    assert len(api.commits) == 1
+
+
+class HttpError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.response = type("Response", (), {"status_code": status_code})()
+
+
+@pytest.mark.parametrize("error, transient", [
+    (ConnectionError("reset"), True),
+    (TimeoutError(), True),
+    (HttpError(503), True),
+    (HttpError(429), True),
+    (HttpError(404), False),
+    (ValueError("bad input"), False),
+])
+def test_is_transient_error(error, transient):
+    assert is_transient_error(error) is transient
+
+
+def test_retry_delay_doubles_with_jitter_and_a_cap():
+    for attempt in (1, 2, 3):
+        delay = retry_delay(attempt, 2.0)
+        assert 2.0 ** attempt / 2 <= delay <= 2.0 ** attempt
+    assert retry_delay(50, 2.0) <= upload_engine.RETRY_BACKOFF_MAX
+
+
+def flaky(failures):
+    calls = []
+
+    def func(value, cancel_event=None):
+        calls.append(cancel_event)
+        if len(calls) <= len(failures):
+            raise failures[len(calls) - 1]
+        return value
+
+    return func, calls
+
+
+def test_call_with_retries_retries_transient_errors():
+    func, calls = flaky([ConnectionError("reset"), HttpError(502)])
+    retried = []
+    result = call_with_retries(
+        func, "ok", retries=2, backoff=0.001,
+        on_retry=lambda attempt, delay, error: retried.append(attempt),
+    )
+    assert result == "ok"
+    assert retried == [1, 2]
+    assert len(calls) == 3
+
+
+def test_call_with_retries_gives_up():
+    func, calls = flaky([ConnectionError("reset")] * 3)
+    with pytest.raises(ConnectionError):
+        call_with_retries(func, "ok", retries=2, backoff=0.001)
+    assert len(calls) == 3
+
+
+def test_permanent_error_is_not_retried():
+    func, calls = flaky([HttpError(403)])
+    with pytest.raises(HttpError):
+        call_with_retries(func, "ok", retries=5, backoff=0.001)
+    assert len(calls) == 1
+
+
+def test_cancel_ends_the_backoff():
+    cancel_event = threading.Event()
+    func, calls = flaky([ConnectionError("reset")])
+    with pytest.raises(TransferCancelledError):
+        call_with_retries(
+            func, "ok", retries=1, backoff=60, cancel_event=cancel_event,
+            on_retry=lambda attempt, delay, error: cancel_event.set(),
+        )
+    assert calls == [cancel_event]
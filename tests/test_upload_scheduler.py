@@ -0,0 +1,56 @@
+from upload_scheduler import UploadScheduler
+
+FILES = [("small", 1), ("huge", 1000), ("medium", 50), ("tiny", 0),
+         ("large", 500), ("mid", 40)]
+
+
+def test_half_the_slots_go_to_the_largest_files():
+    scheduler = UploadScheduler(FILES)
+    assert [scheduler.pop(4) for _ in range(4)] == [
+        "huge", "large", "tiny", "small",
+    ]
+    # Both big-file slots are busy until one finishes.
+    assert scheduler.pop(4) == "mid"
+    scheduler.finished("huge")
+    assert scheduler.pop(4) == "medium"
+    assert len(scheduler) == 0
+
+
+def test_a_single_slot_goes_to_the_largest_file():
+    scheduler = UploadScheduler(FILES)
+    assert scheduler.pop(1) == "huge"
+    assert scheduler.pop(1) == "tiny"
+    scheduler.finished("tiny")
+    assert scheduler.pop(1) == "small"
+    scheduler.finished("huge")
+    assert scheduler.pop(1) == "large"
+
+
+def test_equal_sizes_keep_arrival_order():
+    scheduler = UploadScheduler([("a", 5), ("b", 5), ("c", 5), ("d", 5)])
+    assert [scheduler.pop(2) for _ in range(4)] == ["a", "b", "c", "d"]
+
+
+def test_queue_membership():
+    scheduler = UploadScheduler()
+    scheduler.push("a", 10)
+    scheduler.push("b", 20)
+    scheduler.push("a", 999)
+    assert len(scheduler) == 2
+    assert "a" in scheduler
+    assert sorted(scheduler) == ["a", "b"]
+    # Pushing "a" again didn't change its size.
+    assert scheduler.pop(2) == "b"
+    assert "b" not in scheduler
+    scheduler.push("b", 20)
+    assert len(scheduler) == 2
+
+
+def test_clear_empties_the_queue_and_frees_slots():
+    scheduler = UploadScheduler(FILES)
+    scheduler.pop(2)
+    scheduler.clear()
+    assert len(scheduler) == 0
+    scheduler.push("x", 1)
+    scheduler.push("y", 2)
+    assert scheduler.pop(2) == "y"